@@ -0,0 +1,118 @@
+import os
+import csv
+import random
+import argparse
+import datetime
+
+FIELDNAMES = ["amount", "category", "description", "date", "type"]
+
+# First day of every generated history
+START_DATE = datetime.date(2020, 1, 1)
+
+# (category, weight, (lowest amount, highest amount), descriptions)
+EXPENSES = [
+    ("Food", 40, (4, 60), ["groceries", "lunch", "dinner", "coffee", "bakery"]),
+    ("Transport", 20, (2, 45), ["bus ticket", "taxi", "fuel", "parking"]),
+    ("Shopping", 12, (10, 250), ["clothes", "electronics", "books", "home"]),
+    ("Entertainment", 10, (8, 120), ["cinema", "concert", "streaming", "games"]),
+    ("Utilities", 6, (30, 220), ["electricity", "water", "internet", "phone"]),
+    ("Health", 5, (15, 300), ["pharmacy", "doctor", "dentist", "gym"]),
+    ("Travel", 2, (150, 1500), ["flight", "hotel", "train"]),
+]
+INCOMES = [
+    ("Freelance", 4, (100, 2000), ["client project", "consulting", "design work"]),
+    ("Gift", 1, (20, 300), ["birthday", "holiday gift"]),
+]
+
+
+def generate_rows(rows, seed=0, years=5):
+    """
+    Yields a deterministic, date-ordered history of transactions.
+
+    Every month starts with a salary and a rent payment. The remaining rows
+    are spread over the days of the history, mostly small expenses with a
+    few larger ones and occasional extra income, so category and amount
+    distributions look like a real budget.
+
+    Parameters:
+    rows (int): Number of transactions to generate
+    seed (int): Seed of the random generator; the same seed gives the same rows
+    years (int): Length of the history
+
+    Returns:
+    generator: Rows as [amount, category, description, date, type] lists
+    """
+    rnd = random.Random(seed)
+    days = (START_DATE.replace(year=START_DATE.year + years) - START_DATE).days
+    months = years * 12
+    fixed = min(rows, 2 * months) // 2 * 2
+    daily = rows - fixed
+
+    # Day offsets of the variable transactions, in chronological order
+    offsets = sorted(rnd.randrange(days) for _ in range(daily))
+    dates = [START_DATE + datetime.timedelta(days=d) for d in range(days)]
+    month_of = [(d.year - START_DATE.year) * 12 + d.month - 1 for d in dates]
+    dates = [d.isoformat() for d in dates]
+    categories = [(entry, "expense") for entry in EXPENSES]
+    categories += [(entry, "income") for entry in INCOMES]
+    picks = rnd.choices(categories, [entry[1] for entry, _ in categories], k=daily)
+
+    month = 0
+    written = 0
+    for offset, pick in zip(offsets + [days], picks + [None]):
+        # Monthly salary and rent are due on the first day of each month
+        month_index = months if pick is None else month_of[offset]
+        while month < months and written < fixed and month_index >= month:
+            first = datetime.date(START_DATE.year + month // 12, month % 12 + 1, 1)
+            yield [4200, "Salary", "monthly salary", first.isoformat(), "income"]
+            yield [1500, "Rent", "apartment rent", first.isoformat(), "expense"]
+            month += 1
+            written += 2
+        if pick is None:
+            break
+
+        (category, _, (low, high), descriptions), t_type = pick
+        # Skew amounts towards the low end of the range, like real spending
+        amount = low + int((high - low) * rnd.random() ** 2)
+        yield [amount, category, rnd.choice(descriptions), dates[offset], t_type]
+
+
+def generate(path, rows, seed=0, years=5):
+    """
+    Writes a generated history to a transactions CSV file.
+
+    Parameters:
+    path (str): Location of the CSV file
+    rows (int): Number of transactions to generate
+    seed (int): Seed of the random generator
+    years (int): Length of the history
+
+    Returns:
+    None
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDNAMES)
+        writer.writerows(generate_rows(rows, seed, years))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic transaction history for a user."
+    )
+    parser.add_argument("rows", type=int, help="number of transactions")
+    parser.add_argument("--user", default="bench", help="user to generate data for")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--years", type=int, default=5)
+    args = parser.parse_args()
+
+    path = f"database/{args.user}/transactions.csv"
+    generate(path, args.rows, args.seed, args.years)
+    print(f"Wrote {args.rows} transactions to {path}")
+
+
+if __name__ == "__main__":
+    main()
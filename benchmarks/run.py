@@ -0,0 +1,294 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import datetime
+import tempfile
+import contextlib
+from unittest import mock
+from tabulate import tabulate
+
+# Allow running as a script as well as with python -m benchmarks.run
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generate import generate, START_DATE
+from function.view_balance import ViewBalance
+from function.reports import Reports
+from function.transactions.transaction_store import open_store
+from function.transactions.result_cache import RESULT_CACHE
+from function.transactions.view_transactions import ViewTransactions
+from function.transactions.edit_transaction import EditTransaction
+from function.transactions.delete_transaction import DeleteTransaction
+from function.transactions.transaction_history import TransactionHistory
+
+USER = "bench"
+
+
+@contextlib.contextmanager
+def headless():
+    """
+    Silences the console UI while a case runs: output goes to os.devnull,
+    screen clears and pauses are skipped, and any input() prompt is an error.
+    """
+
+    def no_input(prompt=""):
+        raise RuntimeError(f"benchmark case prompted for input: {prompt!r}")
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        with mock.patch("builtins.input", no_input), mock.patch(
+            "os.system", return_value=0
+        ), mock.patch("time.sleep"):
+            yield
+
+
+# ---------- Cases ----------
+
+
+def calculate_balance(store, paths):
+    ViewBalance(USER, store).calculate_balance()
+
+
+def filter_category(store, paths):
+    ViewTransactions(USER, store).filter_category("Food")
+
+
+def filter_date(store, paths):
+    year = START_DATE.year + 1
+    ViewTransactions(USER, store).filter_date(f"{year}-01-01", f"{year}-12-31")
+
+
+def sort_by(store, paths):
+    ViewTransactions(USER, store).sort_by("2")
+
+
+def top_amounts(store, paths):
+    ViewTransactions(USER, store).sort_by("5")
+
+
+def search(store, paths):
+    ViewTransactions(USER, store).search("coffee")
+
+
+def monthly_summary(store, paths):
+    Reports(USER, store).monthly_summary(6, START_DATE.year + 1)
+
+
+def category_summary(store, paths):
+    Reports(USER, store).category_summary()
+
+
+def financial_health_report(store, paths):
+    Reports(USER, store).financial_health_report()
+
+
+def recurring_transactions(store, paths):
+    Reports(USER, store).recurring_transactions()
+
+
+def edit_row(store, paths):
+    editor = EditTransaction(USER, store)
+    index = store.count() // 2
+    editor.transaction = store.row(index).copy()
+    editor.transaction.amount += 1
+    editor.save_change(str(index + 1))
+
+
+def delete_row(store, paths):
+    DeleteTransaction(USER, store).delete_transaction(store.count() // 2 + 1)
+
+
+def export_data(store, paths):
+    TransactionHistory(USER, store).export_data(paths["export"])
+
+
+def import_data(store, paths):
+    TransactionHistory(USER, store).import_data(paths["import"])
+
+
+# Read-only cases first; every case starts again from the same data files
+CASES = [
+    calculate_balance,
+    filter_category,
+    filter_date,
+    sort_by,
+    top_amounts,
+    search,
+    monthly_summary,
+    category_summary,
+    financial_health_report,
+    recurring_transactions,
+    edit_row,
+    delete_row,
+    export_data,
+    import_data,
+]
+
+# Cases that change the data: a repeated call would run on different data, and
+# a repeated import would only find duplicates, so they are only timed cold
+MUTATING_CASES = {edit_row, delete_row, import_data}
+
+
+# ---------- Runner ----------
+
+
+def timed(case, store, paths):
+    start = time.perf_counter()
+    with headless():
+        case(store, paths)
+    return time.perf_counter() - start
+
+
+def prepare(rows, engine, seed, workdir):
+    """
+    Generates the user's data and the import file, and brings the store to its steady state.
+
+    Returns:
+    dict: Paths used by the cases
+    """
+    user_dir = os.path.join(workdir, "database", USER)
+    generate(os.path.join(user_dir, "transactions.csv"), rows, seed)
+    paths = {
+        "import": os.path.join(workdir, "import.csv"),
+        "export": os.path.join(workdir, "export"),
+        "pristine": os.path.join(workdir, "pristine"),
+    }
+    generate(paths["import"], max(rows // 10, 1), seed + 1)
+    os.makedirs(paths["export"])
+
+    store = open_store(USER, engine)
+    if engine == "sqlite":
+        store.migrate_from_csv()
+    # Build the aggregates sidecar once, as a running installation would have it
+    store.balance()
+    store.close()
+    shutil.copytree(os.path.dirname(user_dir), paths["pristine"])
+    return paths
+
+
+def restore(paths, workdir):
+    database = os.path.join(workdir, "database")
+    shutil.rmtree(database)
+    shutil.copytree(paths["pristine"], database)
+
+
+def run(sizes, engines, repeat, seed):
+    """
+    Times every case for each history size and storage engine.
+
+    The cold time is the first call on a freshly opened store with an empty
+    result cache; the warm time is the best of the following calls on the
+    same store, or None for the cases in MUTATING_CASES.
+
+    Returns:
+    list: One result dictionary per (rows, engine, case)
+    """
+    results = []
+    cwd = os.getcwd()
+    for rows in sizes:
+        for engine in engines:
+            workdir = tempfile.mkdtemp(prefix="finance-bench-")
+            try:
+                # The app keeps its data under database/ in the working directory
+                os.chdir(workdir)
+                paths = prepare(rows, engine, seed, workdir)
+                for case in CASES:
+                    restore(paths, workdir)
+                    # Restored files keep their timestamps, so earlier results would still match
+                    RESULT_CACHE.clear()
+                    store = open_store(USER, engine)
+                    cold = timed(case, store, paths)
+                    warm = None
+                    if case not in MUTATING_CASES:
+                        warm = min(
+                            (timed(case, store, paths) for _ in range(repeat)),
+                            default=None,
+                        )
+                    store.close()
+                    results.append(
+                        {
+                            "rows": rows,
+                            "engine": engine,
+                            "case": case.__name__,
+                            "cold_seconds": cold,
+                            "warm_seconds": warm,
+                        }
+                    )
+                    warm_text = "-" if warm is None else f"{warm:.4f}s"
+                    print(
+                        f"{rows:>9} {engine:<6} {case.__name__:<24}"
+                        f" cold {cold:.4f}s  warm {warm_text}",
+                        file=sys.stderr,
+                    )
+            finally:
+                os.chdir(cwd)
+                shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline_path):
+    """
+    Prints the speedup of each result against a previous run.
+    """
+    with open(baseline_path, "r") as f:
+        baseline = {
+            (r["rows"], r["engine"], r["case"]): r for r in json.load(f)["results"]
+        }
+    table = []
+    for r in results:
+        old = baseline.get((r["rows"], r["engine"], r["case"]))
+        if old is None:
+            continue
+        table.append(
+            [
+                r["rows"],
+                r["engine"],
+                r["case"],
+                f"{old['cold_seconds'] / r['cold_seconds']:.2f}x",
+            ]
+        )
+    print(tabulate(table, headers=["Rows", "Engine", "Case", "Cold speedup"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time the app's hot paths on synthetic histories."
+    )
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument(
+        "--engine", nargs="+", choices=["csv", "sqlite"], default=["csv"]
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="warm runs per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="previous results file to compare with")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    results = run(args.rows, args.engine, args.repeat, args.seed)
+    with open(output, "w") as f:
+        json.dump(
+            {
+                "created": datetime.datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "seed": args.seed,
+                "repeat": args.repeat,
+                "results": results,
+                "result_cache": RESULT_CACHE.stats(),
+            },
+            f,
+            indent=2,
+        )
+    print(f"Results written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
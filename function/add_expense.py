@@ -1,18 +1,15 @@
 import os
-import csv
 import datetime
+from function.transactions.transaction_store import open_store
 
 
 class AddExpense:
-    def __init__(self, username):
+    def __init__(self, username, store=None):
         """
         Handles adding expense transactions for a given user.
         """
         self.username = username
-        self.file_path = f"database/{username}/transactions.csv"
-
-        if not os.path.exists(f"database/{username}"):
-            os.mkdir(f"database/{username}")
+        self.store = store or open_store(username)
 
     def add_expense(self):
         """
@@ -94,29 +91,9 @@ class AddExpense:
 
     def save_expense(self, amount, category, description, date):
         """
-        Appends the expense transaction to a CSV file.
+        Appends the expense transaction to the user's transactions.
         """
-        # Ensure the CSV file has headers if it’s newly created
-        file_exists = False
-        try:
-            with open(self.file_path, "r"):
-                file_exists = True
-        except FileNotFoundError:
-            pass
-
-        with open(self.file_path, "a", newline="") as file:
-            writer = csv.writer(file)
-            if not file_exists:
-                writer.writerow(["amount", "category", "description", "date", "type"])
-            writer.writerow(
-                [
-                    amount,
-                    category,
-                    description,
-                    date,
-                    "expense",
-                ]
-            )
+        self.store.add(amount, category, description, date, "expense")
 
     def run(self):
         """
@@ -1,18 +1,15 @@
 import os
-import csv
 import datetime
+from function.transactions.transaction_store import open_store
 
 
 class AddIncome:
-    def __init__(self, username):
+    def __init__(self, username, store=None):
         """
         Handles adding income transactions for a given user.
         """
         self.username = username
-        self.file_path = f"database/{username}/transactions.csv"
-
-        if not os.path.exists(f"database/{username}"):
-            os.mkdir(f"database/{username}")
+        self.store = store or open_store(username)
 
     def add_income(self):
         """
@@ -94,21 +91,9 @@ class AddIncome:
 
     def save_income(self, amount, category, description, date):
         """
-        Appends the income transaction to a CSV file.
+        Appends the income transaction to the user's transactions.
         """
-        # Ensure the CSV file has headers if it’s newly created
-        file_exists = False
-        try:
-            with open(self.file_path, "r"):
-                file_exists = True
-        except FileNotFoundError:
-            pass
-
-        with open(self.file_path, "a", newline="") as file:
-            writer = csv.writer(file)
-            if not file_exists:
-                writer.writerow(["amount", "category", "description", "date", "type"])
-            writer.writerow([amount, category, description, date, "income"])
+        self.store.add(amount, category, description, date, "income")
 
     def run(self):
         """
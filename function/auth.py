@@ -1,10 +1,9 @@
 import os
 import json
 import re
-import bcrypt
 import getpass
-import tempfile
 from utils.currencies import currencies
+from utils.files import atomic_write
 
 
 class Authenticator:
@@ -28,21 +27,17 @@ class Authenticator:
             return {}
 
     def save_users(self, users):
-        # atomic write
-        dirpath = os.path.dirname(self.users_file)
-        fd, tmp_path = tempfile.mkstemp(dir=dirpath)
-        try:
-            with os.fdopen(fd, "w") as tmp:
-                json.dump(users, tmp, indent=2)
-            os.replace(tmp_path, self.users_file)
-        finally:
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
+        with atomic_write(self.users_file) as tmp:
+            json.dump(users, tmp, indent=2)
 
     def hash_password(self, password: str) -> str:
+        import bcrypt
+
         return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
 
     def verify_password(self, password: str, hashed: str) -> bool:
+        import bcrypt
+
         try:
             return bcrypt.checkpw(password.encode(), hashed.encode())
         except Exception:
@@ -0,0 +1,341 @@
+import os
+import sys
+import csv
+import json
+import argparse
+from datetime import datetime
+from function.auth import Authenticator
+from function.reports import Reports
+from function.transactions.transaction import iso_date, to_ordinal
+from function.transactions.transaction_store import open_store
+from function.transactions.transaction_query import TransactionQuery
+from function.transactions.bulk_import import (
+    FIELDNAMES,
+    BulkImporter,
+    ImportFormatError,
+)
+
+# Choices of the export options, as in exporter.EXPORT_FORMATS and COMPRESSIONS;
+# the exporter itself is only imported by the export command
+EXPORT_FORMATS = ["csv", "jsonl"]
+COMPRESSIONS = ["gzip", "xz"]
+
+# CSV columns of every command's output, after the user column
+CSV_FIELDS = {
+    "balance": ["income", "expense", "balance"],
+    "list": FIELDNAMES,
+    "monthly": ["year", "month", "income", "expense", "net"],
+    "category": ["category", "income", "expense", "net"],
+    "health": ["income", "expense", "savings_rate", "status"],
+    "recurring": ["type", "category", "amount", "count"],
+    "import": ["file", "imported", "skipped", "duplicates", "reject_file", "error"],
+    "export": ["file", "rows"],
+    "backup": ["kind", "file", "sequence", "changes", "bytes"],
+    "restore": ["sequence", "transactions"],
+}
+
+
+def date_argument(value):
+    """
+    Parses a date option, returning it as a zero-padded YYYY-MM-DD string.
+    """
+    try:
+        return iso_date(to_ordinal(value))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}', use YYYY-MM-DD")
+
+
+def command_errors():
+    """
+    Returns the exceptions that fail a command for one user instead of stopping the run.
+
+    ValueError covers malformed rows in a user's transactions. BackupError
+    and sqlite3.Error are only included once a command has imported their
+    modules.
+    """
+    errors = (OSError, ValueError, csv.Error, ImportFormatError)
+    backup = sys.modules.get("function.transactions.backup")
+    if backup is not None:
+        errors += (backup.BackupError,)
+    sqlite3 = sys.modules.get("sqlite3")
+    if sqlite3 is not None:
+        errors += (sqlite3.Error,)
+    return errors
+
+
+class BatchCli:
+    def __init__(self, output=None, errors=None):
+        """
+        Non-interactive command line for scripted queries and reports.
+
+        Every subcommand runs for one or more users without the login
+        prompt, menus or screen clearing, and prints JSON or CSV. JSON
+        output holds one document per user and line, so runs over many
+        accounts can be processed line by line; CSV output has a single
+        header and a user column.
+
+        Parameters:
+        output (file): Where results are written, stdout by default
+        errors (file): Where problems are reported, stderr by default
+
+        Returns:
+        None
+        """
+        self.output = output or sys.stdout
+        self.errors = errors or sys.stderr
+        self.status = 0
+        self._csv = None
+
+    def parser(self):
+        parser = argparse.ArgumentParser(
+            prog="main.py",
+            description="Run personal finance queries and reports without the menus.",
+        )
+        parser.add_argument(
+            "--user",
+            action="append",
+            default=[],
+            help="user to run the command for; repeat for several users",
+        )
+        parser.add_argument(
+            "--all-users", action="store_true", help="run the command for every user"
+        )
+        parser.add_argument("--format", choices=["json", "csv"], default="json")
+        commands = parser.add_subparsers(dest="command", required=True)
+
+        commands.add_parser("balance", help="total income, expense and balance")
+
+        listing = commands.add_parser("list", help="list transactions")
+        listing.add_argument("--category", help="exact category")
+        listing.add_argument("--from", dest="start_date", type=date_argument)
+        listing.add_argument("--to", dest="end_date", type=date_argument)
+        listing.add_argument("--search", help="text to find in any field")
+        listing.add_argument("--sort", choices=["date", "amount"])
+        listing.add_argument("--desc", action="store_true", help="sort descending")
+        listing.add_argument("--limit", type=int, help="keep the first rows only")
+
+        report = commands.add_parser("report", help="print a report")
+        report.add_argument(
+            "report", choices=["monthly", "category", "health", "recurring"]
+        )
+        report.add_argument("--month", type=int, choices=range(1, 13), metavar="1-12")
+        report.add_argument("--year", type=int)
+
+        importing = commands.add_parser("import", help="import transactions CSV files")
+        importing.add_argument(
+            "files", nargs="+", help="CSV files, directories or glob patterns"
+        )
+
+        exporting = commands.add_parser(
+            "export", help="export transactions to CSV or JSON Lines"
+        )
+        exporting.add_argument(
+            "destination", help="directory for <user>_transactions_backup.<format>"
+        )
+        exporting.add_argument(
+            "--as", dest="output_format", choices=EXPORT_FORMATS, default="csv"
+        )
+        exporting.add_argument("--compress", choices=COMPRESSIONS)
+        exporting.add_argument("--from", dest="start_date", type=date_argument)
+        exporting.add_argument("--to", dest="end_date", type=date_argument)
+        exporting.add_argument("--category", help="exact category")
+        exporting.add_argument("--type", choices=["income", "expense"])
+
+        backup = commands.add_parser(
+            "backup", help="back up the changes since the last backup"
+        )
+        backup.add_argument("destination", help="directory for the backup files")
+        backup.add_argument(
+            "--full", action="store_true", help="copy everything, not only the changes"
+        )
+
+        restore = commands.add_parser(
+            "restore", help="replace the transactions with the latest backup"
+        )
+        restore.add_argument("source", help="directory holding the backup files")
+        return parser
+
+    def users(self, args, parser):
+        known = Authenticator().load_users()
+        if args.all_users:
+            return sorted(known)
+        if not args.user:
+            parser.error("give --user at least once, or --all-users")
+        for username in args.user:
+            if username not in known:
+                self.fail(username, "unknown user")
+        return [username for username in args.user if username in known]
+
+    def run(self, argv=None):
+        """
+        Parses the arguments and runs the command for every selected user.
+
+        Returns:
+        int: Exit status, 1 if the command failed for any user
+        """
+        parser = self.parser()
+        args = parser.parse_args(argv)
+        self.status = 0
+        command = args.report if args.command == "report" else args.command
+        handler = getattr(self, f"{command}_command")
+
+        for username in self.users(args, parser):
+            store = None
+            try:
+                store = open_store(username)
+                result = handler(username, store, args)
+            # Evaluated only when a command fails, after it imported its modules
+            except command_errors() as e:
+                self.fail(username, str(e))
+                continue
+            finally:
+                if store is not None:
+                    store.close()
+            self.emit(args.format, command, username, *result)
+        return self.status
+
+    def fail(self, username, message):
+        print(f"{username}: {message}", file=self.errors)
+        self.status = 1
+
+    def emit(self, output_format, command, username, document, rows):
+        if output_format == "json":
+            self.output.write(json.dumps({"user": username, **document}) + "\n")
+            return
+        if self._csv is None:
+            self._csv = csv.writer(self.output)
+            self._csv.writerow(["user"] + CSV_FIELDS[command])
+        self._csv.writerows([username] + row for row in rows)
+
+    # ---------- Commands ----------
+    # Each returns (JSON document, CSV rows) for one user
+
+    def balance_command(self, username, store, args):
+        income, expense = store.balance()
+        document = {"income": income, "expense": expense, "balance": income - expense}
+        return document, [list(document.values())]
+
+    def list_command(self, username, store, args):
+        query = TransactionQuery(store)
+        if args.category:
+            query.where_category(args.category)
+        if args.start_date or args.end_date:
+            query.where_date(args.start_date, args.end_date)
+        if args.search:
+            query.search(args.search)
+        if args.sort:
+            query.order_by(args.sort, args.desc)
+        if args.limit is not None:
+            query.limit(args.limit)
+
+        rows = [t.as_row() for t in (query.results() if store.exists() else [])]
+        document = {"transactions": [dict(zip(FIELDNAMES, row)) for row in rows]}
+        return document, rows
+
+    def monthly_command(self, username, store, args):
+        now = datetime.now()
+        month, year = args.month or now.month, args.year or now.year
+        income, expense, net = Reports(username, store).monthly_figures(month, year)
+        document = {
+            "year": year,
+            "month": month,
+            "income": income,
+            "expense": expense,
+            "net": net,
+        }
+        return document, [list(document.values())]
+
+    def category_command(self, username, store, args):
+        figures = Reports(username, store).category_figures()
+        rows = [[category, *totals] for category, totals in figures.items()]
+        document = {
+            "categories": [dict(zip(CSV_FIELDS["category"], row)) for row in rows]
+        }
+        return document, rows
+
+    def health_command(self, username, store, args):
+        health = Reports(username, store).financial_health()
+        if health is None:
+            income, expense = store.balance()
+            health = (income, expense, None, None)
+        document = dict(zip(CSV_FIELDS["health"], health))
+        return document, [list(health)]
+
+    def recurring_command(self, username, store, args):
+        figures = Reports(username, store).recurring_figures()
+        rows = [[*key, count] for key, count in figures.items()]
+        document = {
+            "recurring": [dict(zip(CSV_FIELDS["recurring"], row)) for row in rows]
+        }
+        return document, rows
+
+    def import_command(self, username, store, args):
+        from function.transactions.parallel_import import (
+            ParallelImporter,
+            import_paths,
+        )
+
+        paths = []
+        for target in args.files:
+            paths.extend(path for path in import_paths(target) if path not in paths)
+        if not paths:
+            raise FileNotFoundError(f"no CSV files found in {' '.join(args.files)}")
+
+        if len(paths) == 1:
+            imported, rejected, duplicates, reject_path = BulkImporter(store).run(
+                paths[0]
+            )
+            files = [
+                {
+                    "file": paths[0],
+                    "imported": imported,
+                    "skipped": rejected,
+                    "duplicates": duplicates,
+                    "reject_file": reject_path,
+                    "error": None,
+                }
+            ]
+        else:
+            files = ParallelImporter(store).run(paths)
+            for f in files:
+                if f["error"]:
+                    self.fail(username, f"{f['file']}: {f['error']}")
+        document = {
+            "imported": sum(f["imported"] for f in files),
+            "skipped": sum(f["skipped"] for f in files),
+            "duplicates": sum(f["duplicates"] for f in files),
+            "files": files,
+        }
+        return document, [list(f.values()) for f in files]
+
+    def export_command(self, username, store, args):
+        from function.transactions.exporter import export_path, write_export
+
+        if not os.path.isdir(args.destination):
+            raise NotADirectoryError(f"'{args.destination}' is not a directory")
+        path = export_path(
+            args.destination, username, args.output_format, args.compress
+        )
+        transactions = store.stream(
+            args.start_date, args.end_date, args.type, args.category
+        )
+        rows = write_export(path, transactions, args.output_format, args.compress)
+        document = {"file": path, "rows": rows}
+        return document, [[path, rows]]
+
+    def backup_command(self, username, store, args):
+        from function.transactions.backup import IncrementalBackup
+
+        document = IncrementalBackup(store, args.destination).run(args.full)
+        return document, [list(document.values())]
+
+    def restore_command(self, username, store, args):
+        from function.transactions.backup import IncrementalBackup
+
+        sequence, count = IncrementalBackup(store, args.source).restore()
+        document = {"sequence": sequence, "transactions": count}
+        return document, [[sequence, count]]
+
+
+def main(argv=None):
+    return BatchCli().run(argv)
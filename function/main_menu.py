@@ -1,15 +1,7 @@
 import os
-import webbrowser
 import time
 from function.menu_navigator import MenuNavigator
-from function.add_income import AddIncome
-from function.add_expense import AddExpense
-from function.view_balance import ViewBalance
-from function.transactions.transaction_history import TransactionHistory
-from function.transactions.edit_transaction import EditTransaction
-from function.transactions.delete_transaction import DeleteTransaction
-from function.settings import Settings
-from function.reports import Reports
+from function.transactions.transaction_store import open_store
 
 
 class MainMenu:
@@ -24,6 +16,8 @@ class MainMenu:
         None
         """
         self.username = username
+        # One store per session so every submenu shares the parsed transactions
+        self.store = open_store(username)
         self.menu = {
             "1": "➕ Add Income",
             "2": "➖ Add Expense",
@@ -86,14 +80,18 @@ class MainMenu:
         """
         Opens the Add Income submenu.
         """
-        add_income = AddIncome(self.username)
+        from function.add_income import AddIncome
+
+        add_income = AddIncome(self.username, self.store)
         add_income.run()
 
     def add_expense(self):
         """
         Opens the Add Income submenu.
         """
-        add_expense = AddExpense(self.username)
+        from function.add_expense import AddExpense
+
+        add_expense = AddExpense(self.username, self.store)
         add_expense.run()
 
     def view_balance(self):
@@ -105,7 +103,9 @@ class MainMenu:
         Returns:
         None
         """
-        view_balance = ViewBalance(self.username)
+        from function.view_balance import ViewBalance
+
+        view_balance = ViewBalance(self.username, self.store)
         view_balance.run()
 
     def transaction_history(self):
@@ -117,7 +117,9 @@ class MainMenu:
         Returns:
         None
         """
-        transaction_menu = TransactionHistory(self.username)
+        from function.transactions.transaction_history import TransactionHistory
+
+        transaction_menu = TransactionHistory(self.username, self.store)
         transaction_menu.run()
 
     def edit_transaction(self):
@@ -129,7 +131,9 @@ class MainMenu:
         Returns:
         None
         """
-        edit_transaction = EditTransaction(self.username)
+        from function.transactions.edit_transaction import EditTransaction
+
+        edit_transaction = EditTransaction(self.username, self.store)
         edit_transaction.run()
 
     def delete_transaction(self):
@@ -141,7 +145,9 @@ class MainMenu:
         Returns:
         None
         """
-        delete_transaction = DeleteTransaction(self.username)
+        from function.transactions.delete_transaction import DeleteTransaction
+
+        delete_transaction = DeleteTransaction(self.username, self.store)
         delete_transaction.run()
 
     def reports(self):
@@ -153,7 +159,9 @@ class MainMenu:
         Returns:
         None
         """
-        reports = Reports(self.username)
+        from function.reports import Reports
+
+        reports = Reports(self.username, self.store)
         reports.run()
 
     def settings(self):
@@ -165,8 +173,12 @@ class MainMenu:
         Returns:
         None
         """
-        settings = Settings(self.username)
+        from function.settings import Settings
+
+        settings = Settings(self.username, self.store)
         settings.run()
+        # The storage engine may have been switched
+        self.store = settings.store
 
     def help_menu(self):
         """
@@ -175,6 +187,8 @@ class MainMenu:
         Clears the console, opens the README page in the default web browser,
         waits for a second, and then prompts the user to press Enter to continue.
         """
+        import webbrowser
+
         os.system("cls" if os.name == "nt" else "clear")
         webbrowser.open(
             "https://github.com/Adham-Emam/Personal-Finance-CLI/blob/main/README.md"
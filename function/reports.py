@@ -1,20 +1,18 @@
 import os
-import csv
 from function.menu_navigator import MenuNavigator
 from datetime import datetime
 from function.menu_navigator import MenuNavigator
+from function.transactions.transaction_store import open_store
 import time
-from rich.console import Console
-from rich.table import Table
 
 
 class Reports:
-    def __init__(self, username):
+    def __init__(self, username, store=None):
         """
         Reports class for a given user.
         """
         self.username = username
-        self.file_path = f"database/{username}/transactions.csv"
+        self.store = store or open_store(username)
 
         self.menu = {
             "1": "Monthly Summary",
@@ -25,33 +23,50 @@ class Reports:
         }
         self.navigator = MenuNavigator(self.menu)
 
-    def clear_screen(self):
-        os.system("cls" if os.name == "nt" else "clear")
+    def cached(self, spec, compute):
+        """
+        Returns a report figure from the shared result cache, computing it only when the data changed.
+        """
+        return self.store.cached(("report",) + spec, compute)
+
+    def monthly_figures(self, month, year):
+        """
+        Returns the income, expenses and net total of one month.
 
-    def read_transactions(self):
+        Returns:
+        tuple: (income, expenses, net)
         """
-        Reads transactions from the user's CSV file.
-        Returns a list of transaction dictionaries.
+        income_total, expenses_total = self.cached(
+            ("totals", year, month), lambda: self.store.totals(year, month)
+        )
+        return income_total, expenses_total, income_total - expenses_total
+
+    def category_figures(self):
+        """
+        Returns the income, expense and net total of every category.
+
+        Returns:
+        dict: {category: (income, expense, net)}
         """
-        transactions = []
-        if not os.path.exists(self.file_path):
-            return transactions
-
-        with open(self.file_path, "r", newline="") as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                row["amount"] = float(row["amount"])
-                row["date"] = datetime.strptime(row["date"], "%Y-%m-%d").date()
-                row["category"] = row["category"].strip().lower()
-                transactions.append(row)
-        return transactions
-
-    def monthly_summary(self):
-        """monthly report"""
+        category_totals = self.cached(("category_totals",), self.store.category_totals)
+        return {
+            category: (
+                data["income"],
+                data["expense"],
+                data["income"] - data["expense"],
+            )
+            for category, data in category_totals.items()
+        }
+
+    def clear_screen(self):
+        os.system("cls" if os.name == "nt" else "clear")
+
+    def monthly_summary(self, month=None, year=None):
+        """monthly report, prompting for the month and year unless both are given"""
+        from rich.console import Console
+        from rich.table import Table
+
         self.clear_screen()
-        transactions = self.read_transactions()
-        income_total = 0
-        expenses_total = 0
         console = Console()
         table = Table(
             title="Monthly summary report", show_lines=True, style="bold green"
@@ -61,13 +76,16 @@ class Reports:
 
         now = datetime.now()
         try:
-            month = int(
-                input("Enter month (1-12) or press Enter for current month: ")
-                or now.month
-            )
-            year = int(
-                input("Enter year or press Enter for current year: ") or now.year
-            )
+            if month is not None and year is not None:
+                month, year = int(month), int(year)
+            else:
+                month = int(
+                    input("Enter month (1-12) or press Enter for current month: ")
+                    or now.month
+                )
+                year = int(
+                    input("Enter year or press Enter for current year: ") or now.year
+                )
 
             if month < 1 or month > 12:
                 raise ValueError()
@@ -80,21 +98,13 @@ class Reports:
 
         self.clear_screen()
 
-        for row in transactions:
-            date = row["date"]
-            if date.month == month and date.year == year:
-                amount = row["amount"]
-                if row["type"] == "income":
-                    income_total += amount
-                elif row["type"] == "expense":
-                    expenses_total += amount
-
-        net_total = income_total - expenses_total
+        income_total, expenses_total, net_total = self.monthly_figures(month, year)
         table.add_row("Total Income", f"${income_total:.2f}")
         table.add_row("Total Expenses", f"${expenses_total:.2f}")
         table.add_row("Net Total", f"${net_total:.2f}")
         console.print(table)
-        max_value = max(income_total, expenses_total, abs(net_total))
+        # A month without transactions would otherwise divide by zero
+        max_value = max(income_total, expenses_total, abs(net_total)) or 1
         console.print(
             f"[bold yellow]Visual Representation for {month}/{year}:[/bold yellow]"
         )
@@ -114,28 +124,14 @@ class Reports:
 
     def category_summary(self):
         """category report"""
+        from rich.console import Console
+        from rich.table import Table
+
         self.clear_screen()
-        transactions = self.read_transactions()
         console = Console()
-        category_totals = {}
-        income_total = 0
-        expenses_total = 0
-        for row in transactions:
-            amount = row["amount"]
-            if row["type"] == "income":
-                income_total += amount
-            elif row["type"] == "expense":
-                expenses_total += amount
-
+        income_total, expenses_total = self.cached(("totals",), self.store.totals)
         net_total = income_total - expenses_total
-        for row in transactions:
-            category = row["category"]
-            amount = row["amount"]
-            t_type = row["type"]
-            if category not in category_totals:
-                category_totals[category] = {"income": 0, "expense": 0}
-
-            category_totals[category][t_type] += amount
+        category_totals = self.category_figures()
         table = Table(
             title="Category Summary Report", show_lines=True, style="bold green"
         )
@@ -144,10 +140,7 @@ class Reports:
         table.add_column("Expense", justify="right", style="red")
         table.add_column("Net", justify="right", style="cyan")
 
-        for category, data in category_totals.items():
-            income = data["income"]
-            expense = data["expense"]
-            net = income - expense
+        for category, (income, expense, net) in category_totals.items():
             table.add_row(
                 category.capitalize(),
                 f"${income:.2f}",
@@ -163,22 +156,16 @@ class Reports:
         )
         console.print(table)
 
-    def financial_health_report(self):
-        """financial health report"""
-        self.clear_screen()
-        transactions = self.read_transactions()
-        total_income = 0
-        total_expenses = 0
-        health_status = ""
-        for row in transactions:
-            amount = row["amount"]
-            if row["type"] == "income":
-                total_income += amount
-            elif row["type"] == "expense":
-                total_expenses += amount
+    def financial_health(self):
+        """
+        Computes the savings rate and health status over the whole history.
+
+        Returns:
+        tuple: (total income, total expenses, savings rate in %, status), or None if no income was recorded
+        """
+        total_income, total_expenses = self.cached(("totals",), self.store.totals)
         if total_income == 0:
-            print("no income recorded, cannot calculate financial health.")
-            return
+            return None
         savings_rate = ((total_income - total_expenses) / total_income) * 100
         if savings_rate < 0:
             health_status = "broke"
@@ -192,30 +179,41 @@ class Reports:
             health_status = "healthy"
         elif savings_rate >= 50:
             health_status = "financial genius"
+        return total_income, total_expenses, savings_rate, health_status
+
+    def financial_health_report(self):
+        """financial health report"""
+        self.clear_screen()
+        health = self.financial_health()
+        if health is None:
+            print("no income recorded, cannot calculate financial health.")
+            return
+        total_income, total_expenses, savings_rate, health_status = health
         print(f"Financial Health Report:")
         print(f"Total Income: ${total_income:.2f}")
         print(f"Total Expenses: ${total_expenses:.2f}")
         print(f"Savings Rate: {savings_rate:.2f}%")
         print(f"Financial Health Status: {health_status}")
 
+    def recurring_figures(self):
+        """
+        Returns the transactions that occur more than once.
+
+        Returns:
+        dict: {(type, category, amount): count}
+        """
+        transaction_count = self.cached(("recurring",), self.store.recurring)
+        return {key: count for key, count in transaction_count.items() if count > 1}
+
     def recurring_transactions(self):
         """recurring transactions report"""
         self.clear_screen()
-        transactions = self.read_transactions()
-        transaction_count = {}
-        for row in transactions:
-            key = (row["type"], row["category"], row["amount"])
-            if key in transaction_count:
-                transaction_count[key] += 1
-            else:
-                transaction_count[key] = 1
         print("Recurring Transactions:")
-        for key, count in transaction_count.items():
-            if count > 1:
-                t_type, category, amount = key
-                print(
-                    f"{t_type} of ${amount:.2f} in category '{category}' occurred {count} times."
-                )
+        for key, count in self.recurring_figures().items():
+            t_type, category, amount = key
+            print(
+                f"{t_type} of ${amount:.2f} in category '{category}' occurred {count} times."
+            )
 
     def handle_choice(self, choice):
         """handle reports menu choice"""
@@ -237,8 +235,7 @@ class Reports:
 
     def run(self):
         self.clear_screen()
-        transactions = self.read_transactions()
-        if not transactions:
+        if not self.store.count():
             print("No transactions found, Please add transactions first.")
             time.sleep(2)
             return
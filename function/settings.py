@@ -1,24 +1,27 @@
 import os
-import csv
 import time
 import getpass
 from function.menu_navigator import MenuNavigator
 from function.auth import Authenticator
+from function.transactions.transaction_store import open_store
 from utils.currencies import currencies
 
 
 class Settings:
-    def __init__(self, username):
+    def __init__(self, username, store=None):
         self.username = username
         self.menu = {
             "1": "📝 Edit Profile",
             "2": "🔑 Change Password",
             "3": "🗑️ Reset All Data",
-            "4": "🔙 Back to Main Menu",
+            "4": "🗄️ Storage Engine (CSV/SQLite)",
+            "5": "💾 Back Up Transactions",
+            "6": "♻️ Restore from Backup",
+            "7": "🔙 Back to Main Menu",
             "0": "🚪 Exit",
         }
         self.users_file = "database/users.json"
-        self.db_path = f"database/{username}/transactions.csv"
+        self.store = store or open_store(username)
         self.menu_navigator = MenuNavigator(self.menu)
         self.auth = Authenticator()
 
@@ -30,7 +33,7 @@ class Settings:
             if choice == "0":
                 self.menu_navigator.exit()
                 return
-            if choice == "4":
+            if choice == "7":
                 return
 
             if self.menu_navigator.validate_choice(choice):
@@ -47,6 +50,12 @@ class Settings:
                 self.change_password()
             case "3":
                 self.reset_all_data()
+            case "4":
+                self.change_storage_engine()
+            case "5":
+                self.back_up()
+            case "6":
+                self.restore_backup()
 
     def edit_profile(self):
         """
@@ -145,7 +154,7 @@ class Settings:
         Resets all transactions for the given user.
 
         This function will continually prompt the user until a valid choice is entered.
-        If the user chooses to reset all transactions, it will overwrite the transactions CSV file and reset all transactions to an empty state.
+        If the user chooses to reset all transactions, it will clear the user's transaction store and reset all transactions to an empty state.
         """
         os.system("cls" if os.name == "nt" else "clear")
         while True:
@@ -157,13 +166,105 @@ class Settings:
             if choice in ["y", "n"]:
                 break
         if choice == "y":
-            headers = ["amount", "category", "description", "date", "type"]
-            try:
-                with open(self.db_path, "w") as f:
-                    writer = csv.writer(f)
-                    writer.writerow(headers)
-                print("✅ All transactions has been reset.")
-                time.sleep(2)
-            except FileNotFoundError:
+            if not self.store.exists():
                 print("No transactions found. Nothing to reset.")
                 time.sleep(2)
+                return
+            self.store.clear()
+            print("✅ All transactions has been reset.")
+            time.sleep(2)
+
+    def change_storage_engine(self):
+        """
+        Switches the user's transactions between the CSV file and the SQLite database.
+
+        Switching to SQLite migrates the current transactions CSV file into the database in one step.
+        Switching back to CSV writes the database contents to the transactions CSV file.
+        The chosen engine is saved in the users JSON file.
+        """
+        os.system("cls" if os.name == "nt" else "clear")
+        users = self.auth.load_users()
+        user = users.get(self.username, {})
+        current = user.get("storage", "csv")
+        target = "sqlite" if current == "csv" else "csv"
+
+        print(f"Current storage engine: {current.upper()}")
+        while True:
+            choice = input(f"Switch to {target.upper()}? (y/n) ").strip().lower()
+            if choice in ["y", "n"]:
+                break
+        if choice == "n":
+            return
+
+        new_store = open_store(self.username, target)
+        if target == "sqlite":
+            count = new_store.migrate_from_csv()
+        else:
+            transactions = self.store.get_transactions() or []
+            new_store.rewrite(transactions)
+            count = len(transactions)
+        self.store.close()
+        self.store = new_store
+
+        user["storage"] = target
+        users[self.username] = user
+        self.auth.save_users(users)
+        print(f"✅ Moved {count} transactions to {target.upper()} storage.")
+        time.sleep(2)
+
+    def back_up(self):
+        """
+        Backs up the user's transactions to a directory.
+
+        Only the changes since the last backup to the same directory are written,
+        unless there is no earlier backup there to build on.
+        """
+        from function.transactions.backup import BackupError, IncrementalBackup
+
+        os.system("cls" if os.name == "nt" else "clear")
+        directory = input("Backup directory (default: backups): ").strip() or "backups"
+        try:
+            result = IncrementalBackup(self.store, directory).run()
+        except (OSError, BackupError) as e:
+            print(f"❌ Backup failed: {e}")
+        else:
+            if result["kind"] == "unchanged":
+                print("✅ Nothing changed since the last backup.")
+            elif result["kind"] == "delta":
+                print(
+                    f"✅ Backed up {result['changes']} changes to {result['file']} "
+                    f"({result['bytes']:,} bytes)."
+                )
+            else:
+                print(
+                    f"✅ Backed up all {result['changes']} transactions to {result['file']}."
+                )
+        time.sleep(2)
+
+    def restore_backup(self):
+        """
+        Replaces the user's transactions with the latest backup in a directory.
+
+        The full backup is read first and the later changes are replayed on it.
+        """
+        from function.transactions.backup import BackupError, IncrementalBackup
+
+        os.system("cls" if os.name == "nt" else "clear")
+        directory = input("Backup directory (default: backups): ").strip() or "backups"
+        while True:
+            choice = (
+                input("Replace all your transactions with the backup? (y/n) ")
+                .strip()
+                .lower()
+            )
+            if choice in ["y", "n"]:
+                break
+        if choice == "n":
+            return
+        try:
+            sequence, count = IncrementalBackup(self.store, directory).restore()
+        except (OSError, BackupError) as e:
+            print(f"❌ Restore failed: {e}")
+        else:
+            print(f"✅ Restored {count} transactions (backup #{sequence}).")
+        time.sleep(2)
@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+import contextlib
+
+# Set to 1 to print where the start-up time goes, on stderr
+TIMING_VARIABLE = "FINANCE_STARTUP_TIMING"
+
+
+class StartupTimer:
+    def __init__(self, enabled=False, start=None):
+        """
+        Measures the phases of the application's start-up.
+
+        Like python -X importtime, but scoped to the app: every phase
+        records its wall time, how many modules it imported and which app
+        or third-party packages they came from, so a slow start can be
+        traced to the phase and package responsible.
+
+        Parameters:
+        enabled (bool): Whether to record and report anything
+        start (float): time.perf_counter() value the report counts from
+
+        Returns:
+        None
+        """
+        self.enabled = enabled
+        self.start = time.perf_counter() if start is None else start
+        self.phases = []
+        self._reported = 0
+
+    @classmethod
+    def from_environment(cls, start=None):
+        return cls(os.environ.get(TIMING_VARIABLE, "") not in ("", "0"), start)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Times the enclosed block as one phase of the start-up.
+        """
+        if not self.enabled:
+            yield
+            return
+        modules = set(sys.modules)
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - began
+            # Name the app and third-party packages, the standard library is just
+            # counted, as is the __mp_main__ alias multiprocessing gives the script
+            packages = (
+                {module.partition(".")[0] for module in set(sys.modules) - modules}
+                - set(sys.stdlib_module_names)
+                - {"__mp_main__"}
+            )
+            self.phases.append(
+                (name, elapsed, len(sys.modules) - len(modules), packages)
+            )
+
+    def report(self, file=None):
+        """
+        Prints the phases recorded since the last report and the total time so far.
+        """
+        if not self.enabled:
+            return
+        file = file or sys.stderr
+        print("Start-up timing:", file=file)
+        for name, elapsed, count, packages in self.phases[self._reported :]:
+            imported = f"  {count} modules" if count else ""
+            if packages:
+                imported += f" ({', '.join(sorted(packages))})"
+            print(f"  {name:<24} {elapsed * 1000:8.1f} ms{imported}", file=file)
+        total = time.perf_counter() - self.start
+        print(f"  {'total':<24} {total * 1000:8.1f} ms", file=file)
+        self._reported = len(self.phases)
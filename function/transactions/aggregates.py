@@ -0,0 +1,96 @@
+import json
+from utils.files import atomic_write
+from function.transactions.transaction import iso_date
+
+
+class Aggregates:
+    def __init__(self, path):
+        """
+        Small sidecar file holding running totals for a user's transactions.
+
+        The file stores the totals by type (in minor units), the row count, a
+        rollup of totals per (month, category) and the data file's signature
+        at the time the totals were computed. If the signature no longer
+        matches the data file, the totals are stale and must be rebuilt.
+
+        The rollup looks like {"2024-10": {"food": {"rows": 2, "totals": {"expense": 1500}}}}.
+
+        Parameters:
+        path (str): Location of the sidecar JSON file
+
+        Returns:
+        None
+        """
+        self.path = path
+        self._data = None
+
+    @staticmethod
+    def empty():
+        return {"rows": 0, "totals": {}, "monthly": {}}
+
+    def read(self, signature):
+        """
+        Returns the stored aggregates if they match the given data file signature, otherwise None.
+        """
+        if signature is None:
+            return None
+        signature = list(signature)
+        if self._data is None or self._data.get("signature") != signature:
+            try:
+                with open(self.path, "r") as f:
+                    self._data = json.load(f)
+            except (json.JSONDecodeError, FileNotFoundError):
+                self._data = None
+                return None
+        if self._data.get("signature") != signature or "monthly" not in self._data:
+            return None
+        return self._data
+
+    def write(self, signature, data):
+        """
+        Atomically saves the aggregates together with the data file signature they describe.
+        """
+        data = dict(data, signature=list(signature))
+        with atomic_write(self.path) as tmp:
+            json.dump(data, tmp)
+        self._data = data
+
+    def apply(self, data, added=(), removed=()):
+        """
+        Updates the totals and the monthly rollup in place for added and removed transactions.
+
+        Both arguments may be any iterable, including a stream of transactions.
+        Transactions are first summed per (date, category, type), so bulk
+        imports touch the rollup once per group rather than once per row.
+        """
+        totals = data["totals"]
+        monthly = data["monthly"]
+        for sign, transactions in ((1, added), (-1, removed)):
+            groups = {}
+            for t in transactions:
+                key = (t.ordinal, t.category, t.type)
+                amount = round(t.amount * 100)
+                group = groups.get(key)
+                if group is None:
+                    groups[key] = [1, amount]
+                else:
+                    group[0] += 1
+                    group[1] += amount
+
+            for (ordinal, category, t_type), (rows, amount) in groups.items():
+                rows *= sign
+                amount *= sign
+                data["rows"] += rows
+                totals[t_type] = totals.get(t_type, 0) + amount
+
+                month_key = iso_date(ordinal)[:7]
+                category = category.strip().lower()
+                month = monthly.setdefault(month_key, {})
+                cell = month.setdefault(category, {"rows": 0, "totals": {}})
+                cell["rows"] += rows
+                cell["totals"][t_type] = cell["totals"].get(t_type, 0) + amount
+                if cell["rows"] <= 0:
+                    del month[category]
+                    if not month:
+                        del monthly[month_key]
+        return data
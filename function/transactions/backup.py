@@ -0,0 +1,232 @@
+import os
+import json
+import gzip
+from itertools import chain
+from utils.files import atomic_write
+from function.transactions.transaction import Transaction
+from function.transactions.bulk_import import collection_paused
+
+# Deltas after which the next backup is a full one again, keeping restores short
+MAX_CHAIN_DELTAS = 30
+
+
+class BackupError(ValueError):
+    """
+    Raised when a backup is missing a file or its files don't follow on from each other.
+    """
+
+
+def manifest_path(directory, username):
+    """
+    Returns the file listing a user's current backup chain, e.g. backups/alice.backup.json
+    """
+    return os.path.join(directory, f"{username}.backup.json")
+
+
+def write_atomic(file_path, lines, compressed=True):
+    """
+    Writes text lines under a temporary name and renames the file when complete.
+    """
+    opener = gzip.open if compressed else open
+    with atomic_write(file_path, lambda path: opener(path, "wt")) as file:
+        file.writelines(line + "\n" for line in lines)
+
+
+def replay(rows, op, args):
+    """
+    Applies one change log entry to a list of rows.
+    """
+    if op == "add":
+        (added,) = args
+        rows.extend(added)
+    elif op == "set":
+        index, row = args
+        rows[index] = row
+    elif op == "del":
+        (index,) = args
+        del rows[index]
+    elif op == "clear":
+        rows.clear()
+    else:
+        raise BackupError(f"unknown change {op!r}")
+
+
+class IncrementalBackup:
+    def __init__(self, store, directory):
+        """
+        Backs up a user's transactions as a full copy followed by deltas.
+
+        The first backup, and every one after MAX_CHAIN_DELTAS deltas, is a
+        full copy of the transactions. The backups in between only hold the
+        changes recorded in the store's change log since the previous backup,
+        so an unchanged account costs nothing and a busy one a few kilobytes.
+        A manifest in the backup directory names the chain of files and the
+        change log it follows; whenever the log can't continue the chain (the
+        data was changed outside the app, or another directory was backed up
+        since) the next backup is a full one.
+
+        Every file is gzip-compressed JSON Lines: a header line, then the rows
+        of a full backup or the changes of a delta.
+
+        Parameters:
+        store (TransactionStore): The user's transactions
+        directory (str): Where the backup files and the manifest are kept
+
+        Returns:
+        None
+        """
+        self.store = store
+        self.directory = directory
+        self.manifest_path = manifest_path(directory, store.username)
+
+    def manifest(self):
+        """
+        Returns the manifest of the backup chain, or None if the user has no backup here.
+        """
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            raise BackupError(f"unreadable backup manifest {self.manifest_path}")
+
+    def run(self, full=False):
+        """
+        Backs up the changes since the last backup, or everything if they aren't known.
+
+        Parameters:
+        full (bool): Whether to take a full backup even if a delta is possible
+
+        Returns:
+        dict: kind ("full", "delta" or "unchanged"), file, sequence, changes (rows of a full backup) and bytes written
+        """
+        store = self.store
+        change_log = store.change_log
+        signature = store.signature()
+        manifest = self.manifest()
+        base = change_log.base()
+        sequence = change_log.sequence()
+        current = change_log.current(signature)
+        incremental = (
+            not full
+            and manifest is not None
+            and base is not None
+            and manifest["journal"] == base[0]
+            and current
+            and len(manifest["chain"]) <= MAX_CHAIN_DELTAS
+        )
+
+        if incremental and sequence == manifest["sequence"]:
+            return {
+                "kind": "unchanged",
+                "file": None,
+                "sequence": sequence,
+                "changes": 0,
+                "bytes": 0,
+            }
+
+        if incremental:
+            kind = "delta"
+            entries = list(change_log.entries(manifest["sequence"]))
+            header = {"from": manifest["sequence"]}
+            lines = (json.dumps([number, op, *args]) for number, op, args in entries)
+            changes = len(entries)
+        else:
+            kind = "full"
+            # A full backup continues the numbering of the chain it replaces
+            sequence = max(sequence, manifest["sequence"] if manifest else 0)
+            if not current:
+                sequence += 1  # the data changed without a change log entry
+            header = {}
+            # Streamed, so a full backup runs in constant memory
+            lines = (json.dumps(t.as_row()) for t in store.stream())
+            changes = store.count() if store.exists() else 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{store.username}.{sequence:010d}.{kind}.jsonl.gz"
+        file_path = os.path.join(self.directory, name)
+        header = {"kind": kind, "user": store.username, "sequence": sequence, **header}
+        write_atomic(file_path, chain([json.dumps(header)], lines))
+
+        # The next delta starts from here
+        journal = change_log.start(sequence, signature)
+        manifest = {
+            "user": store.username,
+            "journal": journal,
+            "sequence": sequence,
+            "chain": manifest["chain"] + [name] if kind == "delta" else [name],
+        }
+        write_atomic(self.manifest_path, [json.dumps(manifest)], compressed=False)
+        return {
+            "kind": kind,
+            "file": file_path,
+            "sequence": sequence,
+            "changes": changes,
+            "bytes": os.path.getsize(file_path),
+        }
+
+    def read_chain(self, manifest):
+        """
+        Replays the full backup and the deltas of a chain.
+
+        Returns:
+        list: The backed up rows in amount, category, description, date, type order
+        """
+        rows = []
+        sequence = None
+        for name in manifest["chain"]:
+            file_path = os.path.join(self.directory, name)
+            try:
+                with gzip.open(file_path, "rt") as f:
+                    header = json.loads(next(f))
+                    if header["kind"] == "full" and sequence is None:
+                        rows = [json.loads(line) for line in f]
+                    elif header["kind"] == "delta" and header["from"] == sequence:
+                        for line in f:
+                            _, op, *args = json.loads(line)
+                            replay(rows, op, args)
+                    else:
+                        raise BackupError(f"backup chain is broken at {name}")
+            except BackupError:
+                raise
+            except FileNotFoundError:
+                raise BackupError(f"backup file {file_path} is missing")
+            except (ValueError, KeyError, IndexError, OSError, EOFError) as e:
+                raise BackupError(f"backup file {file_path} is damaged: {e}")
+            sequence = header["sequence"]
+        return rows
+
+    def restore(self):
+        """
+        Replaces the user's transactions with the latest backup in the directory.
+
+        The whole chain is read before the transactions are touched, and they
+        are then replaced in one atomic write, so a failed restore leaves them
+        as they were. The change log is restarted after the restore, so the
+        next backup is a full one.
+
+        Returns:
+        tuple: (sequence number of the backup, transactions restored)
+
+        Raises:
+        BackupError: If there is no backup or a file of its chain is missing or damaged
+        """
+        manifest = self.manifest()
+        if manifest is None:
+            raise BackupError(
+                f"no backup of {self.store.username} in '{self.directory}'"
+            )
+        rows = self.read_chain(manifest)
+
+        store = self.store
+        change_log = store.change_log
+        # Nothing to record: the restored transactions start a new log
+        change_log.stop()
+        with collection_paused():
+            transactions = [Transaction(*row) for row in rows]
+            store.replace_all(transactions)
+        change_log.start(
+            max(change_log.sequence(), manifest["sequence"]) + 1, store.signature()
+        )
+        return manifest["sequence"], len(transactions)
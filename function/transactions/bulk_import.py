@@ -0,0 +1,433 @@
+import gc
+import os
+import csv
+import time
+import locale
+import contextlib
+from collections import Counter
+from itertools import islice, repeat
+from function.transactions.transaction import Transaction
+from function.transactions.fingerprint_index import fingerprint
+from function.transactions.import_checkpoint import ImportCheckpoint, file_hash
+
+FIELDNAMES = ["amount", "category", "description", "date", "type"]
+
+# Number of rows parsed, validated and written at a time
+IMPORT_CHUNK_SIZE = 20000
+
+TRANSACTION_TYPES = {"income": "income", "expense": "expense"}
+
+
+class ImportFormatError(ValueError):
+    """
+    Raised when an import file cannot be read as a transactions CSV file.
+    """
+
+
+def validate_rows(rows, columns, first_line):
+    """
+    Validates a chunk of raw CSV rows and converts the valid ones.
+
+    Parameters:
+    rows (list): Rows as read by csv.reader
+    columns (tuple): Position of every field of FIELDNAMES in the rows
+    first_line (int): Line number of the first row, for the reject report
+
+    Returns:
+    tuple: (Transaction records, [(line number, reason, row)] of the rejected rows)
+    """
+    amount_at, category_at, description_at, date_at, type_at = columns
+    transaction_types = TRANSACTION_TYPES
+    transactions = []
+    rejected = []
+    accept = transactions.append
+    reject = rejected.append
+
+    for line, row in enumerate(rows, first_line):
+        if not row:
+            continue
+        try:
+            amount = row[amount_at].strip()
+            category = row[category_at].strip()
+            description = row[description_at].strip()
+            date_str = row[date_at].strip()
+            transaction_type = row[type_at].strip()
+        except IndexError:
+            reject((line, "Missing fields", row))
+            continue
+
+        value = int(amount) if amount.isdecimal() else 0
+        if value <= 0:
+            reject((line, f"Invalid amount '{amount}'", row))
+            continue
+
+        if not category.isalpha() or not (3 <= len(category) <= 20):
+            reject((line, f"Invalid category '{category}'", row))
+            continue
+
+        kind = transaction_types.get(transaction_type.lower())
+        if kind is None:
+            reject((line, f"Invalid transaction type '{transaction_type}'", row))
+            continue
+
+        try:
+            # Dates are converted through the shared to_ordinal cache
+            accept(Transaction(value, category, description, date_str, kind))
+        except ValueError:
+            reject((line, f"Invalid date '{date_str}'", row))
+    return transactions, rejected
+
+
+@contextlib.contextmanager
+def collection_paused():
+    """
+    Pauses the garbage collector during an import.
+
+    Every imported record stays alive, so collections would only rescan them.
+    """
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def reject_path_for(file_path, fallback_dir=None):
+    """
+    Returns where the rejected rows of an import file are written: statement.csv -> statement.rejects.csv
+
+    The reject file goes next to the import file, or into fallback_dir if
+    given and the import file's folder is not writable, e.g. a read-only share.
+    """
+    root, extension = os.path.splitext(file_path)
+    reject_path = f"{root}.rejects{extension or '.csv'}"
+    if fallback_dir is not None and not os.access(
+        os.path.dirname(os.path.abspath(reject_path)), os.W_OK
+    ):
+        os.makedirs(fallback_dir, exist_ok=True)
+        reject_path = os.path.join(fallback_dir, os.path.basename(reject_path))
+    return reject_path
+
+
+def print_progress(rows, position, size, elapsed, width=30):
+    """
+    Draws a progress bar with the import speed on the current console line.
+    """
+    fraction = min(position / size, 1.0) if size else 1.0
+    filled = int(fraction * width)
+    rate = rows / elapsed if elapsed else 0
+    print(
+        f"\r[{'█' * filled}{'·' * (width - filled)}] {fraction:4.0%}"
+        f"  {rows:,} rows  {rate:,.0f} rows/s",
+        end="",
+        flush=True,
+    )
+
+
+class BulkImporter:
+    def __init__(
+        self,
+        store,
+        chunk_size=IMPORT_CHUNK_SIZE,
+        progress=None,
+        skip_duplicates=True,
+        checkpoint=True,
+    ):
+        """
+        Imports large transaction CSV files into a store.
+
+        The file is read and validated chunk_size rows at a time, and every
+        chunk of valid rows is written with a single store.extend() call.
+        Rejected rows are not printed; they go to a reject file with their
+        line number and reason, next to their original values, so they
+        can be fixed and imported again. The reject file is only created
+        once a row is rejected.
+
+        Rows that are already stored are skipped by their content
+        fingerprint, so importing an overlapping or the same statement again
+        adds nothing twice. Repeats are counted: a statement with two
+        identical rows adds both the first time and neither afterwards.
+
+        Before every chunk a checkpoint records how far the import got. If
+        it is interrupted, importing the same unchanged file again first
+        removes whatever the unfinished chunk had written, then carries on
+        from that chunk instead of starting over.
+
+        Parameters:
+        store (TransactionStore): Where the transactions are imported
+        chunk_size (int): Number of rows handled at a time
+        progress (callable): Called as progress(rows, position, size, elapsed) after every chunk, e.g. print_progress
+        skip_duplicates (bool): Whether rows matching stored transactions are skipped
+        checkpoint (bool): Whether progress is saved for resuming an interrupted import
+
+        Returns:
+        None
+        """
+        self.store = store
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.skip_duplicates = skip_duplicates
+        self.checkpoint = None
+        if checkpoint:
+            self.checkpoint = ImportCheckpoint(
+                os.path.join(store.user_dir, "import.checkpoint.json")
+            )
+        # Line the last run resumed an interrupted import at, None if it started at the top
+        self.resumed_at = None
+
+    @staticmethod
+    def columns(header):
+        """
+        Returns the position of every field of FIELDNAMES in the header row.
+
+        Raises:
+        ImportFormatError: If the file is missing a required header
+        """
+        if not set(FIELDNAMES).issubset(header or []):
+            raise ImportFormatError(
+                "Invalid CSV file format. Missing required headers."
+            )
+        return tuple(header.index(field) for field in FIELDNAMES)
+
+    @staticmethod
+    def unique(transactions, values, stored, matched):
+        """
+        Drops the transactions that are already stored.
+
+        Parameters:
+        transactions (list): Valid transactions of one chunk
+        values (list): Their fingerprints, or None to compute them
+        stored (callable): Returns how many stored transactions have a fingerprint
+        matched (dict): Stored copies of every fingerprint seen so far in this file that are still unmatched
+
+        Returns:
+        tuple: (transactions to store, their fingerprints)
+        """
+        if values is None:
+            values = map(fingerprint, transactions)
+        kept = []
+        kept_values = []
+        for t, value in zip(transactions, values):
+            left = matched.get(value)
+            if left is None:
+                # Rows of this file with this fingerprint aren't stored yet
+                left = stored(value)
+            if left:
+                matched[value] = left - 1
+            else:
+                matched[value] = 0
+                kept.append(t)
+                kept_values.append(value)
+        return kept, kept_values
+
+    def run(self, file_path, reject_path=None):
+        """
+        Imports every valid row of a CSV file.
+
+        Parameters:
+        file_path (str): Path of the CSV file
+        reject_path (str): Where rejected rows are written, next to the file by default, or in the user's folder if that one is read-only
+
+        Returns:
+        tuple: (rows imported, rows rejected, duplicates skipped, reject file path or None if every row was valid)
+
+        Raises:
+        ImportFormatError: If the file is missing a required header or can't be decoded as CSV text
+        """
+        reject_path = reject_path or reject_path_for(file_path, self.store.user_dir)
+        try:
+            with collection_paused():
+                imported, rejected, duplicates = self._import(file_path, reject_path)
+        except (UnicodeDecodeError, csv.Error) as e:
+            # Resuming would fail on the same bytes again
+            if self.checkpoint is not None:
+                self.checkpoint.clear()
+            raise ImportFormatError(f"Cannot read {file_path} as CSV text: {e}") from e
+        if self.checkpoint is not None:
+            self.checkpoint.clear()
+
+        if not rejected:
+            reject_path = None
+        return imported, rejected, duplicates, reject_path
+
+    def resume_point(self, source):
+        """
+        Returns the checkpoint of an interrupted import of the same file, if it can be resumed.
+
+        Parameters:
+        source (dict): Source path, content hash and reject file path of this import
+
+        Returns:
+        dict: The checkpoint, or None to start from the top
+        """
+        saved = self.checkpoint.load()
+        if saved is None or any(
+            saved.get(key) != value for key, value in source.items()
+        ):
+            return None
+        reject_file = saved["reject_file"]
+        if saved["reject_size"] and (
+            not os.path.exists(reject_file)
+            or os.path.getsize(reject_file) < saved["reject_size"]
+        ):
+            return None
+        return saved
+
+    def resume(self, source_file, columns, encoding, saved, index):
+        """
+        Undoes what the interrupted chunk wrote and rebuilds the duplicate matches of the rows before it.
+
+        The rows before the resume point are matched again against the
+        transactions stored before the import began, i.e. leaving out the
+        rows this import added, and the interrupted chunk is read and
+        deduplicated again the same way. The store only undoes the rows after
+        the checkpoint's mark if they are that chunk's, so rows added in the
+        meantime, e.g. by hand, are never removed.
+
+        Returns:
+        dict: The matches, as unique() left them at the resume point, or None if the store was written to since
+        """
+        matched = {}
+        if index is not None:
+            added = Counter(
+                map(
+                    fingerprint,
+                    islice(self.store.stream(), saved["start_rows"], None),
+                )
+            )
+
+            def stored_before(value):
+                return index.count(value) - added[value]
+
+            def lines(end):
+                while source_file.tell() < end:
+                    yield source_file.readline().decode(encoding)
+
+            reader = csv.reader(lines(saved["offset"]))
+            while chunk := list(islice(reader, self.chunk_size)):
+                transactions, _ = validate_rows(chunk, columns, 0)
+                self.unique(transactions, None, stored_before, matched)
+
+        source_file.seek(saved["offset"])
+        reader = csv.reader(map(bytes.decode, source_file, repeat(encoding)))
+        interrupted, _ = validate_rows(
+            list(islice(reader, self.chunk_size)), columns, saved["line"]
+        )
+        if index is not None:
+            interrupted, _ = self.unique(
+                interrupted, None, stored_before, dict(matched)
+            )
+        if not self.store.undo_appends(saved["mark"], interrupted):
+            return None
+        return matched
+
+    def _import(self, file_path, reject_path):
+        imported = rejected = duplicates = 0
+        started = time.perf_counter()
+        source = {
+            "source": os.path.abspath(file_path),
+            "hash": file_hash(file_path) if self.checkpoint else None,
+            "reject_file": os.path.abspath(reject_path),
+        }
+        saved = self.resume_point(source) if self.checkpoint else None
+        index = self.store.fingerprints() if self.skip_duplicates else None
+        matched = {}
+        encoding = locale.getpreferredencoding(False)
+
+        with open(file_path, "rb") as source_file:
+            size = os.fstat(source_file.fileno()).st_size
+            # Lines are decoded one at a time, so the file position after a
+            # chunk is exactly where its last row ends
+            reader = csv.reader(map(bytes.decode, source_file, repeat(encoding)))
+            header = next(reader, None)
+            columns = self.columns(header)
+            line = 2
+
+            if saved:
+                data_start = source_file.tell()
+                matched = self.resume(source_file, columns, encoding, saved, index)
+                if matched is None:
+                    # Written to since; duplicate checks still keep a fresh import from adding rows twice
+                    saved, matched = None, {}
+                    source_file.seek(data_start)
+                else:
+                    imported, rejected = saved["imported"], saved["rejected"]
+                    duplicates, line = saved["duplicates"], saved["line"]
+                    source_file.seek(saved["offset"])
+                    if index is not None:
+                        # Brought up to date after the undo
+                        index = self.store.fingerprints()
+            self.resumed_at = saved["line"] if saved else None
+            start_rows = saved["start_rows"] if saved else self.store.count()
+            stored = index.count if index is not None else lambda value: 0
+
+            with contextlib.ExitStack() as files:
+                # The reject file is opened on the first rejected row
+                reject_file = rejects = None
+                if saved and saved["reject_size"]:
+                    reject_file = files.enter_context(
+                        open(reject_path, "r+", newline="")
+                    )
+                    rejects = csv.writer(reject_file)
+                    reject_file.truncate(saved["reject_size"])
+                    reject_file.seek(0, os.SEEK_END)
+                elif os.path.exists(reject_path):
+                    # Left over from an earlier import, or by the unfinished chunk
+                    os.remove(reject_path)
+
+                while True:
+                    if self.checkpoint is not None:
+                        reject_size = 0
+                        if reject_file is not None:
+                            reject_file.flush()
+                            reject_size = os.fstat(reject_file.fileno()).st_size
+                        self.checkpoint.save(
+                            {
+                                **source,
+                                "offset": source_file.tell(),
+                                "line": line,
+                                "imported": imported,
+                                "rejected": rejected,
+                                "duplicates": duplicates,
+                                "start_rows": start_rows,
+                                "reject_size": reject_size,
+                                "mark": self.store.append_mark(),
+                            }
+                        )
+                    chunk = list(islice(reader, self.chunk_size))
+                    if not chunk:
+                        break
+                    transactions, chunk_rejected = validate_rows(chunk, columns, line)
+                    line += len(chunk)
+                    valid = len(transactions)
+                    values = None
+                    if self.skip_duplicates:
+                        transactions, values = self.unique(
+                            transactions, None, stored, matched
+                        )
+                    if transactions:
+                        self.store.extend(transactions, values)
+                    if chunk_rejected:
+                        if rejects is None:
+                            reject_file = files.enter_context(
+                                open(reject_path, "w", newline="")
+                            )
+                            rejects = csv.writer(reject_file)
+                            rejects.writerow(["line", "reason"] + header)
+                        rejects.writerows(
+                            [number, reason] + row
+                            for number, reason, row in chunk_rejected
+                        )
+                    imported += len(transactions)
+                    rejected += len(chunk_rejected)
+                    duplicates += valid - len(transactions)
+                    if self.progress:
+                        self.progress(
+                            imported + rejected + duplicates,
+                            source_file.tell(),
+                            size,
+                            time.perf_counter() - started,
+                        )
+        return imported, rejected, duplicates
@@ -0,0 +1,109 @@
+from array import array
+from bisect import bisect_left, insort
+from function.transactions.journal import Journal
+
+
+def normalize(category):
+    return category.strip().lower()
+
+
+class CategoryIndex(Journal):
+    def __init__(self, path):
+        """
+        Inverted index from normalized category to the positions of its transactions.
+
+        In memory, every category has a sorted array of positions. On disk the
+        index is a journal (see Journal) whose snapshot holds those arrays.
+
+        Parameters:
+        path (str): Location of the journal file
+
+        Returns:
+        None
+        """
+        super().__init__(path)
+
+    def reset(self):
+        self.names = []
+        self.postings = []
+        self.rows = 0
+        self._lookup = {}
+
+    def encode(self, name):
+        code = self._lookup.get(name)
+        if code is None:
+            code = self._lookup[name] = len(self.names)
+            self.names.append(name)
+            self.postings.append(array("q"))
+        return code
+
+    def positions(self, category):
+        """
+        Returns the ascending positions of the transactions in the given category, compared case-insensitively.
+        """
+        code = self._lookup.get(normalize(category))
+        return array("q") if code is None else self.postings[code]
+
+    def code_of(self, position):
+        for code, posting in enumerate(self.postings):
+            i = bisect_left(posting, position)
+            if i < len(posting) and posting[i] == position:
+                return code
+        raise IndexError(position)
+
+    # ---------- Changes ----------
+
+    def apply(self, op, args):
+        if op == "snapshot":
+            (postings,) = args
+            self.reset()
+            for name, positions in postings.items():
+                self.postings[self.encode(name)].extend(positions)
+                self.rows += len(positions)
+        elif op == "add":
+            (names,) = args
+            for name in names:
+                self.postings[self.encode(name)].append(self.rows)
+                self.rows += 1
+        elif op == "set":
+            position, name = args
+            old, new = self.code_of(position), self.encode(name)
+            if old != new:
+                posting = self.postings[old]
+                del posting[bisect_left(posting, position)]
+                insort(self.postings[new], position)
+        elif op == "del":
+            (position,) = args
+            posting = self.postings[self.code_of(position)]
+            del posting[bisect_left(posting, position)]
+            self.rows -= 1
+            for posting in self.postings:
+                i = bisect_left(posting, position)
+                if i < len(posting):
+                    posting[i:] = array("q", (p - 1 for p in posting[i:]))
+        else:
+            raise ValueError(f"unknown category index entry {op!r}")
+
+    def append(self, transactions, signature):
+        self.log("add", signature, [normalize(t.category) for t in transactions])
+
+    def replace(self, position, transaction, signature):
+        self.log("set", signature, position, normalize(transaction.category))
+
+    def remove(self, position, signature):
+        self.log("del", signature, position)
+
+    # ---------- Persistence ----------
+
+    def snapshot(self):
+        return [
+            {name: posting.tolist() for name, posting in zip(self.names, self.postings)}
+        ]
+
+    def build(self, transactions, signature):
+        """
+        Rebuilds the index from the transactions, in file order, and saves it.
+        """
+        self.reset()
+        self.apply("add", ([normalize(t.category) for t in transactions],))
+        self.write(signature)
@@ -0,0 +1,143 @@
+import os
+import json
+import secrets
+from utils.files import atomic_write
+
+
+def last_line(path, block_size=1 << 16):
+    """
+    Returns the last line of a file without reading the lines before it.
+    """
+    with open(path, "rb") as f:
+        end = f.seek(0, os.SEEK_END)
+        tail = b""
+        position = end
+        while position > 0:
+            position = max(position - block_size, 0)
+            f.seek(position)
+            tail = f.read(min(block_size, end - position)) + tail
+            # The file ends with a newline; the one before it starts the last line
+            start = tail.rfind(b"\n", 0, len(tail) - 1)
+            if start != -1:
+                return tail[start + 1 :].decode()
+            end = position
+        return tail.decode()
+
+
+class ChangeLog:
+    def __init__(self, path):
+        """
+        Numbered journal of the writes to a user's transactions, read by delta backups.
+
+        Every append, edit, delete and reset gets the next sequence number and
+        is recorded with the data it changed: the appended rows, the new row
+        at an edited position, the deleted position. Replaying the entries
+        after a backup's sequence on that backup reproduces the transactions.
+
+        The journal starts with a "base" line naming its id and the sequence
+        it continues from, and is restarted by every backup, so it only holds
+        the changes that no backup has yet. Like the other journals, each
+        entry carries the data file signature after the change: once the data
+        is changed behind the store's back the journal stops recording, and
+        the next backup is a full one. A user who never backs up has no
+        journal and writes pay nothing for it.
+
+        Parameters:
+        path (str): Location of the journal file
+
+        Returns:
+        None
+        """
+        self.path = path
+        self._base = None
+        self._last = None
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def base(self):
+        """
+        Returns (journal id, sequence the journal continues from), or None without a journal.
+        """
+        if self._base is None:
+            try:
+                with open(self.path, "r") as f:
+                    sequence, op, _, journal = json.loads(f.readline())
+            except (FileNotFoundError, ValueError, TypeError):
+                return None
+            if op != "base":
+                return None
+            self._base = (journal, sequence)
+        return self._base
+
+    def last(self):
+        """
+        Returns (sequence, signature) of the newest entry, or None without a readable journal.
+        """
+        if self._last is None:
+            try:
+                sequence, _, signature, *_ = json.loads(last_line(self.path))
+            except (FileNotFoundError, ValueError, TypeError):
+                return None  # missing, or torn by an interrupted write
+            self._last = (sequence, signature)
+        return self._last
+
+    def sequence(self):
+        """
+        Returns the sequence number of the newest change, 0 without a journal.
+        """
+        last = self.last()
+        return last[0] if last else 0
+
+    def current(self, signature):
+        """
+        Returns whether the journal has recorded every change up to the data file with this signature.
+        """
+        last = self.last()
+        return last is not None and last[1] == (list(signature) if signature else None)
+
+    def record(self, op, signature, *args):
+        """
+        Appends a change with the next sequence number.
+        """
+        sequence = self.sequence() + 1
+        signature = list(signature) if signature else None
+        with open(self.path, "a") as f:
+            f.write(json.dumps([sequence, op, signature, *args]) + "\n")
+        self._last = (sequence, signature)
+
+    def entries(self, after):
+        """
+        Yields (sequence, op, args) of the changes newer than the given sequence, oldest first.
+        """
+        with open(self.path, "r") as f:
+            next(f)
+            for line in f:
+                sequence, op, _, *args = json.loads(line)
+                if sequence > after:
+                    yield sequence, op, args
+
+    def stop(self):
+        """
+        Removes the journal; changes aren't recorded until the next start().
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._base = None
+        self._last = None
+
+    def start(self, sequence, signature):
+        """
+        Atomically replaces the journal with an empty one continuing from the given sequence.
+
+        Returns:
+        str: The id of the new journal
+        """
+        journal = secrets.token_hex(8)
+        entry = [sequence, "base", list(signature) if signature else None, journal]
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with atomic_write(self.path) as tmp:
+            tmp.write(json.dumps(entry) + "\n")
+        self._base = (journal, sequence)
+        self._last = (sequence, entry[2])
+        return journal
@@ -0,0 +1,83 @@
+from array import array
+
+
+def to_major(minor):
+    """
+    Converts an amount in minor units back to major units, keeping whole amounts as int.
+    """
+    return minor // 100 if minor % 100 == 0 else minor / 100
+
+
+class TransactionColumns:
+    def __init__(self):
+        """
+        Columnar, array-backed copy of the fields the recurring transactions report groups by.
+
+        Amounts are kept in minor units (cents) in an array('q'), and
+        categories and types are dictionary encoded into small integer codes,
+        so counting repeats over a million rows iterates over tight arrays
+        instead of records. The other reports read the aggregates sidecar.
+
+        Returns:
+        None
+        """
+        self.amounts = array("q")
+        self.category_codes = array("I")
+        self.type_codes = array("B")
+        self.categories = []
+        self.types = []
+        self._category_lookup = {}
+        self._type_lookup = {}
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        columns = cls()
+        columns.extend(transactions)
+        return columns
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def encode(self, value, values, lookup):
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(values)
+            values.append(value)
+        return code
+
+    def extend(self, transactions):
+        """
+        Appends transaction records to the columns.
+        """
+        # Histories repeat the same few hundred categories, so each distinct
+        # string is only normalized once
+        category_codes = {}
+        for t in transactions:
+            self.amounts.append(round(t.amount * 100))
+
+            category = t.category
+            code = category_codes.get(category)
+            if code is None:
+                code = category_codes[category] = self.encode(
+                    category.strip().lower(), self.categories, self._category_lookup
+                )
+            self.category_codes.append(code)
+
+            self.type_codes.append(self.encode(t.type, self.types, self._type_lookup))
+
+    # ---------- Aggregations (minor units) ----------
+
+    def recurring(self):
+        """
+        Counts rows sharing the same type, category and amount.
+
+        Returns:
+        dict: {(type, category, amount in minor units): count} in first-seen order
+        """
+        counts = {}
+        for key in zip(self.type_codes, self.category_codes, self.amounts):
+            counts[key] = counts.get(key, 0) + 1
+        return {
+            (self.types[t], self.categories[c], amount): count
+            for (t, c, amount), count in counts.items()
+        }
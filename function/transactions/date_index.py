@@ -0,0 +1,91 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+class DateIndex:
+    def __init__(self):
+        """
+        Positions of the cached transactions, sorted by date.
+
+        ordinals holds the date ordinals in ascending order and positions the
+        matching positions in the transaction list, so a date range is found
+        with two binary searches and only the rows inside it are touched.
+
+        Returns:
+        None
+        """
+        self.ordinals = array("i")
+        self.positions = array("q")
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        index = cls()
+        keys = sorted((t.ordinal, i) for i, t in enumerate(transactions))
+        index.ordinals.extend(ordinal for ordinal, _ in keys)
+        index.positions.extend(position for _, position in keys)
+        return index
+
+    def __len__(self):
+        return len(self.positions)
+
+    def insert(self, ordinal, position):
+        i = bisect_right(self.ordinals, ordinal)
+        self.ordinals.insert(i, ordinal)
+        self.positions.insert(i, position)
+
+    def extend(self, transactions, first_position):
+        """
+        Adds transactions appended at first_position onwards.
+
+        Appends in date order, the usual case, only grow the arrays.
+        """
+        for position, t in enumerate(transactions, first_position):
+            if not self.ordinals or t.ordinal >= self.ordinals[-1]:
+                self.ordinals.append(t.ordinal)
+                self.positions.append(position)
+            else:
+                self.insert(t.ordinal, position)
+
+    def find(self, ordinal, position):
+        lo = bisect_left(self.ordinals, ordinal)
+        hi = bisect_right(self.ordinals, ordinal)
+        for i in range(lo, hi):
+            if self.positions[i] == position:
+                return i
+        raise KeyError(position)
+
+    def replace(self, position, old_ordinal, new_ordinal):
+        """
+        Moves the transaction at position from its old date to its new one.
+        """
+        if old_ordinal != new_ordinal:
+            i = self.find(old_ordinal, position)
+            del self.ordinals[i]
+            del self.positions[i]
+            self.insert(new_ordinal, position)
+
+    def remove(self, position, ordinal):
+        """
+        Drops the transaction at position and shifts the positions after it.
+        """
+        i = self.find(ordinal, position)
+        del self.ordinals[i]
+        del self.positions[i]
+        self.positions = array(
+            "q", (p - 1 if p > position else p for p in self.positions)
+        )
+
+    def range(self, start=None, end=None):
+        """
+        Returns the positions of the transactions dated within [start, end].
+
+        Parameters:
+        start (int): First date ordinal to include
+        end (int): Last date ordinal to include
+
+        Returns:
+        list: Positions in ascending (file) order
+        """
+        lo = 0 if start is None else bisect_left(self.ordinals, start)
+        hi = len(self.ordinals) if end is None else bisect_right(self.ordinals, end)
+        return sorted(self.positions[lo:hi])
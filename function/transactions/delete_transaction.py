@@ -1,67 +1,64 @@
 import os
 import time
-import csv
-from tabulate import tabulate
+from function.transactions.transaction_store import open_store
+from function.transactions.paged_table import PagedTable
 
 
 class DeleteTransaction:
-    def __init__(self, username):
+    def __init__(self, username, store=None):
         self.username = username
-        self.file_path = f"database/{username}/transactions.csv"
-        self.transactions = self.get_transactions()
+        self.store = store or open_store(username)
+        self.has_transactions = self.check_transactions()
 
-    def get_transactions(self):
-        transactions = []
-        try:
-            with open(self.file_path, "r") as file:
-                reader = csv.reader(file)
-                next(reader)  # Skip headers
-                for row in reader:
-                    transactions.append(row)
-            return transactions
-        except FileNotFoundError:
+    def check_transactions(self):
+        """
+        Warns the user if there are no transactions to choose from yet.
+
+        Returns:
+        bool: True if the user has a transaction file
+        """
+        if self.store.signature() is None:
             os.system("cls" if os.name == "nt" else "clear")
             print(
                 f"No transactions found for user '{self.username}'."
                 f" Please add transactions first."
             )
             time.sleep(2)
-            return None
+            return False
+        return True
 
     def run(self):
-        os.system("cls" if os.name == "nt" else "clear")
-
-        if self.transactions is None:
+        if not self.has_transactions:
             return
 
-        headers = ["ID", "Type", "Category", "Amount", "Date", "Description"]
-
-        table_data = [
-            [
-                i,
-                transaction[4],
-                transaction[1],
-                transaction[0],
-                transaction[3],
-                transaction[2],
-            ]
-            for i, transaction in enumerate(self.transactions, 1)
-        ]
-
-        print(tabulate(table_data, headers=headers, tablefmt="fancy_grid"))
+        # Only the visible page is read from the store
+        table = PagedTable(
+            ["ID", "Type", "Category", "Amount", "Date", "Description"],
+            self.store.page,
+            self.store.count,
+            lambda position, transaction: [
+                position + 1,
+                transaction.type,
+                transaction.category,
+                transaction.amount,
+                transaction.date,
+                transaction.description,
+            ],
+        )
 
         while True:
-            transaction_id = input(
+            transaction_id = table.browse(
                 "Enter the ID of the transaction to Delete or type '0' to go back: "
             )
 
-            if int(transaction_id) == 0:
-                return
-
             if not transaction_id.isdigit():
                 print("Invalid input. Please enter a valid transaction ID.")
                 continue
-            elif not 1 <= int(transaction_id) <= len(self.transactions):
+
+            if int(transaction_id) == 0:
+                return
+
+            if not 1 <= int(transaction_id) <= self.store.count():
                 print("Invalid transaction ID. Please enter a valid transaction ID.")
                 continue
             break
@@ -79,22 +76,7 @@ class DeleteTransaction:
                 break
 
     def delete_transaction(self, transaction_id):
-        fieldnames = ["amount", "category", "description", "date", "type"]
-        self.transactions.pop(transaction_id - 1)
-        with open(self.file_path, "w", newline="") as file:
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-            if os.path.getsize(self.file_path) == 0:
-                writer.writeheader()
-            for transaction in self.transactions:
-                writer.writerow(
-                    {
-                        "amount": transaction[0],
-                        "category": transaction[1],
-                        "description": transaction[2],
-                        "date": transaction[3],
-                        "type": transaction[4],
-                    }
-                )
+        self.store.delete(transaction_id - 1)
         os.system("cls" if os.name == "nt" else "clear")
         print("✅ Transaction deleted successfully!")
         time.sleep(2)
@@ -1,16 +1,17 @@
 import os
-import csv
 import time
 import datetime
-from tabulate import tabulate
+from function.transactions.transaction_store import open_store
+from function.transactions.paged_table import PagedTable
 from function.menu_navigator import MenuNavigator
 
 
 class EditTransaction:
-    def __init__(self, username):
+    def __init__(self, username, store=None):
         self.username = username
-        self.file_path = f"database/{username}/transactions.csv"
-        self.transactions = self.get_transactions()
+        self.store = store or open_store(username)
+        self.has_transactions = self.check_transactions()
+        self.transaction = None
         self.menu = {
             "1": "💰 Change amount",
             "2": "🏷️ Change category",
@@ -22,62 +23,62 @@ class EditTransaction:
             "0": "🚪 Exit",
         }
 
-    def get_transactions(self):
-        transactions = []
-        try:
-            with open(self.file_path, "r") as file:
-                reader = csv.reader(file)
-                next(reader)  # Skip headers
-                for row in reader:
-                    transactions.append(row)
-            return transactions
-        except FileNotFoundError:
+    def check_transactions(self):
+        """
+        Warns the user if there are no transactions to choose from yet.
+
+        Returns:
+        bool: True if the user has a transaction file
+        """
+        if self.store.signature() is None:
             os.system("cls" if os.name == "nt" else "clear")
             print(
                 f"No transactions found for user '{self.username}'."
                 f" Please add transactions first."
             )
             time.sleep(2)
-            return None
+            return False
+        return True
 
     def run(self):
-        os.system("cls" if os.name == "nt" else "clear")
-
-        if self.transactions is None:
+        if not self.has_transactions:
             return
 
-        headers = ["ID", "Type", "Category", "Amount", "Date", "Description"]
-
-        table_data = [
-            [
-                i,
-                transaction[4],
-                transaction[1],
-                transaction[0],
-                transaction[3],
-                transaction[2],
-            ]
-            for i, transaction in enumerate(self.transactions, 1)
-        ]
-
-        print(tabulate(table_data, headers=headers, tablefmt="fancy_grid"))
+        # Only the visible page is read from the store
+        table = PagedTable(
+            ["ID", "Type", "Category", "Amount", "Date", "Description"],
+            self.store.page,
+            self.store.count,
+            lambda position, transaction: [
+                position + 1,
+                transaction.type,
+                transaction.category,
+                transaction.amount,
+                transaction.date,
+                transaction.description,
+            ],
+        )
 
         while True:
-            transaction_id = input(
+            transaction_id = table.browse(
                 "Enter the ID of the transaction to edit or type '0' to go back: "
             )
 
-            if int(transaction_id) == 0:
-                return
-
             if not transaction_id.isdigit():
                 print("Invalid input. Please enter a valid transaction ID.")
                 continue
-            elif not 1 <= int(transaction_id) <= len(self.transactions):
+
+            if int(transaction_id) == 0:
+                return
+
+            if not 1 <= int(transaction_id) <= self.store.count():
                 print("Invalid transaction ID. Please enter a valid transaction ID.")
                 continue
             break
 
+        # Edit a copy so unsaved changes never leak into the shared store
+        self.transaction = self.store.row(int(transaction_id) - 1).copy()
+
         os.system("cls" if os.name == "nt" else "clear")
         menu = MenuNavigator(self.menu)
         while True:
@@ -106,12 +107,12 @@ class EditTransaction:
             case "5":
                 self.change_type(transaction_id)
             case "6":
-                self.save_change()
+                self.save_change(transaction_id)
 
     def change_amount(self, transaction_id):
         os.system("cls" if os.name == "nt" else "clear")
         while True:
-            print("Old amount:", self.transactions[int(transaction_id) - 1][0])
+            print("Old amount:", self.transaction.amount)
             new_value = input("Enter the new amount: ")
 
             if not new_value.isdigit():
@@ -119,12 +120,12 @@ class EditTransaction:
                 continue
             break
 
-        self.transactions[int(transaction_id) - 1][0] = int(new_value)
+        self.transaction.amount = int(new_value)
 
     def change_category(self, transaction_id):
         os.system("cls" if os.name == "nt" else "clear")
         while True:
-            print("Old category:", self.transactions[int(transaction_id) - 1][1])
+            print("Old category:", self.transaction.category)
             new_value = input("Enter the new category: ")
 
             if not new_value:
@@ -141,19 +142,22 @@ class EditTransaction:
 
             break
 
-        self.transactions[int(transaction_id) - 1][1] = new_value
+        self.transaction.category = new_value
 
     def edit_description(self, transaction_id):
         os.system("cls" if os.name == "nt" else "clear")
-        print("Old description:", self.transactions[int(transaction_id) - 1][2])
+        print(
+            "Old description:",
+            self.transaction.description,
+        )
         new_value = input("Enter the new description: ")
 
-        self.transactions[int(transaction_id) - 1][2] = new_value
+        self.transaction.description = new_value
 
     def change_date(self, transaction_id):
         os.system("cls" if os.name == "nt" else "clear")
         while True:
-            print("Old date:", self.transactions[int(transaction_id) - 1][3])
+            print("Old date:", self.transaction.date)
             new_value = input("Enter the new date: ")
 
             if not new_value:
@@ -168,13 +172,13 @@ class EditTransaction:
 
             break
 
-        self.transactions[int(transaction_id) - 1][3] = new_value
+        self.transaction.date = new_value
 
     def change_type(self, transaction_id):
         os.system("cls" if os.name == "nt" else "clear")
         while True:
-            old_type = self.transactions[int(transaction_id) - 1][4]
-            print("Old type:", self.transactions[int(transaction_id) - 1][4])
+            old_type = self.transaction.type
+            print("Old type:", self.transaction.type)
             new_value = input(
                 f"Are you sure you want to change the type to {'expense' if old_type == 'income' else 'Income'}? (y/n): "
             )
@@ -185,25 +189,11 @@ class EditTransaction:
 
             if new_value.lower() == "y":
                 new_type = "expense" if old_type == "income" else "income"
-                self.transactions[int(transaction_id) - 1][4] = new_type
+                self.transaction.type = new_type
             break
 
-    def save_change(self):
-        fieldnames = ["amount", "category", "description", "date", "type"]
-        with open(self.file_path, "w", newline="") as file:
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-            if os.path.getsize(self.file_path) == 0:
-                writer.writeheader()
-            for transaction in self.transactions:
-                writer.writerow(
-                    {
-                        "amount": transaction[0],
-                        "category": transaction[1],
-                        "description": transaction[2],
-                        "date": transaction[3],
-                        "type": transaction[4],
-                    }
-                )
+    def save_change(self, transaction_id):
+        self.store.update(int(transaction_id) - 1, self.transaction)
         os.system("cls" if os.name == "nt" else "clear")
         print("✅ Changes saved successfully!")
         time.sleep(2)
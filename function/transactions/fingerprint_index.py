@@ -0,0 +1,125 @@
+from hashlib import blake2b
+from function.transactions.journal import Journal
+
+
+def fingerprint(transaction):
+    """
+    Returns a 64-bit content hash of a transaction.
+
+    The fields are normalized first: the amount in minor units, the category,
+    description and type case-insensitively and the description with its
+    whitespace collapsed, so the same bank row is recognized however it was
+    typed. The hash is stable across runs, unlike hash().
+    """
+    key = "\x1f".join(
+        (
+            str(round(transaction.amount * 100)),
+            transaction.category.strip().lower(),
+            " ".join(transaction.description.split()).lower(),
+            str(transaction.ordinal),
+            transaction.type.strip().lower(),
+        )
+    )
+    return int.from_bytes(
+        blake2b(key.encode(), digest_size=8).digest(), "big", signed=True
+    )
+
+
+class FingerprintIndex(Journal):
+    def __init__(self, path):
+        """
+        Persisted multiset of the content fingerprints of a user's transactions.
+
+        It answers "how many stored transactions look like this one" in O(1),
+        which makes imports idempotent without scanning the history. It is a
+        multiset rather than a set because genuine repeats, such as two
+        identical purchases on the same day, must survive a first import.
+
+        On disk it is a journal (see Journal) like the category index.
+
+        Parameters:
+        path (str): Location of the journal file
+
+        Returns:
+        None
+        """
+        super().__init__(path)
+
+    def reset(self):
+        # Fingerprints seen once are kept in a set, only repeats are counted
+        self.fingerprints = set()
+        self.repeats = {}
+
+    def count(self, value):
+        """
+        Returns how many stored transactions have the given fingerprint.
+        """
+        if value not in self.fingerprints:
+            return 0
+        return 1 + self.repeats.get(value, 0)
+
+    def __len__(self):
+        return len(self.fingerprints) + sum(self.repeats.values())
+
+    # ---------- Changes ----------
+
+    def add(self, values):
+        fingerprints, repeats = self.fingerprints, self.repeats
+        for value in values:
+            if value in fingerprints:
+                repeats[value] = repeats.get(value, 0) + 1
+            else:
+                fingerprints.add(value)
+
+    def discard(self, values):
+        for value in values:
+            extra = self.repeats.get(value, 0)
+            if extra > 1:
+                self.repeats[value] = extra - 1
+            elif extra:
+                del self.repeats[value]
+            else:
+                self.fingerprints.discard(value)
+
+    def apply(self, op, args):
+        if op == "snapshot":
+            fingerprints, repeats = args
+            self.reset()
+            self.fingerprints.update(fingerprints)
+            self.repeats.update((int(value), n) for value, n in repeats.items())
+        elif op == "add":
+            (values,) = args
+            self.add(values)
+        elif op == "set":
+            old, new = args
+            self.discard([old])
+            self.add([new])
+        elif op == "del":
+            (values,) = args
+            self.discard(values)
+        else:
+            raise ValueError(f"unknown fingerprint index entry {op!r}")
+
+    def append(self, transactions, signature, values=None):
+        if values is None:
+            values = [fingerprint(t) for t in transactions]
+        self.log("add", signature, list(values))
+
+    def replace(self, old, transaction, signature):
+        self.log("set", signature, fingerprint(old), fingerprint(transaction))
+
+    def remove(self, transaction, signature):
+        self.log("del", signature, [fingerprint(transaction)])
+
+    # ---------- Persistence ----------
+
+    def snapshot(self):
+        return [list(self.fingerprints), self.repeats]
+
+    def build(self, transactions, signature):
+        """
+        Rebuilds the index from the transactions and saves it.
+        """
+        self.reset()
+        self.add(fingerprint(t) for t in transactions)
+        self.write(signature)
@@ -0,0 +1,59 @@
+import os
+import json
+from hashlib import blake2b
+from utils.files import atomic_write
+
+
+def file_hash(file_path, block_size=1 << 20):
+    """
+    Returns the BLAKE2 digest of a file's contents as a hex string.
+    """
+    digest = blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        while block := f.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ImportCheckpoint:
+    def __init__(self, path):
+        """
+        Progress record of a user's import in progress, for resuming it after a crash.
+
+        The record names the source file by path and content hash and holds
+        the byte offset and line number where the next chunk starts, the
+        rows imported, rejected and skipped so far, how long the reject file
+        was and a mark of the store before that chunk. It is replaced
+        atomically before every chunk and removed once the import completes,
+        so whatever point an import is stopped at, the record describes a
+        chunk boundary.
+
+        Parameters:
+        path (str): Location of the checkpoint file
+
+        Returns:
+        None
+        """
+        self.path = path
+
+    def load(self):
+        """
+        Returns the saved progress, or None if no import was interrupted.
+        """
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save(self, state):
+        """
+        Atomically replaces the saved progress.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with atomic_write(self.path) as tmp:
+            json.dump(state, tmp)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
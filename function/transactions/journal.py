@@ -0,0 +1,124 @@
+import os
+import json
+from utils.files import atomic_write
+
+
+class Journal:
+    # Number of journal entries that triggers a fresh snapshot
+    compact_threshold = 1000
+
+    def __init__(self, path):
+        """
+        In-memory index of a user's transactions, persisted as a journal of JSON lines.
+
+        The journal is a snapshot of the index followed by one entry per
+        append, edit or delete. Each entry carries the data file signature
+        after that change, so the journal is only trusted while its last
+        signature matches the data file; otherwise it is rebuilt from the
+        transactions.
+
+        Subclasses hold the index itself by implementing reset(), apply(op,
+        args) for the "snapshot", "add", "set" and "del" entries, snapshot()
+        and build().
+
+        Parameters:
+        path (str): Location of the journal file
+
+        Returns:
+        None
+        """
+        self.path = path
+        self.signature = None
+        self._entries = 0
+        self.reset()
+
+    def reset(self):
+        raise NotImplementedError
+
+    def apply(self, op, args):
+        raise NotImplementedError
+
+    def snapshot(self):
+        """
+        Returns the arguments of a "snapshot" entry holding the whole index.
+        """
+        raise NotImplementedError
+
+    def log(self, op, signature, *args):
+        """
+        Applies a change and appends it to the journal, taking a snapshot when the journal grows too long.
+        """
+        self.apply(op, args)
+        self._entries += 1
+        if self._entries >= self.compact_threshold:
+            self.write(signature)
+            return
+        with open(self.path, "a") as f:
+            f.write(json.dumps([op, list(signature), *args]) + "\n")
+        self.signature = list(signature)
+
+    # ---------- Persistence ----------
+
+    def start(self):
+        """
+        Empties the index and its journal, for a data file that is about to be created.
+        """
+        self.reset()
+        self.signature = None
+        self._entries = 0
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def load(self, signature):
+        """
+        Brings the index in line with the data file, from memory or from the journal.
+
+        Returns:
+        bool: False if there is no journal or it does not match the signature
+        """
+        if signature is None:
+            return False
+        signature = list(signature)
+        if self.signature == signature:
+            return True
+
+        self.signature = None
+        self.reset()
+        last = None
+        entries = 0
+        try:
+            with open(self.path, "r") as f:
+                for line in f:
+                    op, last, *args = json.loads(line)
+                    self.apply(op, args)
+                    entries += 1
+        except FileNotFoundError:
+            return False
+        except (ValueError, TypeError, IndexError, AttributeError):
+            last = None  # torn or corrupt journal
+
+        if last != signature:
+            # A stale journal can never become valid again
+            self.reset()
+            os.remove(self.path)
+            return False
+        self.signature = signature
+        self._entries = entries
+        return True
+
+    def build(self, transactions, signature):
+        """
+        Rebuilds the index from the transactions, in file order, and saves it.
+        """
+        raise NotImplementedError
+
+    def write(self, signature):
+        """
+        Atomically replaces the journal with a snapshot of the index.
+        """
+        with atomic_write(self.path) as tmp:
+            tmp.write(
+                json.dumps(["snapshot", list(signature), *self.snapshot()]) + "\n"
+            )
+        self.signature = list(signature)
+        self._entries = 1
@@ -0,0 +1,114 @@
+import os
+
+# Rows shown on one page of a transaction table
+PAGE_SIZE = 20
+
+
+class PagedTable:
+    def __init__(self, headers, rows, count, format_row, page_size=PAGE_SIZE):
+        """
+        Shows a table one page at a time.
+
+        Only the visible page is fetched and formatted, so rendering costs
+        the same for ten transactions as for a million, and the rows can
+        come straight from the store without loading the whole history.
+
+        Parameters:
+        headers (list): Column headers
+        rows (callable): rows(start, size) returns the records of one page
+        count (callable): count() returns the total number of records
+        format_row (callable): format_row(position, record) returns the cells of one row
+        page_size (int): Rows per page
+
+        Returns:
+        None
+        """
+        self.headers = headers
+        self.rows = rows
+        self.count = count
+        self.format_row = format_row
+        self.page_size = page_size
+        self.page = 0
+        self._dirty = True
+
+    def pages(self):
+        return max(1, -(-self.count() // self.page_size))
+
+    def render(self):
+        """
+        Clears the console and prints the current page with its position in the table.
+        """
+        from tabulate import tabulate
+
+        os.system("cls" if os.name == "nt" else "clear")
+        total = self.count()
+        pages = self.pages()
+        self.page = min(self.page, pages - 1)
+        start = self.page * self.page_size
+
+        table_data = [
+            self.format_row(position, record)
+            for position, record in enumerate(self.rows(start, self.page_size), start)
+        ]
+        print(tabulate(table_data, headers=self.headers, tablefmt="fancy_grid"))
+        print(
+            f"Page {self.page + 1} of {pages} ({total} transactions)"
+            f" · [n]ext · [p]revious · [j]ump <page>"
+        )
+
+    def navigate(self, command):
+        """
+        Handles a navigation command.
+
+        Parameters:
+        command (str): "n", "p", "j" or "j <page>"
+
+        Returns:
+        bool: True if the command was a navigation command
+        """
+        command = command.strip().lower()
+        if command == "n":
+            if self.page + 1 < self.pages():
+                self.page += 1
+                self._dirty = True
+            else:
+                print("This is the last page.")
+            return True
+        if command == "p":
+            if self.page > 0:
+                self.page -= 1
+                self._dirty = True
+            else:
+                print("This is the first page.")
+            return True
+        if command[:1] == "j":
+            target = command[1:].strip() or input("Jump to page: ").strip()
+            if not target.isdigit() or not 1 <= int(target) <= self.pages():
+                print(
+                    f"Invalid page. Please enter a number between 1 and {self.pages()}."
+                )
+            else:
+                self.page = int(target) - 1
+                self._dirty = True
+            return True
+        return False
+
+    def browse(self, prompt):
+        """
+        Shows the table and handles navigation until the user enters something else.
+
+        The page is only redrawn after it changed, so messages printed by the caller stay visible.
+
+        Parameters:
+        prompt (str): Input prompt shown below the table
+
+        Returns:
+        str: The first input that is not a navigation command
+        """
+        while True:
+            if self._dirty:
+                self.render()
+                self._dirty = False
+            answer = input(prompt).strip()
+            if not self.navigate(answer):
+                return answer
@@ -0,0 +1,188 @@
+import os
+import csv
+import glob
+import time
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from function.transactions.transaction import Transaction
+from function.transactions.fingerprint_index import fingerprint
+from function.transactions.bulk_import import (
+    BulkImporter,
+    ImportFormatError,
+    collection_paused,
+    reject_path_for,
+    validate_rows,
+)
+
+
+def cpu_count():
+    """
+    Returns the number of CPU cores this process may run on.
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def import_paths(target):
+    """
+    Expands an import target into the CSV files it names, in import order.
+
+    Parameters:
+    target (str): A CSV file, a directory holding CSV files, or a glob pattern such as statements/2024-*.csv
+
+    Returns:
+    list: Sorted file paths; reject files of earlier imports are left out
+    """
+    if os.path.isdir(target):
+        paths = glob.glob(os.path.join(glob.escape(target), "*.csv"))
+    elif glob.has_magic(target):
+        paths = glob.glob(target)
+    else:
+        paths = [target] if os.path.isfile(target) else []
+    return sorted(
+        path
+        for path in paths
+        if path.lower().endswith(".csv") and not path.endswith(".rejects.csv")
+    )
+
+
+def parse_statement(file_path, fallback_dir=None):
+    """
+    Reads, validates and fingerprints one CSV file; runs in a worker process.
+
+    Rejected rows are written to the file's reject file, in fallback_dir if
+    the file's folder is read-only (see reject_path_for()). The valid rows are
+    returned as plain rows, which cross the process boundary much faster
+    than Transaction records.
+
+    Returns:
+    tuple: (file path, valid rows, their fingerprints, rows rejected, reject file path or None, error message or None)
+    """
+    try:
+        with open(file_path, "r", newline="") as source_file:
+            reader = csv.reader(source_file)
+            header = next(reader, None)
+            columns = BulkImporter.columns(header)
+            transactions, rejected = validate_rows(reader, columns, 2)
+    except (OSError, UnicodeDecodeError, csv.Error, ImportFormatError) as e:
+        return file_path, [], [], 0, None, str(e)
+
+    reject_path = reject_path_for(file_path, fallback_dir)
+    if rejected:
+        with open(reject_path, "w", newline="") as reject_file:
+            rejects = csv.writer(reject_file)
+            rejects.writerow(["line", "reason"] + header)
+            rejects.writerows([line, reason] + row for line, reason, row in rejected)
+    else:
+        if os.path.exists(reject_path):
+            # Left over from an earlier import of the file
+            os.remove(reject_path)
+        reject_path = None
+
+    rows = [t.as_row() for t in transactions]
+    values = [fingerprint(t) for t in transactions]
+    return file_path, rows, values, len(rejected), reject_path, None
+
+
+class ParallelImporter:
+    def __init__(self, store, workers=None, progress=None, skip_duplicates=True):
+        """
+        Imports many transaction CSV files at once, such as a year of monthly statements.
+
+        Reading, validating and fingerprinting the files is spread over a
+        pool of worker processes, one file per task. The results are merged
+        in file name order, so the import order does not depend on which
+        worker finished first, and written to the store in one append:
+        either every file is imported or none is.
+
+        Duplicates are checked file by file as if the files were imported
+        one after another, so overlapping statements don't add a row twice
+        while repeats inside a statement are kept.
+
+        Parameters:
+        store (TransactionStore): Where the transactions are imported
+        workers (int): Number of worker processes, one per available CPU core by default
+        progress (callable): Called as progress(rows, files done, files, elapsed) after every file, e.g. print_progress
+        skip_duplicates (bool): Whether rows matching stored transactions are skipped
+
+        Returns:
+        None
+        """
+        self.store = store
+        self.workers = workers or cpu_count()
+        self.progress = progress
+        self.skip_duplicates = skip_duplicates
+
+    def parse(self, paths):
+        """
+        Yields the parse_statement() result of every file, in the order of paths.
+        """
+        workers = min(self.workers, len(paths))
+        fallback_dirs = repeat(self.store.user_dir)
+        if workers <= 1:
+            yield from map(parse_statement, paths, fallback_dirs)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from pool.map(parse_statement, paths, fallback_dirs)
+
+    def run(self, paths):
+        """
+        Imports every valid row of the given CSV files.
+
+        Parameters:
+        paths (list): CSV files, e.g. from import_paths()
+
+        Returns:
+        list: One dict per file with its name, imported, skipped (rejected), duplicates, reject_file and error
+        """
+        with collection_paused():
+            return self._import(paths)
+
+    def _import(self, paths):
+        index = self.store.fingerprints() if self.skip_duplicates else None
+        # Rows taken from earlier files of this import, not stored yet
+        pending = {}
+
+        def stored(value):
+            count = index.count(value) if index is not None else 0
+            return count + pending.get(value, 0)
+
+        started = time.perf_counter()
+        accepted = []
+        accepted_values = []
+        stats = []
+        rows_read = 0
+
+        for done, (path, rows, values, rejected, reject_path, error) in enumerate(
+            self.parse(paths), 1
+        ):
+            transactions = [Transaction(*row) for row in rows]
+            if self.skip_duplicates:
+                transactions, values = BulkImporter.unique(
+                    transactions, values, stored, {}
+                )
+                for value in values:
+                    pending[value] = pending.get(value, 0) + 1
+            accepted.extend(transactions)
+            accepted_values.extend(values)
+            stats.append(
+                {
+                    "file": path,
+                    "imported": len(transactions),
+                    "skipped": rejected,
+                    "duplicates": len(rows) - len(transactions),
+                    "reject_file": reject_path,
+                    "error": error,
+                }
+            )
+            rows_read += len(rows) + rejected
+            if self.progress:
+                self.progress(
+                    rows_read, done, len(paths), time.perf_counter() - started
+                )
+
+        if accepted:
+            self.store.extend(accepted, accepted_values)
+        return stats
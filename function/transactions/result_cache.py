@@ -0,0 +1,85 @@
+from collections import OrderedDict
+
+# Number of query and report results kept across all users
+RESULT_CACHE_SIZE = 64
+
+
+class ResultCache:
+    def __init__(self, maxsize=RESULT_CACHE_SIZE):
+        """
+        Bounded LRU cache of query and report results.
+
+        Entries are keyed by (user, engine, spec) and remember the data
+        version they were computed from. As soon as a user's data is seen
+        at a new version, every entry of that user is dropped, so results
+        are invalidated exactly when the transactions change and never
+        served stale. The least recently used entries are evicted once the
+        cache is full.
+
+        Parameters:
+        maxsize (int): Number of results to keep
+
+        Returns:
+        None
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._versions = {}
+
+    def invalidate(self, owner, version):
+        if self._versions.get(owner) != version:
+            self._versions[owner] = version
+            for key in [key for key in self._entries if key[:2] == owner]:
+                del self._entries[key]
+
+    def get(self, owner, spec, version, compute):
+        """
+        Returns the cached result of spec, computing and storing it on a miss.
+
+        Parameters:
+        owner (tuple): (username, engine) the data belongs to
+        spec (tuple): Hashable description of the query or report
+        version (callable): Returns the current data version of the owner
+        compute (callable): Computes the result
+
+        Returns:
+        object: The result, shared with the cache; it must not be modified
+        """
+        self.invalidate(owner, version())
+        key = owner + (spec,)
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        self.misses += 1
+        result = compute()
+        # Computing may have reloaded data that changed on disk
+        self.invalidate(owner, version())
+        self._entries[key] = result
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        self._entries.clear()
+        self._versions.clear()
+
+    def stats(self):
+        """
+        Returns the hit and miss counters, for tuning the cache size.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+
+# Shared by every store in the process
+RESULT_CACHE = ResultCache()
@@ -0,0 +1,271 @@
+import os
+import sqlite3
+from function.transactions.transaction_store import (
+    TransactionStore,
+    CsvTransactionStore,
+)
+from function.transactions.transaction import Transaction, iso_date, to_ordinal
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    amount NUMERIC NOT NULL,
+    category TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL,
+    type TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date);
+CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions (category);
+CREATE INDEX IF NOT EXISTS idx_transactions_type ON transactions (type);
+"""
+
+COLUMNS = "amount, category, description, date, type"
+
+# Case-insensitive substring match on any column, with "\" escaping LIKE wildcards
+KEYWORD_CLAUSE = "({})".format(
+    " OR ".join(
+        f"lower(CAST({column} AS TEXT)) LIKE ? ESCAPE '\\'"
+        for column in COLUMNS.split(", ")
+    )
+)
+
+
+class SQLiteTransactionStore(TransactionStore):
+    def __init__(self, username):
+        """
+        Keeps the transactions in database/<username>/transactions.db.
+
+        Filters, sorting and the recurring transactions report are pushed
+        into indexed SQL queries instead of scanning Python lists. The CSV layout is only used
+        for migration, import and export.
+
+        Parameters:
+        username (str): The user's name
+
+        Returns:
+        None
+        """
+        super().__init__(username)
+        self.file_path = f"{self.user_dir}/transactions.db"
+        self._connection = None
+
+    def connect(self):
+        if self._connection is None:
+            os.makedirs(self.user_dir, exist_ok=True)
+            self._connection = sqlite3.connect(self.file_path)
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _record(self, row):
+        return Transaction(*row)
+
+    def _row_id(self, index):
+        (row_id,) = (
+            self.connect()
+            .execute(
+                "SELECT id FROM transactions ORDER BY id LIMIT 1 OFFSET ?", (index,)
+            )
+            .fetchone()
+        )
+        return row_id
+
+    # ---------- Migration ----------
+
+    def migrate_from_csv(self):
+        """
+        Copies every transaction of the user's CSV store into the database, replacing its contents.
+
+        Returns:
+        int: The number of migrated transactions
+        """
+        transactions = CsvTransactionStore(self.username).get_transactions() or []
+        self.rewrite(transactions)
+        self._transactions = transactions
+        self._refresh_signature(True)
+        return len(transactions)
+
+    # ---------- Storage engine ----------
+
+    def read_all(self):
+        rows = self.connect().execute(f"SELECT {COLUMNS} FROM transactions ORDER BY id")
+        return [self._record(row) for row in rows]
+
+    def append_rows(self, transactions):
+        connection = self.connect()
+        with connection:
+            connection.executemany(
+                f"INSERT INTO transactions ({COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+                (self._row(t) for t in transactions),
+            )
+
+    def replace_row(self, index, transaction):
+        connection = self.connect()
+        row_id = self._row_id(index)
+        with connection:
+            connection.execute(
+                "UPDATE transactions SET amount = ?, category = ?, description = ?,"
+                " date = ?, type = ? WHERE id = ?",
+                (*self._row(transaction), row_id),
+            )
+
+    def delete_row(self, index):
+        connection = self.connect()
+        row_id = self._row_id(index)
+        with connection:
+            connection.execute("DELETE FROM transactions WHERE id = ?", (row_id,))
+
+    def clear_rows(self):
+        connection = self.connect()
+        with connection:
+            connection.execute("DELETE FROM transactions")
+
+    def rewrite(self, transactions):
+        # One SQL transaction: the old rows stay until the new ones are committed
+        connection = self.connect()
+        with connection:
+            connection.execute("DELETE FROM transactions")
+            connection.executemany(
+                f"INSERT INTO transactions ({COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+                (self._row(t) for t in transactions),
+            )
+
+    def append_mark(self):
+        if not self.exists():
+            return 0
+        (row_id,) = (
+            self.connect()
+            .execute("SELECT COALESCE(MAX(id), 0) FROM transactions")
+            .fetchone()
+        )
+        return row_id
+
+    def undo_appends(self, mark, transactions):
+        # Appends are single transactions, so only whole appends can be undone
+        connection = self.connect()
+        rows = connection.execute(
+            f"SELECT {COLUMNS} FROM transactions WHERE id > ? ORDER BY id", (mark,)
+        ).fetchall()
+        if len(rows) > len(transactions) or rows != [
+            tuple(self._row(t)) for t in transactions[: len(rows)]
+        ]:
+            return False
+        with connection:
+            removed = connection.execute(
+                "DELETE FROM transactions WHERE id > ?", (mark,)
+            ).rowcount
+        if removed:
+            self._refresh_signature(False)
+        return True
+
+    # ---------- Queries ----------
+
+    def page(self, start, size):
+        if not self.exists() or start < 0:
+            return super().page(start, size)
+        rows = self.connect().execute(
+            f"SELECT {COLUMNS} FROM transactions ORDER BY id LIMIT ? OFFSET ?",
+            (size, start),
+        )
+        return [self._record(row) for row in rows]
+
+    def count(self):
+        if not self.exists():
+            return 0
+        (count,) = (
+            self.connect().execute("SELECT COUNT(*) FROM transactions").fetchone()
+        )
+        return count
+
+    def query(
+        self,
+        category=None,
+        start_date=None,
+        end_date=None,
+        keyword=None,
+        order_by=None,
+        descending=False,
+        limit=None,
+    ):
+        """
+        Returns the transactions matching every given criterion, using the table indexes.
+
+        With a limit, SQLite keeps only the first rows while sorting.
+        """
+        clauses = []
+        params = []
+        if category is not None:
+            clauses.append("category = ?")
+            params.append(category)
+        # Dates are stored zero-padded, so the bounds are normalized to compare as text
+        if start_date is not None:
+            clauses.append("date >= ?")
+            params.append(iso_date(to_ordinal(start_date)))
+        if end_date is not None:
+            clauses.append("date <= ?")
+            params.append(iso_date(to_ordinal(end_date)))
+        if keyword is not None:
+            escaped = keyword.lower().replace("\\", "\\\\")
+            escaped = escaped.replace("%", "\\%").replace("_", "\\_")
+            pattern = f"%{escaped}%"
+            clauses.append(KEYWORD_CLAUSE)
+            params.extend([pattern] * 5)
+
+        sql = f"SELECT {COLUMNS} FROM transactions"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if order_by in ("date", "amount"):
+            # id keeps equal keys in file order, like a stable Python sort
+            sql += f" ORDER BY {order_by} {'DESC' if descending else 'ASC'}, id"
+        else:
+            sql += " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        rows = self.connect().execute(sql, params)
+        return [self._record(row) for row in rows]
+
+    def stream(
+        self, start_date=None, end_date=None, transaction_type=None, category=None
+    ):
+        """
+        Yields the matching transactions from an indexed query cursor, one row at a time.
+        """
+        if not self.exists():
+            return
+        clauses = []
+        params = []
+        if start_date is not None:
+            clauses.append("date >= ?")
+            params.append(iso_date(to_ordinal(start_date)))
+        if end_date is not None:
+            clauses.append("date <= ?")
+            params.append(iso_date(to_ordinal(end_date)))
+        if transaction_type is not None:
+            clauses.append("type = ?")
+            params.append(transaction_type)
+        if category is not None:
+            clauses.append("lower(trim(category)) = ?")
+            params.append(category.strip().lower())
+
+        sql = f"SELECT {COLUMNS} FROM transactions"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        for row in self.connect().execute(sql + " ORDER BY id", params):
+            yield self._record(row)
+
+    def recurring(self):
+        rows = self.connect().execute(
+            "SELECT type, lower(trim(category)) AS name, amount, COUNT(*)"
+            " FROM transactions GROUP BY type, name, amount ORDER BY MIN(id)"
+        )
+        return {
+            (t_type, category, amount): count
+            for t_type, category, amount, count in rows
+        }
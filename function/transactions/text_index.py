@@ -0,0 +1,195 @@
+from array import array
+from functools import lru_cache
+from itertools import compress, count
+from operator import attrgetter
+from function.transactions.transaction import iso_date
+
+
+@lru_cache(maxsize=65536)
+def match_offsets(text, term):
+    """
+    Finds the non-overlapping, case-insensitive occurrences of term in text.
+
+    Results are cached, so highlighting the cells of a search result reuses
+    the offsets found while the search verified its candidates.
+
+    Parameters:
+    text (str): Text to search
+    term (str): Text to look for
+
+    Returns:
+    tuple: (start, end) offsets of every occurrence, empty if there is none
+    """
+    lower_text = text.lower()
+    lower_term = term.lower()
+    if not lower_term:
+        return ()
+
+    offsets = []
+    start = lower_text.find(lower_term)
+    while start != -1:
+        end = start + len(lower_term)
+        offsets.append((start, end))
+        start = lower_text.find(lower_term, end)
+    return tuple(offsets)
+
+
+def trigrams(text):
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def searchable(transaction):
+    """
+    Returns the raw field values of a transaction that are searched.
+    """
+    return (
+        str(transaction.amount),
+        transaction.category,
+        transaction.description,
+        transaction.ordinal,
+        transaction.type,
+    )
+
+
+def columns(transactions):
+    """
+    Returns searchable() of many transactions, one iterator per field.
+    """
+    return (
+        map(str, map(attrgetter("amount"), transactions)),
+        map(attrgetter("category"), transactions),
+        map(attrgetter("description"), transactions),
+        map(attrgetter("ordinal"), transactions),
+        map(attrgetter("type"), transactions),
+    )
+
+
+# Text that is searched for each raw field value; the amount is normalized
+# to its plain string form and the date to YYYY-MM-DD, as the table shows them
+RENDER = (None, None, None, iso_date, None)
+
+
+class FieldCodes(dict):
+    """
+    Codes of the raw values of one field; unseen values are encoded on lookup.
+    """
+
+    def __init__(self, index, field):
+        super().__init__()
+        self.index = index
+        self.field = field
+
+    def __missing__(self, raw):
+        render = RENDER[self.field]
+        code = self[raw] = self.index.encode(
+            raw if render is None else render(raw), self.field
+        )
+        return code
+
+
+class TextIndex:
+    def __init__(self):
+        """
+        Trigram index for substring search over the cached transactions.
+
+        Histories repeat the same categories, descriptions, amounts and dates
+        over and over, so every distinct field value gets a code and each
+        field of the transactions is kept as a compact array of codes. The
+        trigrams point to the values they occur in, so a query only checks
+        the few candidate values and then scans the code arrays of the
+        fields those values appear in.
+
+        Returns:
+        None
+        """
+        self.values = []
+        self.trigrams = {}
+        # Bit mask of the fields each value has appeared in
+        self.fields = []
+        self.codes = [array("i") for _ in RENDER]
+        self._lookup = {}
+        self._field_codes = [FieldCodes(self, field) for field in range(len(RENDER))]
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        index = cls()
+        index.extend(transactions)
+        return index
+
+    def __len__(self):
+        return len(self.codes[0])
+
+    def encode(self, value, field):
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(value)
+            self.fields.append(0)
+            for trigram in trigrams(value.lower()):
+                self.trigrams.setdefault(trigram, set()).add(code)
+        self.fields[code] |= 1 << field
+        return code
+
+    def extend(self, transactions):
+        """
+        Adds transactions appended after the indexed ones.
+
+        Works one field at a time, so the values are looked up in bulk.
+        """
+        for field, values in enumerate(columns(transactions)):
+            self.codes[field].extend(map(self._field_codes[field].__getitem__, values))
+
+    def replace(self, position, transaction):
+        """
+        Indexes the new record of the transaction at position.
+        """
+        for field, value in enumerate(searchable(transaction)):
+            self.codes[field][position] = self._field_codes[field][value]
+
+    def remove(self, position):
+        """
+        Drops the transaction at position, shifting the ones after it.
+        """
+        for codes in self.codes:
+            del codes[position]
+
+    def candidates(self, term):
+        """
+        Returns the codes of the values that may contain term.
+
+        Terms shorter than a trigram are checked against every distinct value.
+        """
+        grams = trigrams(term)
+        if not grams:
+            return range(len(self.values))
+        sets = sorted((self.trigrams.get(g, set()) for g in grams), key=len)
+        return set.intersection(*sets)
+
+    def search(self, term):
+        """
+        Returns the positions of the transactions with term in any field.
+
+        Parameters:
+        term (str): Text to look for, compared case-insensitively
+
+        Returns:
+        list: Positions in ascending (file) order
+        """
+        term = term.lower()
+        matched = {
+            code
+            for code in self.candidates(term)
+            if match_offsets(self.values[code], term)
+        }
+        fields = 0
+        for code in matched:
+            fields |= self.fields[code]
+
+        found = [
+            list(compress(count(), map(matched.__contains__, codes)))
+            for field, codes in enumerate(self.codes)
+            if fields & 1 << field
+        ]
+        if len(found) == 1:
+            return found[0]
+        return sorted(set().union(*found))
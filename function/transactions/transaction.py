@@ -0,0 +1,102 @@
+import re
+import datetime
+from functools import lru_cache
+
+# YYYY-MM-DD, where older files may leave out the zero padding (e.g. 2024-1-5)
+DATE_PATTERN = re.compile(r"\d{4}-\d{1,2}-\d{1,2}", re.ASCII)
+
+
+@lru_cache(maxsize=None)
+def to_ordinal(date_str):
+    """
+    Converts a YYYY-MM-DD string to a date ordinal.
+
+    Histories repeat the same few thousand dates, so conversions are cached.
+    Other ISO 8601 forms, such as 20240105 or 2024-W01-1, are rejected.
+    """
+    if not DATE_PATTERN.fullmatch(date_str):
+        raise ValueError(f"invalid date '{date_str}', use YYYY-MM-DD")
+    try:
+        return datetime.date.fromisoformat(date_str).toordinal()
+    except ValueError:
+        return datetime.datetime.strptime(date_str, "%Y-%m-%d").toordinal()
+
+
+@lru_cache(maxsize=None)
+def iso_date(ordinal):
+    """
+    Converts a date ordinal back to a YYYY-MM-DD string.
+    """
+    return datetime.date.fromordinal(ordinal).isoformat()
+
+
+class Transaction:
+    __slots__ = ("amount", "category", "description", "ordinal", "type")
+
+    def __init__(self, amount, category, description, date, transaction_type):
+        """
+        A single income or expense record.
+
+        The amount is stored as a number and the date as an ordinal, both
+        converted once when the record is created. Using __slots__ keeps each
+        record to a fraction of the size of a dictionary.
+
+        Parameters:
+        amount (int): The amount of the transaction
+        category (str): The category of the transaction
+        description (str): The description of the transaction
+        date (str): The date of the transaction (YYYY-MM-DD)
+        transaction_type (str): "income" or "expense"
+
+        Returns:
+        None
+        """
+        self.amount = amount
+        self.category = category
+        self.description = description
+        self.ordinal = to_ordinal(date)
+        self.type = transaction_type
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Decodes a CSV row in amount, category, description, date, type order.
+        """
+        amount, category, description, date, transaction_type = row
+        try:
+            amount = int(amount)
+        except ValueError:
+            amount = float(amount)
+        return cls(amount, category, description, date, transaction_type)
+
+    @property
+    def date(self):
+        return iso_date(self.ordinal)
+
+    @date.setter
+    def date(self, value):
+        self.ordinal = to_ordinal(value)
+
+    def as_row(self):
+        """
+        Returns the fields in CSV column order.
+        """
+        return [self.amount, self.category, self.description, self.date, self.type]
+
+    def copy(self):
+        transaction = Transaction.__new__(Transaction)
+        for field in self.__slots__:
+            setattr(transaction, field, getattr(self, field))
+        return transaction
+
+    def __eq__(self, other):
+        if not isinstance(other, Transaction):
+            return NotImplemented
+        return all(
+            getattr(self, field) == getattr(other, field) for field in self.__slots__
+        )
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "Transaction({!r}, {!r}, {!r}, {!r}, {!r})".format(*self.as_row())
@@ -1,14 +1,22 @@
 import os
 import time
-import csv
-import datetime
 from function.menu_navigator import MenuNavigator
 from function.transactions.view_transactions import ViewTransactions
+from function.transactions.transaction_store import open_store
+from function.transactions.bulk_import import (
+    BulkImporter,
+    ImportFormatError,
+    print_progress,
+)
+from function.transactions.parallel_import import ParallelImporter, import_paths
+from function.transactions.exporter import export_path, write_export
+from function.transactions.transaction import iso_date, to_ordinal
 
 
 class TransactionHistory:
-    def __init__(self, username):
+    def __init__(self, username, store=None):
         self.username = username
+        self.store = store or open_store(username)
         self.menu = {
             "1": "📋 View All Transactions",
             "2": "🏷️ Filter by Category",
@@ -18,9 +26,10 @@ class TransactionHistory:
             "6": "📥 Import Data from CSV",
             "7": "📤 Export Data to CSV",
             "8": "🔙 Back to Main Menu",
+            "9": "↩️ Remove Last Filter",
             "0": "🚪 Exit",
         }
-        self.view_transactions = ViewTransactions(self.username)
+        self.view_transactions = ViewTransactions(self.username, self.store)
 
     def run(self):
         """
@@ -29,11 +38,12 @@ class TransactionHistory:
         This function will continually prompt the user with the Transaction History menu until the user chooses to exit or return to the main menu.
 
         The menu will display all transactions for the given user, and allow the user to filter by category, date range, or keyword.
+        Filters stack on top of each other; the active ones are listed above the menu and can be removed again, most recent first.
 
         Returns:
         None
         """
-        if self.view_transactions.transactions is None:
+        if self.store.signature() is None:
             return
 
         while True:
@@ -42,6 +52,9 @@ class TransactionHistory:
 
             menu = MenuNavigator(self.menu)
             menu.print_menu()
+            steps = self.view_transactions.query.describe()
+            if steps:
+                print("\nActive filters: " + " → ".join(steps))
             choice = menu.choice()
 
             if choice == "8":
@@ -52,7 +65,6 @@ class TransactionHistory:
                 print("Exiting...")
                 time.sleep(2)
                 MenuNavigator.exit()
-            self.handle_choice(choice)
 
             self.handle_choice(choice)
 
@@ -72,11 +84,13 @@ class TransactionHistory:
                 self.import_data()
             case "7":
                 self.export_data()
+            case "9":
+                self.remove_last_filter()
             case _:
                 print("Invalid choice. Please try again.")
 
     def view_all_transactions(self):
-        self.view_transactions.get_transactions()
+        self.view_transactions.reset()
         self.view_transactions.run()
 
     def filter_by_category(self):
@@ -95,104 +109,144 @@ class TransactionHistory:
         self.view_transactions.search()
         self.view_transactions.run()
 
-    def import_data(self):
+    def remove_last_filter(self):
+        if self.view_transactions.undo() is None:
+            print("No filters are active.")
+            time.sleep(2)
+            return
+        self.view_transactions.run()
+
+    def import_data(self, file_path=None):
         os.system("cls" if os.name == "nt" else "clear")
 
         while True:
-            file_path = input(
-                "Enter the path to the CSV file or type '0' to cancel: "
-            ).strip()
+            if file_path is None:
+                file_path = input(
+                    "Enter the path to a CSV file, a directory or a pattern such as"
+                    " statements/*.csv, or type '0' to cancel: "
+                ).strip()
 
             if file_path == "0":
                 print("Returning back to main menu...")
                 time.sleep(2)
                 return
 
-            if not os.path.isfile(file_path):
-                print("File not found. Please enter a valid file path.")
+            if os.path.isfile(file_path) and not file_path.lower().endswith(".csv"):
+                print("Invalid file format. Please enter a CSV file.")
+                file_path = None
                 continue
 
-            if not file_path.lower().endswith(".csv"):
-                print("Invalid file format. Please enter a CSV file.")
+            paths = import_paths(file_path)
+            if not paths:
+                print("No CSV files found. Please enter a valid path.")
+                file_path = None
                 continue
 
             break
 
-        dest_file = f"database/{self.username}/transactions.csv"
+        if len(paths) == 1:
+            self.import_file(paths[0])
+        else:
+            self.import_files(paths)
+        time.sleep(2)
 
-        imported_rows = 0
-        skipped_rows = 0
+    def import_file(self, file_path):
+        """
+        Imports one CSV file in chunks, showing the progress.
+        """
+        print(f"Importing {file_path}...")
+        importer = BulkImporter(self.store, progress=print_progress)
+        try:
+            imported, rejected, duplicates, reject_path = importer.run(file_path)
+        except ImportFormatError as e:
+            print(e)
+            return
+        except Exception as e:
+            print(f"\nAn error occurred during import: {e}")
+            print("Import the same file again to continue where it stopped.")
+            return
+
+        if importer.resumed_at:
+            print(f"\n⏩ Resumed an interrupted import at line {importer.resumed_at}.")
+        print(f"\n\n✅ Successfully imported {imported} transactions.")
+        if duplicates:
+            print(f"↩️ Skipped {duplicates} transactions that were already imported.")
+        if rejected:
+            print(f"⚠️ Skipped {rejected} invalid rows, listed in {reject_path}")
+
+    def import_files(self, paths):
+        """
+        Imports several CSV files in parallel and in one write, then prints the figures of every file.
+        """
+        from tabulate import tabulate
 
+        importer = ParallelImporter(self.store, progress=print_progress)
+        workers = min(importer.workers, len(paths))
+        print(f"Importing {len(paths)} files on {workers} CPU core(s)...")
         try:
-            with open(file_path, "r") as source_file:
-                fieldnames = {"amount", "category", "description", "date", "type"}
-                reader = csv.DictReader(source_file)
-
-                if not fieldnames.issubset(reader.fieldnames):
-                    print("Invalid CSV file format. Missing required headers.")
-                    time.sleep(2)
-                    return
-
-                with open(dest_file, "a", newline="") as dest_csv:
-                    writer = csv.writer(dest_csv)
-
-                    for i, row in enumerate(reader, start=2):
-                        amount = row.get("amount", "").strip()
-                        category = row.get("category", "").strip()
-                        description = row.get("description", "").strip()
-                        date_str = row.get("date", "").strip()
-                        transaction_type = row.get("type", "").strip()
-
-                        if not amount.isdigit() or int(amount) <= 0:
-                            print(f"⚠️  Line {i}: Invalid amount '{amount}'. Skipped.")
-                            skipped_rows += 1
-                            continue
-
-                        if not category.isalpha() or not (3 <= len(category) <= 20):
-                            print(
-                                f"⚠️  Line {i}: Invalid category '{category}'. Skipped."
-                            )
-                            skipped_rows += 1
-                            continue
-
-                        try:
-                            datetime.datetime.strptime(date_str, "%Y-%m-%d")
-                        except ValueError:
-                            print(f"⚠️  Line {i}: Invalid date '{date_str}'. Skipped.")
-                            skipped_rows += 1
-                            continue
-
-                        if not transaction_type.lower() in ["expense", "income"]:
-                            print(
-                                f"⚠️  Line {i}: Invalid transaction type '{transaction_type}'. Skipped."
-                            )
-                            skipped_rows += 1
-                            continue
-
-                        writer.writerow(
-                            [
-                                amount,
-                                category,
-                                description,
-                                date_str,
-                                transaction_type.lower(),
-                            ]
-                        )
-                        imported_rows += 1
-            print(
-                f"\n✅ Successfully imported {imported_rows} transactions.\n⚠️ Skipped {skipped_rows} invalid rows."
-            )
-            time.sleep(2)
+            stats = importer.run(paths)
         except Exception as e:
-            print(f"An error occurred during import: {e}")
-            time.sleep(2)
+            print(f"\nAn error occurred during import, nothing was imported: {e}")
+            return
+
+        print("\n")
+        print(
+            tabulate(
+                [
+                    [
+                        os.path.basename(s["file"]),
+                        s["imported"],
+                        s["duplicates"],
+                        s["skipped"],
+                        s["error"] or s["reject_file"] or "",
+                    ]
+                    for s in stats
+                ],
+                headers=["File", "Imported", "Duplicates", "Invalid", "Notes"],
+            )
+        )
+        imported = sum(s["imported"] for s in stats)
+        print(
+            f"\n✅ Successfully imported {imported} transactions from {len(paths)} files."
+        )
+
+    def export_data(
+        self,
+        file_path=None,
+        output_format="csv",
+        compression=None,
+        start_date=None,
+        end_date=None,
+        category=None,
+        transaction_type=None,
+    ):
+        """
+        Exports the user's transactions to a file in the given directory.
+
+        The rows are streamed from storage, so the export runs in constant
+        memory. When the directory is typed at the prompt, the format,
+        compression and filters are asked for too; otherwise the arguments
+        are used.
+
+        Parameters:
+        file_path (str): Directory to write the export to, prompted for if None
+        output_format (str): "csv" or "jsonl"
+        compression (str): None, "gzip" or "xz"
+        start_date (str): First date to export (YYYY-MM-DD)
+        end_date (str): Last date to export (YYYY-MM-DD)
+        category (str): Only export this category
+        transaction_type (str): Only export "income" or "expense"
 
-    def export_data(self):
+        Returns:
+        None
+        """
         os.system("cls" if os.name == "nt" else "clear")
+        interactive = file_path is None
         while True:
-            file_path = input(
-                "Enter the directory path to save the CSV file or type '0' to cancel: "
-            ).strip()
+            if file_path is None:
+                file_path = input(
+                    "Enter the directory path to save the export or type '0' to cancel: "
+                ).strip()
 
             if file_path == "0":
                 print("Returning back to main menu...")
@@ -203,21 +257,61 @@ class TransactionHistory:
                 break
             else:
                 print("Invalid directory path. Please try again.")
+                file_path = None
 
-        with open(
-            f"{file_path}/{self.username}_transactions_backup.csv", "w", newline=""
-        ) as file:
-            writer = csv.writer(file)
-            writer.writerow(["amount", "category", "description", "date", "type"])
-            for transaction in self.view_transactions.transactions:
-                writer.writerow(
-                    [
-                        transaction["amount"],
-                        transaction["category"],
-                        transaction["description"],
-                        transaction["date"],
-                        transaction["type"],
-                    ]
-                )
-        print("✅ Data exported successfully!")
+        if interactive:
+            output_format = self.ask_choice(
+                "Format: 1. CSV  2. JSON Lines", {"1": "csv", "2": "jsonl"}
+            )
+            compression = self.ask_choice(
+                "Compression: 1. None  2. gzip  3. xz",
+                {"1": None, "2": "gzip", "3": "xz"},
+            )
+            start_date = self.ask_date("Start date (YYYY-MM-DD) or Enter for all: ")
+            end_date = self.ask_date("End date (YYYY-MM-DD) or Enter for all: ")
+            category = input("Category or Enter for all: ").strip() or None
+            transaction_type = self.ask_choice(
+                "Type: 1. Both  2. Income  3. Expense",
+                {"1": None, "2": "income", "3": "expense"},
+            )
+
+        path = export_path(file_path, self.username, output_format, compression)
+        try:
+            count = write_export(
+                path,
+                self.store.stream(start_date, end_date, transaction_type, category),
+                output_format,
+                compression,
+            )
+        except OSError as e:
+            print(f"An error occurred during export: {e}")
+            time.sleep(2)
+            return
+        print(f"✅ Exported {count} transactions to {path}")
         time.sleep(2)
+
+    def ask_choice(self, prompt, options):
+        """
+        Prompts until one of the numbered options is picked; Enter picks the first.
+        """
+        while True:
+            choice = input(f"{prompt} [1]: ").strip() or "1"
+            if choice in options:
+                return options[choice]
+            print("Invalid choice. Please try again.")
+
+    def ask_date(self, prompt):
+        """
+        Prompts until a valid YYYY-MM-DD date or nothing is entered.
+
+        Returns:
+        str: The date zero-padded, e.g. 2024-01-05 for 2024-1-5, or None
+        """
+        while True:
+            date = input(prompt).strip()
+            if not date:
+                return None
+            try:
+                return iso_date(to_ordinal(date))
+            except ValueError:
+                print("Invalid date format. Please use YYYY-MM-DD.")
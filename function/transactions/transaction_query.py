@@ -0,0 +1,239 @@
+from operator import attrgetter
+from function.transactions.transaction import to_ordinal
+from function.transactions.text_index import match_offsets
+
+
+def contains(keyword):
+    def predicate(t):
+        return any(match_offsets(str(value), keyword) for value in t.as_row())
+
+    return predicate
+
+
+def of_type(transaction_type):
+    def predicate(t):
+        return t.type == transaction_type
+
+    return predicate
+
+
+class TransactionQuery:
+    def __init__(self, store):
+        """
+        A lazily evaluated stack of filter, sort and limit steps over a transaction store.
+
+        Adding or removing a step does no work. The steps are only evaluated
+        when the results are asked for, and then all at once: filters commute,
+        so the category, the narrowest date range and the most selective
+        keyword are handed to the store in a single query where its indexes
+        answer them, and only the remaining keywords are checked on the rows
+        it returns. Sorts are applied in the order they were added. A limit
+        cuts the result of the steps before it: steps added after a limit
+        work on the rows it kept, in memory.
+
+        Results go through the store's result cache, keyed by the steps, so
+        removing the last step or opening the same view again returns the
+        earlier results without querying the store until the data changes.
+
+        Parameters:
+        store (TransactionStore): The store to query
+
+        Returns:
+        None
+        """
+        self.store = store
+        self.steps = []
+
+    # ---------- Steps ----------
+
+    def push(self, step):
+        self.steps.append(step)
+        return self
+
+    def where_category(self, category):
+        return self.push(("category", category))
+
+    def where_type(self, transaction_type):
+        return self.push(("type", transaction_type))
+
+    def where_date(self, start_date=None, end_date=None):
+        return self.push(("date", start_date, end_date))
+
+    def search(self, keyword):
+        return self.push(("keyword", keyword))
+
+    def order_by(self, field, descending=False):
+        return self.push(("order", field, descending))
+
+    def limit(self, count):
+        return self.push(("limit", count))
+
+    def pop(self):
+        """
+        Removes the most recent step.
+
+        Returns:
+        tuple: The removed step, or None if there was none
+        """
+        return self.steps.pop() if self.steps else None
+
+    def clear(self):
+        self.steps = []
+
+    def keywords(self):
+        return [step[1] for step in self.steps if step[0] == "keyword"]
+
+    def describe(self):
+        """
+        Returns a readable label for every step, oldest first.
+        """
+        labels = []
+        for kind, *args in self.steps:
+            if kind == "category":
+                labels.append(f"Category = {args[0]}")
+            elif kind == "type":
+                labels.append(f"Type = {args[0]}")
+            elif kind == "date":
+                labels.append(f"Date {args[0] or '…'} to {args[1] or '…'}")
+            elif kind == "keyword":
+                labels.append(f"Search '{args[0]}'")
+            elif kind == "order":
+                direction = "descending" if args[1] else "ascending"
+                labels.append(f"Sort by {args[0]} {direction}")
+            elif kind == "limit":
+                labels.append(f"First {args[0]}")
+        return labels
+
+    # ---------- Evaluation ----------
+
+    def segments(self):
+        """
+        Splits the steps after every limit.
+
+        Returns:
+        list: Lists of steps; each one is evaluated on the rows the one before it kept
+        """
+        segments = [[]]
+        for step in self.steps:
+            segments[-1].append(step)
+            if step[0] == "limit":
+                segments.append([])
+        if not segments[-1] and len(segments) > 1:
+            segments.pop()
+        return segments
+
+    def plan(self, steps):
+        """
+        Folds the steps up to the first limit into one store query and the work left for afterwards.
+
+        Parameters:
+        steps (list): The first of segments()
+
+        Returns:
+        tuple: (store query criteria or None if nothing can match,
+        remaining predicates, sorts, limit)
+        """
+        criteria = {}
+        predicates = []
+        sorts = []
+        limit = None
+
+        categories = {args[0] for kind, *args in steps if kind == "category"}
+        if len(categories) > 1:
+            return None, predicates, sorts, limit
+        if categories:
+            criteria["category"] = categories.pop()
+
+        starts = [s[1] for s in steps if s[0] == "date" and s[1] is not None]
+        ends = [s[2] for s in steps if s[0] == "date" and s[2] is not None]
+        if starts:
+            criteria["start_date"] = max(starts, key=to_ordinal)
+        if ends:
+            criteria["end_date"] = min(ends, key=to_ordinal)
+
+        # The longest keyword is usually the most selective one for the index
+        keywords = [args[0] for kind, *args in steps if kind == "keyword"]
+        keywords.sort(key=len, reverse=True)
+        if keywords:
+            criteria["keyword"] = keywords[0]
+        predicates = [contains(keyword.lower()) for keyword in keywords[1:]]
+
+        # The store query has no type criterion, so the type is checked on its rows
+        types = {args[0] for kind, *args in steps if kind == "type"}
+        if len(types) > 1:
+            return None, predicates, sorts, limit
+        if types:
+            predicates.append(of_type(types.pop()))
+
+        for kind, *args in steps:
+            if kind == "order":
+                sorts.append(tuple(args))
+            elif kind == "limit":
+                limit = args[0] if limit is None else min(limit, args[0])
+
+        # A single sort can be done by the store, with its indexes where it has
+        # them; filtering its rows afterwards keeps their order
+        if len(sorts) == 1:
+            criteria["order_by"], criteria["descending"] = sorts.pop()
+        # It can also cut the result when no work is left after its query,
+        # which lets it pick the first rows of a sort without a full sort
+        if limit is not None and not predicates and not sorts:
+            criteria["limit"] = limit
+        return criteria, predicates, sorts, limit
+
+    @staticmethod
+    def refine(transactions, steps):
+        """
+        Applies the steps that follow a limit to the rows it kept, one after another.
+        """
+        for kind, *args in steps:
+            if kind == "category":
+                transactions = [t for t in transactions if t.category == args[0]]
+            elif kind == "type":
+                transactions = list(filter(of_type(args[0]), transactions))
+            elif kind == "date":
+                start, end = (None if d is None else to_ordinal(d) for d in args)
+                transactions = [
+                    t
+                    for t in transactions
+                    if (start is None or t.ordinal >= start)
+                    and (end is None or t.ordinal <= end)
+                ]
+            elif kind == "keyword":
+                transactions = list(filter(contains(args[0].lower()), transactions))
+            elif kind == "order":
+                field, descending = args
+                key = attrgetter("ordinal" if field == "date" else field)
+                transactions = sorted(transactions, key=key, reverse=descending)
+            elif kind == "limit":
+                transactions = transactions[: args[0]]
+        return transactions
+
+    def evaluate(self):
+        first, *rest = self.segments()
+        criteria, predicates, sorts, limit = self.plan(first)
+        if criteria is None:
+            return []
+
+        transactions = self.store.query(**criteria)
+        for predicate in predicates:
+            transactions = list(filter(predicate, transactions))
+        for field, descending in sorts:
+            key = attrgetter("ordinal" if field == "date" else field)
+            transactions.sort(key=key, reverse=descending)
+        if limit is not None:
+            del transactions[limit:]
+        for steps in rest:
+            transactions = self.refine(transactions, steps)
+        return transactions
+
+    def results(self):
+        """
+        Evaluates the steps, or returns the cached results of the same steps.
+
+        The returned list is shared with the cache and must not be modified.
+
+        Returns:
+        list: Transaction records
+        """
+        return self.store.cached(("query", tuple(self.steps)), self.evaluate)
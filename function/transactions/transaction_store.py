@@ -0,0 +1,1426 @@
+import io
+import os
+import csv
+import mmap
+import zlib
+import locale
+import heapq
+from array import array
+from itertools import accumulate
+from operator import attrgetter
+from function.auth import Authenticator
+from function.transactions.columns import TransactionColumns, to_major
+from function.transactions.aggregates import Aggregates
+from function.transactions.date_index import DateIndex
+from function.transactions.category_index import CategoryIndex
+from function.transactions.change_log import ChangeLog
+from function.transactions.fingerprint_index import FingerprintIndex
+from function.transactions.text_index import TextIndex
+from function.transactions.result_cache import RESULT_CACHE
+from function.transactions.transaction import Transaction, to_ordinal
+from utils.files import atomic_write
+
+# Transaction attribute that each query ordering sorts by
+SORT_KEYS = {"date": "ordinal", "amount": "amount"}
+
+
+class TransactionStore:
+    fieldnames = ["amount", "category", "description", "date", "type"]
+
+    def __init__(self, username):
+        """
+        Shared, in-process store for a user's transactions.
+
+        The data file is parsed once and the typed records are kept in memory.
+        The cache is only invalidated when the file's modification time or
+        size changes, so every menu can ask for the transactions without
+        re-reading the file.
+
+        Subclasses provide the storage engine by implementing read_all(),
+        append_rows(), replace_row(), delete_row(), clear_rows() and rewrite().
+
+        Parameters:
+        username (str): The user's name
+
+        Returns:
+        None
+        """
+        self.username = username
+        self.user_dir = f"database/{username}"
+        self.csv_path = f"{self.user_dir}/transactions.csv"
+        self.file_path = self.csv_path
+        self._transactions = None
+        self._signature = None
+        # Bumped whenever the cached transactions change
+        self.version = 0
+        self._columns = None
+        self._columns_signature = None
+        self._date_index = None
+        self._date_index_version = None
+        self._text_index = None
+        self._text_index_version = None
+        # Sort permutations of the cached transactions, valid for one version
+        self._sort_permutations = {}
+        self._sort_version = None
+        self.aggregates = Aggregates(f"{self.user_dir}/aggregates.json")
+        self.category_index = CategoryIndex(f"{self.user_dir}/categories.jsonl")
+        self.fingerprint_index = FingerprintIndex(f"{self.user_dir}/fingerprints.jsonl")
+        self.change_log = ChangeLog(f"{self.user_dir}/changes.jsonl")
+
+    # ---------- Utilities ----------
+
+    def signature(self):
+        """
+        Returns the (mtime, size) pair of the data file, or None if it does not exist.
+        """
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def exists(self):
+        return self.signature() is not None
+
+    def data_version(self):
+        """
+        Returns a token that changes whenever the transactions change, through this store or on disk.
+        """
+        return self.version, self.signature()
+
+    def cached(self, spec, compute):
+        """
+        Returns the result of a query or report through the shared result cache.
+
+        Parameters:
+        spec (tuple): Hashable description of the query or report
+        compute (callable): Computes the result from this store
+
+        Returns:
+        object: The result, which must not be modified
+        """
+        owner = (self.username, type(self).__name__)
+        return RESULT_CACHE.get(owner, spec, self.data_version, compute)
+
+    def decoder(self, header):
+        """
+        Returns a function decoding raw CSV rows laid out as in header into Transaction records.
+        """
+        if header == self.fieldnames:
+            return Transaction.from_row
+        order = [header.index(field) for field in self.fieldnames]
+        return lambda row: Transaction.from_row([row[i] for i in order])
+
+    def load(self):
+        """
+        Reads the data file into memory, but only if it changed since the last load.
+
+        Returns:
+        list: The cached transactions, or None if the file does not exist.
+        """
+        signature = self.signature()
+        if signature is None:
+            self._transactions = None
+            self._signature = None
+            return None
+
+        if self._transactions is None or signature != self._signature:
+            self._transactions = self.read_all()
+            self._signature = signature
+            self.version += 1
+        return self._transactions
+
+    def get_transactions(self):
+        """
+        Returns all transactions for the user.
+
+        The returned list is a copy, so callers may filter or sort it freely.
+        Records are shared with the cache and must not be modified in place.
+
+        Returns:
+        list: A list of Transaction records, or None if the file does not exist.
+        """
+        transactions = self.load()
+        if transactions is None:
+            return None
+        return list(transactions)
+
+    def row(self, index):
+        """
+        Returns the transaction at the given zero-based position.
+
+        Raises:
+        IndexError: If there is no transaction at that position
+        """
+        page = self.page(index, 1)
+        if not page:
+            raise IndexError("transaction index out of range")
+        return page[0]
+
+    def page(self, start, size):
+        """
+        Returns up to size transactions starting at the given zero-based position.
+        """
+        return (self.load() or [])[start : start + size]
+
+    def count(self):
+        aggregates = self.aggregates.read(self.signature())
+        if aggregates is not None:
+            return aggregates["rows"]
+        return len(self.load() or [])
+
+    def close(self):
+        """
+        Releases any resources held by the storage engine.
+        """
+
+    def _cache_current(self):
+        return self._transactions is not None and self.signature() == self._signature
+
+    def _date_index_current(self):
+        return (
+            self._date_index is not None
+            and self._date_index_version == self.version
+            and self._cache_current()
+        )
+
+    def _text_index_current(self):
+        return (
+            self._text_index is not None
+            and self._text_index_version == self.version
+            and self._cache_current()
+        )
+
+    def _refresh_signature(self, was_current):
+        # Our own writes keep the cache valid; only external changes force a re-parse.
+        self.version += 1
+        if was_current:
+            self._signature = self.signature()
+        else:
+            self._transactions = None
+            self._signature = None
+
+    def _row(self, transaction):
+        return transaction.as_row()
+
+    def _current_aggregates(self):
+        signature = self.signature()
+        if signature is None:
+            return Aggregates.empty()
+        return self.aggregates.read(signature)
+
+    def _current_category_index(self):
+        # Only an index that matches the data before a write can be updated in place
+        if self.category_index.load(self.signature()):
+            return self.category_index
+        return None
+
+    def _current_fingerprint_index(self):
+        signature = self.signature()
+        if signature is None:
+            # A new data file starts with an empty index, journalled from its first write
+            self.fingerprint_index.start()
+            return self.fingerprint_index
+        if self.fingerprint_index.load(signature):
+            return self.fingerprint_index
+        return None
+
+    def _current_change_log(self):
+        # Changes are only recorded while the journal has every earlier one
+        if self.change_log.current(self.signature()):
+            return self.change_log
+        return None
+
+    def _update_aggregates(self, aggregates, added=(), removed=()):
+        # Stale aggregates are left alone; balance() rebuilds them on demand
+        if aggregates is not None:
+            aggregates = self.aggregates.apply(aggregates, added, removed)
+            self.aggregates.write(self.signature(), aggregates)
+
+    # ---------- Writes ----------
+
+    def add(self, amount, category, description, date, transaction_type):
+        """
+        Appends a single transaction.
+        """
+        self.extend(
+            [Transaction(amount, category, description, date, transaction_type)]
+        )
+
+    def extend(self, transactions, fingerprints=None):
+        """
+        Appends several transactions in one write.
+
+        Parameters:
+        transactions (list): Transaction records
+        fingerprints (list): Their content fingerprints if already computed, e.g. by a duplicate check
+
+        Returns:
+        None
+        """
+        os.makedirs(self.user_dir, exist_ok=True)
+        was_current = self._cache_current()
+        columns_current = (
+            self._columns is not None and self._columns_signature == self.signature()
+        )
+        date_index_current = self._date_index_current()
+        text_index_current = self._text_index_current()
+        category_index = self._current_category_index()
+        fingerprint_index = self._current_fingerprint_index()
+        change_log = self._current_change_log()
+        aggregates = self._current_aggregates()
+        self.append_rows(transactions)
+        if date_index_current:
+            self._date_index.extend(transactions, len(self._transactions))
+        if text_index_current:
+            self._text_index.extend(transactions)
+        if was_current:
+            self._transactions.extend(transactions)
+        if columns_current:
+            self._columns.extend(transactions)
+        self._refresh_signature(was_current)
+        if columns_current:
+            self._columns_signature = self.signature()
+        if date_index_current:
+            self._date_index_version = self.version
+        if text_index_current:
+            self._text_index_version = self.version
+        if category_index is not None:
+            category_index.append(transactions, self.signature())
+        if fingerprint_index is not None:
+            fingerprint_index.append(transactions, self.signature(), fingerprints)
+        if change_log is not None:
+            change_log.record(
+                "add", self.signature(), [t.as_row() for t in transactions]
+            )
+        self._update_aggregates(aggregates, added=transactions)
+
+    def update(self, index, transaction):
+        """
+        Replaces the transaction at the given position.
+
+        Parameters:
+        index (int): Zero-based position of the transaction
+        transaction (Transaction): The new transaction record
+
+        Returns:
+        None
+        """
+        was_current = self._cache_current()
+        date_index_current = self._date_index_current()
+        text_index_current = self._text_index_current()
+        category_index = self._current_category_index()
+        fingerprint_index = self._current_fingerprint_index()
+        change_log = self._current_change_log()
+        aggregates = self._current_aggregates()
+        old = self.row(index)
+        transaction = transaction.copy()
+        if was_current:
+            self._transactions[index] = transaction
+        if date_index_current:
+            self._date_index.replace(index, old.ordinal, transaction.ordinal)
+        if text_index_current:
+            self._text_index.replace(index, transaction)
+        self.replace_row(index, transaction)
+        self._refresh_signature(was_current)
+        if date_index_current:
+            self._date_index_version = self.version
+        if text_index_current:
+            self._text_index_version = self.version
+        if category_index is not None:
+            category_index.replace(index, transaction, self.signature())
+        if fingerprint_index is not None:
+            fingerprint_index.replace(old, transaction, self.signature())
+        if change_log is not None:
+            change_log.record("set", self.signature(), index, transaction.as_row())
+        self._update_aggregates(aggregates, added=[transaction], removed=[old])
+
+    def delete(self, index):
+        """
+        Removes the transaction at the given position.
+
+        Parameters:
+        index (int): Zero-based position of the transaction
+
+        Returns:
+        None
+        """
+        was_current = self._cache_current()
+        date_index_current = self._date_index_current()
+        text_index_current = self._text_index_current()
+        category_index = self._current_category_index()
+        fingerprint_index = self._current_fingerprint_index()
+        change_log = self._current_change_log()
+        aggregates = self._current_aggregates()
+        old = self.row(index)
+        if was_current:
+            del self._transactions[index]
+        if date_index_current:
+            self._date_index.remove(index, old.ordinal)
+        if text_index_current:
+            self._text_index.remove(index)
+        self.delete_row(index)
+        self._refresh_signature(was_current)
+        if date_index_current:
+            self._date_index_version = self.version
+        if text_index_current:
+            self._text_index_version = self.version
+        if category_index is not None:
+            category_index.remove(index, self.signature())
+        if fingerprint_index is not None:
+            fingerprint_index.remove(old, self.signature())
+        if change_log is not None:
+            change_log.record("del", self.signature(), index)
+        self._update_aggregates(aggregates, removed=[old])
+
+    def clear(self):
+        """
+        Removes every transaction, keeping an empty data file.
+        """
+        os.makedirs(self.user_dir, exist_ok=True)
+        change_log = self._current_change_log()
+        self.clear_rows()
+        self._transactions = []
+        self._refresh_signature(True)
+        self.category_index.build([], self.signature())
+        self.fingerprint_index.build([], self.signature())
+        if change_log is not None:
+            change_log.record("clear", self.signature())
+        self._update_aggregates(Aggregates.empty())
+
+    def replace_all(self, transactions):
+        """
+        Atomically replaces every transaction, e.g. with the ones restored from a backup.
+
+        The old transactions stay in place until the new ones are completely
+        written, so an interrupted replace leaves one or the other, never a mix.
+
+        Parameters:
+        transactions (list): Transaction records
+
+        Returns:
+        None
+        """
+        os.makedirs(self.user_dir, exist_ok=True)
+        change_log = self._current_change_log()
+        transactions = list(transactions)
+        self.rewrite(transactions)
+        self._transactions = list(transactions)
+        self._refresh_signature(True)
+        self.category_index.build(transactions, self.signature())
+        self.fingerprint_index.build(transactions, self.signature())
+        if change_log is not None:
+            change_log.record("clear", self.signature())
+            if transactions:
+                change_log.record(
+                    "add", self.signature(), [t.as_row() for t in transactions]
+                )
+        self._update_aggregates(Aggregates.empty(), added=transactions)
+
+    # ---------- Queries ----------
+
+    def matches(self, t, start_date, end_date, transaction_type, category):
+        """
+        Checks a transaction record against the stream() predicates.
+
+        Dates are compared as ordinals and the category must already be normalized.
+        """
+        if start_date is not None and t.ordinal < start_date:
+            return False
+        if end_date is not None and t.ordinal > end_date:
+            return False
+        if transaction_type is not None and t.type != transaction_type:
+            return False
+        if category is not None and t.category.strip().lower() != category:
+            return False
+        return True
+
+    def stream(
+        self, start_date=None, end_date=None, transaction_type=None, category=None
+    ):
+        """
+        Yields the transactions matching every given predicate, one at a time.
+
+        Parameters:
+        start_date (str): First date to keep (YYYY-MM-DD)
+        end_date (str): Last date to keep (YYYY-MM-DD)
+        transaction_type (str): "income" or "expense"
+        category (str): Category to keep, compared case-insensitively
+
+        Returns:
+        generator: Transaction records in file order
+        """
+        start, end = self._ordinal_range(start_date, end_date)
+        if category is not None:
+            category = category.strip().lower()
+        for t in self.in_date_range(start, end):
+            if self.matches(t, None, None, transaction_type, category):
+                yield t
+
+    def _ordinal_range(self, start_date, end_date):
+        start = None if start_date is None else to_ordinal(start_date)
+        end = None if end_date is None else to_ordinal(end_date)
+        return start, end
+
+    def query(
+        self,
+        category=None,
+        start_date=None,
+        end_date=None,
+        keyword=None,
+        order_by=None,
+        descending=False,
+        limit=None,
+    ):
+        """
+        Returns the transactions matching every given criterion.
+
+        Sorting the whole history reads a cached sort permutation; the first
+        few rows of a large sorted result are picked with a heap instead of a
+        full sort.
+
+        Parameters:
+        category (str): Exact category to keep
+        start_date (str): First date to keep (YYYY-MM-DD)
+        end_date (str): Last date to keep (YYYY-MM-DD)
+        keyword (str): Case-insensitive text that must appear in any field, looked up in the trigram index
+        order_by (str): "date" or "amount"
+        descending (bool): Sort in descending order
+        limit (int): Keep only the first transactions of the result
+
+        Returns:
+        list: A list of Transaction records.
+        """
+        start, end = self._ordinal_range(start_date, end_date)
+        filtered = keyword or category is not None or (start, end) != (None, None)
+        if order_by is not None and not filtered:
+            return self.sorted_rows(order_by, descending, limit)
+
+        if keyword:
+            # The keyword is usually the most selective criterion
+            transactions = self.load() or []
+            transactions = [
+                t
+                for t in map(
+                    transactions.__getitem__, self.text_index().search(keyword)
+                )
+                if (category is None or t.category == category)
+                and (start is None or t.ordinal >= start)
+                and (end is None or t.ordinal <= end)
+            ]
+        elif category is not None:
+            transactions = [
+                t
+                for t in self.rows_at(self.category_positions(category))
+                if t.category == category
+                and (start is None or t.ordinal >= start)
+                and (end is None or t.ordinal <= end)
+            ]
+        else:
+            transactions = self.in_date_range(start, end)
+        if order_by is not None:
+            key = attrgetter(SORT_KEYS.get(order_by, order_by))
+            if limit is not None and limit < len(transactions):
+                # Both heap selections are stable, like a sort
+                select = heapq.nlargest if descending else heapq.nsmallest
+                return select(limit, transactions, key=key)
+            transactions.sort(key=key, reverse=descending)
+        if limit is not None:
+            del transactions[limit:]
+        return transactions
+
+    def sort_permutation(self, order_by, descending=False):
+        """
+        Returns the positions of the cached transactions in sorted order.
+
+        Each permutation is computed once and reused until the transactions
+        change, so switching between orderings is a lookup. Equal keys keep
+        their file order, like a stable sort.
+
+        Parameters:
+        order_by (str): "date" or "amount"
+        descending (bool): Sort in descending order
+
+        Returns:
+        array: Positions in the transaction list
+        """
+        transactions = self.load() or []
+        if self._sort_version != self.version:
+            self._sort_permutations = {}
+            self._sort_version = self.version
+        permutation = self._sort_permutations.get((order_by, descending))
+        if permutation is None:
+            keys = list(
+                map(attrgetter(SORT_KEYS.get(order_by, order_by)), transactions)
+            )
+            permutation = array(
+                "q", sorted(range(len(keys)), key=keys.__getitem__, reverse=descending)
+            )
+            self._sort_permutations[(order_by, descending)] = permutation
+        return permutation
+
+    def sorted_rows(self, order_by, descending=False, limit=None):
+        """
+        Returns every transaction in sorted order, or only the first limit of them.
+        """
+        transactions = self.load() or []
+        cached = (order_by, descending) in self._sort_permutations
+        if (self._sort_version == self.version and cached) or limit is None:
+            permutation = self.sort_permutation(order_by, descending)
+            return list(map(transactions.__getitem__, permutation[:limit]))
+        # A few rows are cheaper to pick with a heap than a full sort
+        key = attrgetter(SORT_KEYS.get(order_by, order_by))
+        select = heapq.nlargest if descending else heapq.nsmallest
+        return select(limit, transactions, key=key)
+
+    def date_index(self):
+        """
+        Returns the date index of the cached transactions, rebuilt only when they were reloaded.
+
+        Returns:
+        DateIndex: Positions of the transactions sorted by date
+        """
+        transactions = self.load() or []
+        if self._date_index is None or self._date_index_version != self.version:
+            self._date_index = DateIndex.from_transactions(transactions)
+            self._date_index_version = self.version
+        return self._date_index
+
+    def text_index(self):
+        """
+        Returns the trigram index of the cached transactions, rebuilt only when they were reloaded.
+
+        Returns:
+        TextIndex: Positions of the transactions by the text of their fields
+        """
+        transactions = self.load() or []
+        if self._text_index is None or self._text_index_version != self.version:
+            self._text_index = TextIndex.from_transactions(transactions)
+            self._text_index_version = self.version
+        return self._text_index
+
+    def in_date_range(self, start=None, end=None):
+        """
+        Returns the cached transactions dated within [start, end], in file order.
+
+        Parameters:
+        start (int): First date ordinal to include
+        end (int): Last date ordinal to include
+
+        Returns:
+        list: Transaction records
+        """
+        transactions = self.load() or []
+        if start is None and end is None:
+            return list(transactions)
+        return [transactions[p] for p in self.date_index().range(start, end)]
+
+    def category_positions(self, category):
+        """
+        Returns the positions of the transactions in a category from the inverted category index.
+
+        The index is read from its journal when it matches the data file, and rebuilt otherwise.
+
+        Parameters:
+        category (str): Category to look up, compared case-insensitively
+
+        Returns:
+        array: Ascending positions
+        """
+        signature = self.signature()
+        if signature is None:
+            return []
+        if not self.category_index.load(signature):
+            self.category_index.build(self.stream(), signature)
+        return self.category_index.positions(category)
+
+    def fingerprints(self):
+        """
+        Returns the content fingerprint index of the transactions, for duplicate checks.
+
+        The index is read from its journal when it matches the data file, and rebuilt otherwise.
+
+        Returns:
+        FingerprintIndex: The index, or None if the user has no data file
+        """
+        signature = self.signature()
+        if signature is None:
+            return None
+        if not self.fingerprint_index.load(signature):
+            self.fingerprint_index.build(self.stream(), signature)
+        return self.fingerprint_index
+
+    def rows_at(self, positions):
+        """
+        Returns the transactions at the given ascending positions.
+        """
+        transactions = self.load() or []
+        return [transactions[p] for p in positions]
+
+    def load_aggregates(self):
+        """
+        Returns the running totals and monthly rollup from the aggregates sidecar file.
+
+        This is O(1) while the sidecar matches the data file; a stale sidecar is
+        rebuilt from the transactions and saved again.
+
+        Returns:
+        dict: The aggregates (see Aggregates)
+        """
+        signature = self.signature()
+        if signature is None:
+            return Aggregates.empty()
+        aggregates = self.aggregates.read(signature)
+        if aggregates is None:
+            aggregates = self.aggregates.apply(Aggregates.empty(), added=self.stream())
+            self.aggregates.write(signature, aggregates)
+        return aggregates
+
+    def balance(self):
+        """
+        Returns the total income and expense for the whole history in O(1).
+
+        Returns:
+        tuple: (total income, total expense)
+        """
+        totals = self.load_aggregates()["totals"]
+        return to_major(totals.get("income", 0)), to_major(totals.get("expense", 0))
+
+    def columns(self):
+        """
+        Returns the columns the recurring transactions report counts, rebuilt only when the data changed.
+
+        Returns:
+        TransactionColumns: Array-backed amounts, categories and types
+        """
+        signature = self.signature()
+        if self._columns is None or self._columns_signature != signature:
+            # Streaming keeps a cold cache cold: only the compact arrays are built
+            self._columns = TransactionColumns.from_transactions(self.stream())
+            self._columns_signature = signature
+        return self._columns
+
+    def totals(self, year=None, month=None):
+        """
+        Sums income and expense, optionally for a single month, from the monthly rollup.
+
+        Returns:
+        tuple: (total income, total expense)
+        """
+        if year is None:
+            return self.balance()
+
+        month_totals = self.load_aggregates()["monthly"].get(
+            f"{year:04d}-{month:02d}", {}
+        )
+        income_total = 0
+        expense_total = 0
+        for cell in month_totals.values():
+            income_total += cell["totals"].get("income", 0)
+            expense_total += cell["totals"].get("expense", 0)
+        return to_major(income_total), to_major(expense_total)
+
+    def category_totals(self):
+        """
+        Sums income and expense per normalized (lowercase) category from the monthly rollup.
+
+        Returns:
+        dict: {category: {"income": total, "expense": total}}
+        """
+        sums = {}
+        for month in self.load_aggregates()["monthly"].values():
+            for category, cell in month.items():
+                category_sums = sums.setdefault(category, {"income": 0, "expense": 0})
+                for t_type in ("income", "expense"):
+                    category_sums[t_type] += cell["totals"].get(t_type, 0)
+        return {
+            category: {t_type: to_major(total) for t_type, total in totals.items()}
+            for category, totals in sums.items()
+        }
+
+    def recurring(self):
+        """
+        Counts transactions sharing the same type, category and amount.
+
+        Returns:
+        dict: {(type, category, amount): count} in first-seen order
+        """
+        return {
+            (t_type, category, to_major(amount)): count
+            for (t_type, category, amount), count in self.columns().recurring().items()
+        }
+
+    # ---------- Storage engine ----------
+
+    def read_all(self):
+        raise NotImplementedError
+
+    def append_rows(self, transactions):
+        raise NotImplementedError
+
+    def replace_row(self, index, transaction):
+        raise NotImplementedError
+
+    def delete_row(self, index):
+        raise NotImplementedError
+
+    def clear_rows(self):
+        raise NotImplementedError
+
+    def rewrite(self, transactions):
+        """
+        Atomically replaces every row with the given transactions.
+        """
+        raise NotImplementedError
+
+    def append_mark(self):
+        """
+        Returns a JSON-serializable mark of where the next append starts, for undo_appends().
+        """
+        raise NotImplementedError
+
+    def undo_appends(self, mark, transactions):
+        """
+        Removes the rows of an append that was interrupted after the mark was taken, e.g. by a crash during an import.
+
+        Only the transactions of that append, or the first of them if it
+        was cut short, may follow the mark: anything else means the data was
+        written to since, and nothing is removed.
+
+        Parameters:
+        mark: A value returned by append_mark() before the append
+        transactions (list): The transactions the interrupted append was writing
+
+        Returns:
+        bool: False if the data was changed in other ways since the mark, in which case it is left alone
+        """
+        raise NotImplementedError
+
+
+class CsvTransactionStore(TransactionStore):
+    # Number of log records that triggers a compaction into transactions.csv
+    compact_threshold = 500
+
+    def __init__(self, username):
+        """
+        Keeps the transactions in database/<username>/transactions.csv.
+
+        New transactions are appended to the CSV file. Edits and deletes never
+        rewrite it: they are appended to transactions.log as replacement ("U")
+        and tombstone ("D") records keyed by the row id, i.e. the row's position
+        in transactions.csv. Reads merge the log transparently, and once the
+        log holds compact_threshold records it is folded back into the CSV file.
+
+        A byte-offset index of the rows in transactions.csv is built on first
+        use and extended on append, so row() and page() read single rows
+        through a memory map instead of parsing the whole file. A row left
+        half-written by a crash is cut off when the store is opened.
+
+        Parameters:
+        username (str): The user's name
+
+        Returns:
+        None
+        """
+        super().__init__(username)
+        self.log_path = f"{self.user_dir}/transactions.log"
+        self._base_rows = []
+        self._row_ids = array("q")
+        self._log_records = 0
+        self._offsets = None
+        self._offsets_signature = None
+        self._changes = None
+        self._changes_signature = None
+        self.repair()
+
+    def repair(self, block_size=1 << 16):
+        """
+        Cuts off a last row torn by an interrupted write, so the file parses again.
+
+        Every append ends its rows with a line break, so a last line without
+        one that doesn't decode as a transaction can only be the cut-off end
+        of a write. A complete last row that only lacks the line break, e.g.
+        after editing the file by hand, is kept and given one, so the next
+        append starts on a line of its own.
+
+        Returns:
+        bool: Whether a torn row was cut off
+        """
+        try:
+            file = open(self.file_path, "rb+")
+        except FileNotFoundError:
+            return False
+        with file:
+            position = file.seek(0, os.SEEK_END)
+            tail = b""
+            while position > 0 and b"\n" not in tail:
+                step = min(block_size, position)
+                position -= step
+                file.seek(position)
+                tail = file.read(step) + tail
+            cut = tail.rfind(b"\n") + 1
+            if cut == len(tail):
+                return False
+            cut += position
+
+            encoding = locale.getpreferredencoding(False)
+            try:
+                row = next(csv.reader([tail[cut - position :].decode(encoding)]), [])
+                if cut == 0:
+                    torn = not set(self.fieldnames).issubset(row)
+                else:
+                    file.seek(0)
+                    header = next(csv.reader([file.readline().decode(encoding)]))
+                    torn = self.decoder(header)(row).type not in ("income", "expense")
+            except (ValueError, IndexError, csv.Error):
+                torn = True
+            if not torn:
+                file.seek(0, os.SEEK_END)
+                file.write(b"\n")
+            elif cut:
+                file.truncate(cut)
+        if torn and not cut:
+            # Only the header of a new file was being written
+            os.remove(self.file_path)
+        return torn
+
+    def file_signature(self):
+        """
+        Returns the (mtime, size) pair of transactions.csv alone, ignoring the edit log.
+        """
+        return TransactionStore.signature(self)
+
+    def log_signature(self):
+        """
+        Returns the (mtime, size) pair of transactions.log, or None without pending edits.
+        """
+        try:
+            stat = os.stat(self.log_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def signature(self):
+        signature = super().signature()
+        if signature is None:
+            return None
+        log_signature = self.log_signature()
+        if log_signature is None:
+            return signature
+        return signature + log_signature
+
+    def checksum(self, transaction):
+        """
+        Returns a CRC of the transaction's fields, used to tie log records to the row they target.
+        """
+        return zlib.crc32("\x1f".join(map(str, self._row(transaction))).encode())
+
+    # ---------- Random access ----------
+
+    def line_index(self):
+        """
+        Returns the byte offset of every row in transactions.csv, indexed by row id.
+        """
+        signature = self.file_signature()
+        if self._offsets is None or self._offsets_signature != signature:
+            self._offsets = self.build_line_index()
+            self._offsets_signature = signature
+        return self._offsets
+
+    def build_line_index(self):
+        offsets = array("q")
+        with open(self.file_path, "rb") as file:
+            position = len(file.readline())
+            start = position
+            quotes = 0
+            for block in self.line_blocks(file):
+                if not quotes and self.one_row_per_line(block):
+                    # Row offsets are the running sums of the line lengths
+                    offsets.extend(
+                        accumulate(map(len, block.splitlines(True)), initial=position)
+                    )
+                    offsets.pop()
+                    position += len(block)
+                    start = position
+                    continue
+
+                for line in io.BytesIO(block):
+                    position += len(line)
+                    quotes += line.count(b'"')
+                    if quotes % 2:
+                        continue  # the row continues after a newline inside quotes
+                    # Blank lines are skipped by the CSV reader, so they get no row id
+                    if line.strip(b"\r\n"):
+                        offsets.append(start)
+                    start = position
+                    quotes = 0
+        return offsets
+
+    @staticmethod
+    def line_blocks(file, size=1 << 22):
+        """
+        Yields the rest of a binary file in large blocks that end on a line break.
+        """
+        tail = b""
+        while True:
+            chunk = file.read(size)
+            if not chunk:
+                if tail:
+                    yield tail
+                return
+            chunk = tail + chunk
+            cut = chunk.rfind(b"\n") + 1
+            tail = chunk[cut:]
+            if cut:
+                yield chunk[:cut]
+
+    @staticmethod
+    def one_row_per_line(block):
+        """
+        Checks that a block has no quoted fields, blank lines or bare carriage returns.
+        """
+        return (
+            b'"' not in block
+            and b"\n\n" not in block
+            and b"\n\r\n" not in block
+            and not block.startswith((b"\n", b"\r\n"))
+            and block.count(b"\r") == block.count(b"\r\n")
+        )
+
+    def read_rows(self, row_ids):
+        """
+        Decodes the given rows of transactions.csv through a memory map, without reading the rows before them.
+
+        Parameters:
+        row_ids (list): Row ids (positions in transactions.csv) to read
+
+        Returns:
+        list: The Transaction records, in the order of row_ids
+        """
+        offsets = self.line_index()
+        if not row_ids:
+            return []
+        encoding = locale.getpreferredencoding(False)
+        with open(self.file_path, "rb") as file:
+            header = next(csv.reader([file.readline().decode(encoding)]))
+            decode = self.decoder(header)
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                transactions = []
+                for row_id in row_ids:
+                    start = offsets[row_id]
+                    end = offsets[row_id + 1] if row_id + 1 < len(offsets) else None
+                    text = view[start:end].decode(encoding)
+                    row = next(csv.reader(io.StringIO(text, newline="")))
+                    transactions.append(decode(row))
+        return transactions
+
+    def pending_changes(self):
+        """
+        Returns the edit log records that still apply to their rows.
+
+        Returns:
+        dict: {row id: replacement record or None for a delete}
+        """
+        signature = self.signature()
+        if self._changes is None or self._changes_signature != signature:
+            rows = len(self.line_index())
+            changes = {
+                row_id: change
+                for row_id, change in self.read_log().items()
+                if row_id < rows
+            }
+            row_ids = sorted(changes)
+            self._changes = {}
+            for row_id, transaction in zip(row_ids, self.read_rows(row_ids)):
+                crc, change = changes[row_id]
+                if self.checksum(transaction) == crc:
+                    self._changes[row_id] = change
+            self._changes_signature = signature
+        return self._changes
+
+    def locate(self, start, size):
+        """
+        Maps live positions [start, start + size) to row ids, skipping deleted rows.
+        """
+        if self._cache_current():
+            return list(self._row_ids[start : start + size])
+
+        deleted = self.deleted_rows()
+        row_id = start
+        for deleted_id in deleted:
+            if deleted_id > row_id:
+                break
+            row_id += 1
+
+        rows = len(self.line_index())
+        deleted = set(deleted)
+        row_ids = []
+        while len(row_ids) < size and row_id < rows:
+            if row_id not in deleted:
+                row_ids.append(row_id)
+            row_id += 1
+        return row_ids
+
+    def deleted_rows(self):
+        """
+        Returns the ascending row ids deleted by the edit log.
+        """
+        changes = self.pending_changes()
+        return sorted(row_id for row_id, change in changes.items() if change is None)
+
+    def locate_positions(self, positions):
+        """
+        Maps ascending live positions to row ids, skipping deleted rows.
+        """
+        if self._cache_current():
+            return [self._row_ids[p] for p in positions]
+
+        deleted = self.deleted_rows()
+        row_ids = []
+        skipped = 0
+        for position in positions:
+            # Each deleted row before the target shifts it one row further
+            while skipped < len(deleted) and deleted[skipped] <= position + skipped:
+                skipped += 1
+            row_ids.append(position + skipped)
+        return row_ids
+
+    def read_live(self, row_ids):
+        """
+        Reads the given rows and applies their pending replacements from the edit log.
+        """
+        changes = self.pending_changes()
+        return [
+            changes[row_id] if row_id in changes else transaction
+            for row_id, transaction in zip(row_ids, self.read_rows(row_ids))
+        ]
+
+    def rows_at(self, positions):
+        if (
+            self._cache_current()
+            or not os.path.exists(self.file_path)
+            # Reading many scattered rows costs more than one sequential parse
+            or len(positions) * 8 > self.count()
+        ):
+            return super().rows_at(positions)
+        return self.read_live(self.locate_positions(positions))
+
+    def base_row(self, row_id):
+        """
+        Returns the row as written in transactions.csv, before any log record.
+        """
+        if self._cache_current():
+            return self._base_rows[row_id]
+        return self.read_rows([row_id])[0]
+
+    def page(self, start, size):
+        if self._cache_current():
+            return self._transactions[start : start + size]
+        if not os.path.exists(self.file_path) or start < 0:
+            return super().page(start, size)
+
+        return self.read_live(self.locate(start, size))
+
+    def count(self):
+        aggregates = self.aggregates.read(self.signature())
+        if aggregates is not None:
+            return aggregates["rows"]
+        if self._cache_current() or not os.path.exists(self.file_path):
+            return super().count()
+        deleted = sum(change is None for change in self.pending_changes().values())
+        return len(self.line_index()) - deleted
+
+    # ---------- Storage engine ----------
+
+    def read_log(self):
+        """
+        Reads the edit log.
+
+        Returns:
+        dict: {row id: (checksum of the targeted row, replacement record or None for a delete)}
+        """
+        changes = {}
+        self._log_records = 0
+        if not os.path.exists(self.log_path):
+            return changes
+        with open(self.log_path, "r", newline="") as file:
+            for record in csv.reader(file):
+                self._log_records += 1
+                if len(record) != 3 + len(self.fieldnames):
+                    continue  # torn or malformed line
+                op, row_id, crc = record[0], int(record[1]), int(record[2])
+                # Later records for the same row win
+                if op == "D":
+                    changes[row_id] = (crc, None)
+                elif op == "U":
+                    changes[row_id] = (crc, Transaction.from_row(record[3:]))
+        return changes
+
+    def merge_change(self, changes, row_id, transaction):
+        """
+        Returns the live version of a base row: itself, its replacement, or None if deleted.
+        """
+        crc, change = changes[row_id]
+        if self.checksum(transaction) != crc:
+            return transaction  # stale record from before a compaction
+        return change
+
+    def read_all(self):
+        with open(self.file_path, "r", newline="") as file:
+            reader = csv.reader(file)
+            header = next(reader, None)
+            if header is None:
+                self._base_rows = []
+            else:
+                self._base_rows = list(map(self.decoder(header), filter(None, reader)))
+
+        changes = self.read_log()
+        if not changes:
+            self._row_ids = array("q", range(len(self._base_rows)))
+            return list(self._base_rows)
+
+        self._row_ids = array("q")
+        transactions = []
+        for row_id, transaction in enumerate(self._base_rows):
+            if row_id in changes:
+                transaction = self.merge_change(changes, row_id, transaction)
+            if transaction is not None:
+                self._row_ids.append(row_id)
+                transactions.append(transaction)
+        return transactions
+
+    def stream(
+        self, start_date=None, end_date=None, transaction_type=None, category=None
+    ):
+        """
+        Yields the matching transactions straight from transactions.csv without caching them.
+
+        Predicates run on the raw CSV fields, so rows outside the requested
+        window are rejected before they are decoded. Dates are compared as
+        ordinals through the to_ordinal cache, like the in-memory path, so
+        unpadded dates filter the same whether the cache is warm or not. A
+        warm in-memory cache is used instead of the file when it is current.
+        """
+        if self._cache_current():
+            yield from super().stream(start_date, end_date, transaction_type, category)
+            return
+        if not os.path.exists(self.file_path):
+            return
+
+        start, end = self._ordinal_range(start_date, end_date)
+        if category is not None:
+            category = category.strip().lower()
+        changes = self.read_log()
+        with open(self.file_path, "r", newline="") as file:
+            reader = csv.reader(file)
+            header = next(reader, None)
+            if header is None:
+                return
+            decode = self.decoder(header)
+            date_i = header.index("date")
+            type_i = header.index("type")
+            category_i = header.index("category")
+
+            for row_id, row in enumerate(filter(None, reader)):
+                if row_id in changes:
+                    transaction = self.merge_change(changes, row_id, decode(row))
+                    if transaction is not None and self.matches(
+                        transaction, start, end, transaction_type, category
+                    ):
+                        yield transaction
+                    continue
+
+                if start is not None or end is not None:
+                    ordinal = to_ordinal(row[date_i])
+                    if start is not None and ordinal < start:
+                        continue
+                    if end is not None and ordinal > end:
+                        continue
+                if transaction_type is not None and row[type_i] != transaction_type:
+                    continue
+                if category is not None and row[category_i].strip().lower() != category:
+                    continue
+                yield decode(row)
+
+    def format_rows(self, transactions):
+        """
+        Returns each transaction as a formatted CSV line.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        lines = []
+        for t in transactions:
+            writer.writerow(self._row(t))
+            lines.append(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+        return lines
+
+    def append_rows(self, transactions):
+        file_exists = os.path.exists(self.file_path)
+        index_current = (
+            self._offsets is not None
+            and self._offsets_signature == self.file_signature()
+        )
+        size = os.path.getsize(self.file_path) if file_exists else 0
+        indexed = len(self._offsets) if index_current else 0
+        try:
+            with open(self.file_path, "a", newline="") as file:
+                # Ensure the CSV file has headers if it’s newly created
+                if not file_exists:
+                    csv.writer(file).writerow(self.fieldnames)
+                if index_current:
+                    # Extend the line index with the byte offset of every new row
+                    position = self._offsets_signature[1]
+                    lines = self.format_rows(transactions)
+                    for line in lines:
+                        self._offsets.append(position)
+                        position += len(line.encode(file.encoding))
+                    text = "".join(lines)
+                else:
+                    buffer = io.StringIO()
+                    csv.writer(buffer).writerows(self._row(t) for t in transactions)
+                    text = buffer.getvalue()
+                # One write per append leaves a crash little room to tear a row
+                file.write(text)
+        except BaseException:
+            # An append is all or nothing: cut off any rows that were written
+            if file_exists:
+                os.truncate(self.file_path, size)
+            elif os.path.exists(self.file_path):
+                os.remove(self.file_path)
+            if index_current:
+                del self._offsets[indexed:]
+            raise
+        if index_current:
+            self._offsets_signature = self.file_signature()
+
+        first_id = len(self._base_rows)
+        self._row_ids.extend(range(first_id, first_id + len(transactions)))
+        self._base_rows.extend(transactions)
+
+    def append_mark(self):
+        # Appends only ever grow transactions.csv; edits and deletes go to the log
+        size = os.path.getsize(self.file_path) if os.path.exists(self.file_path) else 0
+        log_signature = self.log_signature()
+        return [size, list(log_signature) if log_signature else None]
+
+    def undo_appends(self, mark, transactions):
+        size, log_signature = mark
+        current = (
+            os.path.getsize(self.file_path) if os.path.exists(self.file_path) else 0
+        )
+        if current < size or self.log_signature() != (
+            tuple(log_signature) if log_signature else None
+        ):
+            return False
+        if current > size:
+            # The bytes after the mark must start the text the append was writing
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if not size:
+                writer.writerow(self.fieldnames)
+            writer.writerows(self._row(t) for t in transactions)
+            expected = buffer.getvalue().encode(locale.getpreferredencoding(False))
+            if current - size > len(expected):
+                return False
+            with open(self.file_path, "rb") as file:
+                file.seek(size)
+                if not expected.startswith(file.read()):
+                    return False
+            # Cuts off the appended rows, including one torn by a crash
+            if size:
+                os.truncate(self.file_path, size)
+            else:
+                os.remove(self.file_path)
+            self._offsets = None
+            self._refresh_signature(False)
+        return True
+
+    def replace_row(self, index, transaction):
+        (row_id,) = self.locate(index, 1)
+        self.append_log("U", row_id, self._row(transaction))
+
+    def delete_row(self, index):
+        (row_id,) = self.locate(index, 1)
+        if self._cache_current():
+            del self._row_ids[index]
+        self.append_log("D", row_id, [""] * len(self.fieldnames))
+
+    def clear_rows(self):
+        self.rewrite([])
+
+    # ---------- Edit log ----------
+
+    def append_log(self, op, row_id, values):
+        """
+        Appends one replacement or tombstone record to the edit log, compacting it when it grows too long.
+        """
+        was_current = self._cache_current()
+        crc = self.checksum(self.base_row(row_id))
+        with open(self.log_path, "a", newline="") as file:
+            csv.writer(file).writerow([op, row_id, crc, *values])
+        self._log_records += 1
+        if was_current:
+            # The caller already applied the change to the cached transactions
+            self._signature = self.signature()
+
+        if self._log_records >= self.compact_threshold:
+            self.compact()
+
+    def compact(self):
+        """
+        Folds the edit log into transactions.csv and removes the log.
+        """
+        self.rewrite(self.load() or [])
+
+    def rewrite(self, transactions):
+        """
+        Atomically replaces the transactions file with the given transactions and drops the edit log.
+        """
+        os.makedirs(self.user_dir, exist_ok=True)
+        with atomic_write(
+            self.file_path, lambda path: open(path, "w", newline="")
+        ) as tmp:
+            writer = csv.writer(tmp)
+            writer.writerow(self.fieldnames)
+            writer.writerows(self._row(t) for t in transactions)
+        # Stale log records no longer match their rows' checksums, so a crash
+        # before this removal cannot re-apply them
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+
+        self._base_rows = list(transactions)
+        self._row_ids = array("q", range(len(transactions)))
+        self._log_records = 0
+        self._offsets = None
+        if self._transactions is not None:
+            self._transactions = list(transactions)
+            self._refresh_signature(True)
+
+
+def storage_engine(username):
+    """
+    Returns the storage engine chosen by the user ("csv" or "sqlite").
+    """
+    users = Authenticator().load_users()
+    return users.get(username, {}).get("storage", "csv")
+
+
+def open_store(username, engine=None):
+    """
+    Opens the transaction store for the given user.
+
+    Parameters:
+    username (str): The user's name
+    engine (str): "csv" or "sqlite"; defaults to the engine saved in the user's profile
+
+    Returns:
+    TransactionStore: The user's transaction store
+    """
+    engine = engine or storage_engine(username)
+    if engine == "sqlite":
+        from function.transactions.sqlite_store import SQLiteTransactionStore
+
+        return SQLiteTransactionStore(username)
+    return CsvTransactionStore(username)
@@ -1,104 +1,133 @@
-from colorama import Fore, Style, init
-from tabulate import tabulate
 import os
-import csv
 import time
 import datetime
-
-
-init(autoreset=True)  # ensure color resets automatically
+from function.transactions.transaction_store import open_store
+from function.transactions.text_index import match_offsets
+from function.transactions.transaction_query import TransactionQuery
+from function.transactions.paged_table import PagedTable
+
+# sort_by() option: (field, descending, number of rows to keep or None for all,
+# transaction type to keep or None for both)
+SORT_OPTIONS = {
+    "1": ("date", False, None, None),
+    "2": ("date", True, None, None),
+    "3": ("amount", False, None, None),
+    "4": ("amount", True, None, None),
+    "5": ("amount", True, 20, "expense"),
+}
 
 
 class ViewTransactions:
-    def __init__(self, username):
+    def __init__(self, username, store=None):
+        from colorama import init
+
+        init(autoreset=True)  # ensure color resets automatically
         self.username = username
-        self.file_path = f"database/{username}/transactions.csv"
-        self.search_term = None
-        self.transactions = self.get_transactions()
+        self.store = store or open_store(username)
+        # Filters, sorts and searches are recorded here and evaluated on display
+        self.query = TransactionQuery(self.store)
+        self.reset()
+
+    @property
+    def transactions(self):
+        """
+        The transactions matching the active query, or None if the user has no data file.
+        """
+        if self.store.signature() is None:
+            return None
+        return self.query.results()
+
+    @property
+    def search_term(self):
+        keywords = self.query.keywords()
+        return keywords[-1] if keywords else None
 
     def get_transactions(self):
         """
         Retrieves all transactions for the given user.
 
-        This function will iterate through the transactions CSV file and add all transactions for the given user to the self.transactions list.
+        This function will clear every active filter, so the transactions list holds all transactions of the given user again.
 
         Returns:
         list: A list of all transactions for the given user.
         """
-        self.search_term = None
-        transactions = []
-        try:
-            with open(self.file_path, "r") as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    transactions.append(row)
-            return transactions
-        except FileNotFoundError:
+        self.reset()
+        return self.transactions
+
+    def reset(self):
+        """
+        Clears every active filter without evaluating anything.
+
+        Warns the user if there is no transaction file yet.
+        """
+        self.query.clear()
+        if self.store.signature() is None:
             print(
                 f"No transactions found for user '{self.username}'."
                 f" Please add transactions first."
             )
             time.sleep(2)
-            return None
 
-    def filter_category(self):
+    def undo(self):
+        """
+        Removes the most recent filter, sort or search.
+
+        Results of the earlier steps are reused, so nothing is re-read.
+
+        Returns:
+        tuple: The removed step, or None if no filter was active
+        """
+        return self.query.pop()
+
+    def filter_category(self, category=None):
         """
         Filters all transactions for the given user by a category.
 
-        This function will prompt the user to enter a category.
-        It will then iterate through the transactions CSV file and add all transactions for the given user and category to the self.transactions list.
+        This function will prompt the user to enter a category unless one is given.
+        It will then add the category to the active query, which keeps all earlier filters, and evaluate it against the transaction store.
 
         Returns:
         list: A list of all transactions for the given user and category.
         """
         os.system("cls" if os.name == "nt" else "clear")
 
-        while True:
+        while not category:
             category = input("Enter the category to filter by: ").strip()
 
             if not category:
                 print("Please enter a category.")
-                continue
-            break
 
-        filtered = []
-
-        for transaction in self.transactions:
-            if transaction["category"] == category:
-                filtered.append(transaction)
+        filtered = self.query.where_category(category).results()
 
         if not filtered:
             print(f"No transactions found for category '{category}'.")
 
-        self.transactions = filtered
         return self.transactions
 
-    def filter_date(self):
+    def filter_date(self, start_date=None, end_date=None):
         """
         Filters all transactions for the given user by a date range.
 
-        This function will prompt the user to enter a start and end date.
-        It will then iterate through the transactions CSV file and add all transactions for the given user and date range to the self.transactions list.
+        This function will prompt the user to enter a start and end date unless a start date is given.
+        The end date defaults to today's date.
+        It will then add the date range to the active query, which keeps all earlier filters, and evaluate it against the transaction store.
 
         Returns:
         list: A list of all transactions for the given user and date range.
         """
         os.system("cls" if os.name == "nt" else "clear")
 
-        start_date, end_date = self.get_date_inputs()
-
-        filtered = []
+        if start_date is None:
+            start_date, end_date = self.get_date_inputs()
+        end_date = end_date or datetime.date.today().isoformat()
 
-        for transaction in self.transactions:
-            if transaction["date"] >= start_date and transaction["date"] <= end_date:
-                filtered.append(transaction)
+        filtered = self.query.where_date(start_date, end_date).results()
 
         if not filtered:
             print(
                 f"No transactions found for date range '{start_date}' to '{end_date}'."
             )
 
-        self.transactions = filtered
         return self.transactions
 
     def get_date_inputs(self):
@@ -142,153 +171,140 @@ class ViewTransactions:
 
         return start_date, end_date
 
-    def sort_by(self):
+    def sort_by(self, option=None):
         """
         Sorts the transactions by the given option.
 
-        This function will continually prompt the user for an option until a valid option is entered.
+        Unless a valid option is given, this function will continually prompt the user for an option until a valid option is entered.
 
         The options are:
         1. Sort by date in ascending order
         2. Sort by date in descending order (latest transactions first)
         3. Sort by amount in ascending order
         4. Sort by amount in descending order
+        5. Only the 20 largest expenses of the transactions shown; sorts and filters chosen afterwards apply to those 20
 
         Returns a sorted list of transactions.
 
         """
         os.system("cls" if os.name == "nt" else "clear")
         print(
-            f"Sort transaction by:\n1. Date Sorted\n2. Latest Transactions\n3. Amount ascending\n4. Amount descending"
+            f"Sort transaction by:\n1. Date Sorted\n2. Latest Transactions\n3. Amount ascending\n4. Amount descending\n5. Largest 20 expenses"
         )
 
-        while True:
+        while option not in SORT_OPTIONS:
+            if option is not None:
+                print("Invalid option. Please enter a number between 1 and 5.")
             option = input("Enter the number of the option: ").strip()
 
-            match option:
-                case "1":
-                    self.transactions.sort(key=lambda x: x["date"])
-                    break
-
-                case "2":
-                    self.transactions.sort(key=lambda x: x["date"], reverse=True)
-                    break
-
-                case "3":
-                    self.transactions.sort(
-                        key=lambda x: int(x["amount"]),
-                    )
-                    break
-
-                case "4":
-                    self.transactions.sort(
-                        key=lambda x: int(x["amount"]),
-                        reverse=True,
-                    )
-                    break
-
-                case _:
-                    print("Invalid option. Please enter a number between 1 and 4.")
+        order_by, descending, limit, transaction_type = SORT_OPTIONS[option]
+        if transaction_type is not None:
+            self.query.where_type(transaction_type)
+        self.query.order_by(order_by, descending)
+        if limit is not None:
+            self.query.limit(limit)
 
         return self.transactions
 
-    def search(self):
+    def search(self, search_term=None):
         """
         Searches through all transactions for the given user and filters by a search query.
 
-        This function will prompt the user to enter a search query.
-        It will then iterate through the transactions CSV file and add all transactions for the given user and search query to the self.transactions list.
+        This function will prompt the user to enter a search query unless one is given.
+        It will then add the search query to the active query, which keeps all earlier filters, and evaluate it against the transaction store.
 
         Returns:
         list: A list of all transactions for the given user and search query.
         """
         os.system("cls" if os.name == "nt" else "clear")
 
-        while True:
+        while not search_term:
             search_term = input("Enter the search query: ").strip()
 
             if not search_term:
                 print("Please enter a search query.")
-                continue
-            break
 
-        self.search_term = search_term
-        filtered = []
-
-        for transaction in self.transactions:
-            if any(
-                search_term.lower() in str(value).lower()
-                for value in transaction.values()
-            ):
-                filtered.append(transaction)
+        filtered = self.query.search(search_term).results()
 
         if not filtered:
             print(f"No transactions found for search term '{search_term}'.")
         else:
             print(f"Found {len(filtered)} matching transactions.")
 
-        self.transactions = filtered
         return self.transactions
 
     def highlight(self, text):
         """
         Highlights occurrences of the search term in the given text.
+
+        The match offsets are shared with the search index, so cells it already matched are not scanned again.
         """
+        text = str(text)
         if not self.search_term:
             return text
 
-        term = self.search_term
-        lower_text = text.lower()
-        lower_term = term.lower()
+        from colorama import Fore, Style
 
-        start = 0
         highlighted = ""
-        while True:
-            index = lower_text.find(lower_term, start)
-            if index == -1:
-                highlighted += text[start:]
-                break
+        start = 0
+        for index, end in match_offsets(text, self.search_term.lower()):
             # add text before match, highlight match, continue
             highlighted += (
                 text[start:index]
                 + Fore.YELLOW
                 + Style.BRIGHT
-                + text[index : index + len(term)]
+                + text[index:end]
                 + Style.RESET_ALL
             )
-            start = index + len(term)
-        return highlighted
+            start = end
+        return highlighted + text[start:]
+
+    def page_source(self):
+        """
+        Returns where the table reads its pages from.
+
+        Without filters, pages come straight from the store, so the full history never has to be copied; otherwise they are slices of the query results.
+
+        Returns:
+        tuple: (rows(start, size), count()) callables
+        """
+        if not self.query.steps:
+            return self.store.page, self.store.count
+        results = self.query.results()
+        return (lambda start, size: results[start : start + size]), results.__len__
 
     def run(self):
         """
-        Prints all transactions for the given user.
+        Prints the transactions for the given user, one page at a time.
 
-        This function will clear the console, retrieve all transactions for the given user, and then print out each transaction in a formatted manner.
+        This function will clear the console and print the first page of the transactions matching the active filters.
+        Only the cells on the visible page are formatted and highlighted.
 
         If no transactions are found, it will print a message indicating so.
 
-        After printing out all transactions, it will wait for the user to press Enter before continuing.
+        The user can move between pages and returns by pressing Enter.
         """
         os.system("cls" if os.name == "nt" else "clear")
 
-        if self.transactions is None:
+        if self.store.signature() is None:
             return
 
-        if self.transactions:
-            headers = ["Date", "Type", "Amount", "Category", "Description"]
-
-            table_data = [
-                [
-                    self.highlight(t["date"]),
-                    self.highlight(t["type"]),
-                    self.highlight(t["amount"]),
-                    self.highlight(t["category"]),
-                    self.highlight(t["description"]),
-                ]
-                for t in self.transactions
-            ]
-            print(tabulate(table_data, headers=headers, tablefmt="fancy_grid"))
+        rows, count = self.page_source()
+        if count():
+            table = PagedTable(
+                ["Date", "Type", "Amount", "Category", "Description"],
+                rows,
+                count,
+                lambda position, t: [
+                    self.highlight(t.date),
+                    self.highlight(t.type),
+                    self.highlight(t.amount),
+                    self.highlight(t.category),
+                    self.highlight(t.description),
+                ],
+            )
+            table.browse("Navigate the pages or press Enter to continue: ")
 
         else:
             print("No transactions found.")
-        input("Press Enter to continue...")
+            input("Press Enter to continue...")
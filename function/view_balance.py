@@ -1,42 +1,32 @@
 import os
-import csv
 import time
+from function.transactions.transaction_store import open_store
 
 
 class ViewBalance:
-    def __init__(self, username):
+    def __init__(self, username, store=None):
         """
         Initializes a ViewBalance object.
 
         Parameters:
         username (str): The user's name
+        store (TransactionStore): Shared transaction store (optional)
 
         Returns:
         None
         """
         self.username = username
-        self.file_path = f"database/{username}/transactions.csv"
+        self.store = store or open_store(username)
 
     def calculate_balance(self):
         """
         Calculates the user's total income and expense from the transactions CSV file.
 
-        This function will iterate through the transactions CSV file and sum up the total income and expense for the given username.
+        This function will read the running totals kept by the transaction store, so it does not depend on the size of the history.
 
         Returns a tuple containing the total income and total expense as integers.
         """
-        total_income = 0
-        total_expense = 0
-        try:
-            with open(self.file_path, "r") as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row["type"] == "income":
-                        total_income += int(row["amount"])
-                    elif row["type"] == "expense":
-                        total_expense += int(row["amount"])
-            return total_income, total_expense
-        except FileNotFoundError:
+        if not self.store.exists():
             print(
                 f"No transactions found for user '{self.username}'."
                 f" Please add transactions first."
@@ -44,6 +34,8 @@ class ViewBalance:
             time.sleep(2)
             return None
 
+        return self.store.balance()
+
     def run(self):
         """
         Prints the user's current balance.
@@ -56,8 +48,9 @@ class ViewBalance:
         None
         """
         os.system("cls" if os.name == "nt" else "clear")
-        if not self.calculate_balance() is None:
-            total_income, total_expense = self.calculate_balance()
+        balance = self.calculate_balance()
+        if balance is not None:
+            total_income, total_expense = balance
             print("💰 Balance Summary")
             print(f"Total Income: {total_income}$")
             print(f"Total Expense: {total_expense}$")
@@ -1,19 +1,48 @@
-import pyfiglet
 import os
-from function.main_menu import MainMenu
-from function.auth import Authenticator
+import sys
+import time
+
+STARTED = time.perf_counter()
 
 
 def main():
-    os.system("cls" if os.name == "nt" else "clear")
+    from function.startup_timer import StartupTimer
+
+    timer = StartupTimer.from_environment(STARTED)
+
+    # With arguments, run a batch command without the login prompt and menus
+    if len(sys.argv) > 1:
+        with timer.phase("batch imports"):
+            from function.batch import main as batch_main
+        with timer.phase("batch command"):
+            status = batch_main(sys.argv[1:])
+        timer.report()
+        sys.exit(status)
+
+    with timer.phase("clear screen"):
+        os.system("cls" if os.name == "nt" else "clear")
 
-    ascii_art = pyfiglet.figlet_format("Welcome Back!", font="slant")
-    print(ascii_art)
+    with timer.phase("banner"):
+        import pyfiglet
+
+        ascii_art = pyfiglet.figlet_format("Welcome Back!", font="slant")
+        print(ascii_art)
+
+    with timer.phase("authenticator"):
+        from function.auth import Authenticator
+
+        auth = Authenticator()
+    # Everything up to the login prompt
+    timer.report()
 
-    auth = Authenticator()
     username = auth.run()
     if username:
-        MainMenu(username).run()
+        with timer.phase("main menu"):
+            from function.main_menu import MainMenu
+
+            menu = MainMenu(username)
+        timer.report()
+        menu.run()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """
+    Runs every test in an empty directory, since stores live under database/.
+    """
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("database")
+    return tmp_path
+
+
+def write_transactions(username, rows):
+    """
+    Writes a user's transactions.csv from (amount, category, description, date, type) rows.
+    """
+    os.makedirs(f"database/{username}", exist_ok=True)
+    with open(f"database/{username}/transactions.csv", "w") as f:
+        f.write("amount,category,description,date,type\n")
+        for row in rows:
+            f.write(",".join(map(str, row)) + "\n")
+
+
+@pytest.fixture(params=["csv", "sqlite"])
+def store(request):
+    """
+    Alice's store on each engine, holding the ROWS of the test module.
+    """
+    from function.transactions.transaction_store import open_store
+
+    write_transactions("alice", request.module.ROWS)
+    store = open_store("alice", "csv")
+    if request.param == "sqlite":
+        from function.transactions.sqlite_store import SQLiteTransactionStore
+
+        store = SQLiteTransactionStore("alice")
+        store.migrate_from_csv()
+    yield store
+    store.close()
@@ -0,0 +1,46 @@
+import pytest
+
+from function.transactions.backup import IncrementalBackup
+
+ROWS = [
+    (30, "Food", "lunch", "2024-01-03", "expense"),
+    (100, "Rent", "flat", "2024-01-01", "expense"),
+    (90, "Salary", "pay", "2024-01-04", "income"),
+]
+
+
+def rows(store):
+    return [t.as_row() for t in store.stream()]
+
+
+def test_restore_replaces_the_transactions(store):
+    backup = IncrementalBackup(store, "backups")
+    backup.run()
+    expected = rows(store)
+    store.delete(0)
+    store.add(5, "Food", "coffee", "2024-01-05", "expense")
+
+    assert backup.restore() == (1, 3)
+    assert rows(store) == expected
+    assert store.balance() == (90, 130)
+    assert list(store.category_positions("food")) == [0]
+    # The restore starts a new chain
+    assert backup.run()["kind"] == "full"
+
+
+def test_interrupted_restore_leaves_the_transactions(store, monkeypatch):
+    backup = IncrementalBackup(store, "backups")
+    backup.run()
+    store.add(5, "Food", "coffee", "2024-01-05", "expense")
+    before = rows(store)
+
+    def fail(transactions):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(store, "rewrite", fail)
+        with pytest.raises(OSError):
+            backup.restore()
+
+    assert rows(store) == before
+    assert rows(type(store)("alice")) == before
@@ -0,0 +1,125 @@
+import io
+import os
+import sys
+import json
+import subprocess
+
+from conftest import write_transactions
+from function import batch
+from function.batch import BatchCli
+
+
+def run(argv):
+    output, errors = io.StringIO(), io.StringIO()
+    status = BatchCli(output, errors).run(argv)
+    documents = [json.loads(line) for line in output.getvalue().splitlines()]
+    return status, documents, errors.getvalue()
+
+
+def add_users(*usernames):
+    with open("database/users.json", "w") as f:
+        json.dump({username: {} for username in usernames}, f)
+
+
+def test_undecodable_statement_fails_for_that_user_only():
+    add_users("alice", "bob")
+    with open("statement.csv", "wb") as f:
+        f.write(b"amount,category,description,date,type\n")
+        f.write("12,Food,Caf\xe9 cr\xe8me,2024-01-05,expense\n".encode("latin-1"))
+
+    status, documents, errors = run(["--all-users", "import", "statement.csv"])
+
+    assert status == 1
+    assert documents == []
+    # Reported for each user instead of ending the run at the first one
+    assert errors.startswith("alice: Cannot read statement.csv as CSV text")
+    assert "\nbob: Cannot read statement.csv as CSV text" in errors
+    assert not os.path.exists("database/alice/import.checkpoint.json")
+    assert not os.path.exists("database/bob/import.checkpoint.json")
+
+
+def test_malformed_transactions_fail_for_that_user_only():
+    add_users("alice", "bob")
+    write_transactions("alice", [(5, "Food")])
+    write_transactions("bob", [(7, "Food", "tea", "2024-01-02", "expense")])
+
+    for command in ("balance", "list"):
+        status, documents, errors = run(["--all-users", command])
+
+        assert status == 1
+        assert [d["user"] for d in documents] == ["bob"]
+        assert errors.startswith("alice: ")
+
+
+def test_import_fails_when_one_of_the_files_cannot_be_read():
+    add_users("alice")
+    os.makedirs("statements")
+    with open("statements/jan.csv", "w") as f:
+        f.write("amount,category,description,date,type\n")
+        f.write("5,Food,coffee,2024-01-02,expense\n")
+    with open("statements/feb.csv", "w") as f:
+        f.write("amount,category\n5,Food\n")
+
+    status, documents, errors = run(["--user", "alice", "import", "statements"])
+
+    assert status == 1
+    assert documents[0]["imported"] == 1
+    assert [f["error"] is None for f in documents[0]["files"]] == [False, True]
+    assert errors.startswith("alice: statements/feb.csv: ")
+
+
+def test_date_options_are_normalized():
+    add_users("alice")
+    write_transactions(
+        "alice",
+        [
+            (10, "Food", "a", "2024-01-05", "expense"),
+            (20, "Food", "b", "2024-1-15", "expense"),
+            (30, "Food", "c", "2023-12-31", "expense"),
+        ],
+    )
+    os.makedirs("out")
+
+    _, listed, _ = run(["--user", "alice", "list", "--from", "2024-01-1"])
+    _, exported, _ = run(["--user", "alice", "export", "out", "--from", "2024-1-1"])
+
+    assert [t["date"] for t in listed[0]["transactions"]] == [
+        "2024-01-05",
+        "2024-01-15",
+    ]
+    assert exported[0]["rows"] == 2
+
+
+def test_missing_backup_fails_for_that_user():
+    add_users("alice")
+    write_transactions("alice", [(5, "Food", "coffee", "2024-01-02", "expense")])
+
+    status, documents, errors = run(["--user", "alice", "restore", "backups"])
+
+    assert status == 1
+    assert documents == []
+    assert errors == "alice: no backup of alice in 'backups'\n"
+
+
+def test_export_choices_match_the_exporter():
+    from function.transactions.exporter import COMPRESSIONS, EXPORT_FORMATS
+
+    assert batch.EXPORT_FORMATS == list(EXPORT_FORMATS)
+    assert batch.COMPRESSIONS == [name for name in COMPRESSIONS if name]
+
+
+def test_loading_batch_leaves_out_the_command_modules():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = (
+        "import sys, function.batch; "
+        "print(sorted(m for m in sys.modules if m.endswith(("
+        "'parallel_import', 'backup', 'exporter'))))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout == "[]\n"
@@ -0,0 +1,154 @@
+import os
+
+import pytest
+
+from function.transactions.bulk_import import BulkImporter
+from function.transactions.parallel_import import ParallelImporter
+from function.transactions.transaction_store import open_store
+
+HEADER = "amount,category,description,date,type\n"
+
+
+def write_statement(path, lines):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(HEADER + "".join(line + "\n" for line in lines))
+
+
+def read_only(monkeypatch, directory):
+    writable = os.access
+    directory = os.path.abspath(directory)
+    monkeypatch.setattr(
+        os,
+        "access",
+        lambda path, mode: path != directory and writable(path, mode),
+    )
+
+
+def test_valid_statement_creates_no_reject_file():
+    write_statement("statements/jan.csv", ["5,Food,coffee,2024-01-02,expense"])
+    before = os.stat("statements").st_mtime_ns
+
+    result = BulkImporter(open_store("alice")).run("statements/jan.csv")
+
+    assert result == (1, 0, 0, None)
+    assert os.listdir("statements") == ["jan.csv"]
+    assert os.stat("statements").st_mtime_ns == before
+
+
+def test_rejects_go_to_the_user_folder_when_the_statement_folder_is_read_only(
+    monkeypatch,
+):
+    write_statement(
+        "statements/jan.csv",
+        ["5,Food,coffee,2024-01-02,expense", "x,Food,tea,2024-01-03,expense"],
+    )
+    read_only(monkeypatch, "statements")
+
+    result = BulkImporter(open_store("alice")).run("statements/jan.csv")
+
+    reject_path = os.path.join("database", "alice", "jan.rejects.csv")
+    assert result == (1, 1, 0, reject_path)
+    with open(reject_path) as f:
+        assert (
+            f.read().splitlines()[1]
+            == "3,Invalid amount 'x',x,Food,tea,2024-01-03,expense"
+        )
+    assert os.listdir("statements") == ["jan.csv"]
+
+
+def test_parallel_rejects_go_to_the_user_folder(monkeypatch):
+    write_statement("statements/jan.csv", ["x,Food,tea,2024-01-03,expense"])
+    write_statement("statements/feb.csv", ["5,Food,coffee,2024-02-02,expense"])
+    read_only(monkeypatch, "statements")
+
+    files = ParallelImporter(open_store("alice"), workers=1).run(
+        ["statements/feb.csv", "statements/jan.csv"]
+    )
+
+    assert [f["reject_file"] for f in files] == [
+        None,
+        os.path.join("database", "alice", "jan.rejects.csv"),
+    ]
+    assert sorted(os.listdir("statements")) == ["feb.csv", "jan.csv"]
+
+
+@pytest.mark.parametrize("failing_chunk", [2, 3])
+def test_resumed_import_writes_the_same_rejects(monkeypatch, failing_chunk):
+    lines = [
+        "1,Food,a,2024-01-01,expense",
+        "2,Food,b,2024-01-02,expense",
+        "3,Food,c,2024-01-03,expense",
+        "x,Food,d,2024-01-04,expense",
+        "5,Food,e,2024-01-05,expense",
+        "y,Food,f,2024-01-06,expense",
+    ]
+    write_statement("clean/statement.csv", lines)
+    expected = BulkImporter(open_store("bob"), chunk_size=2).run("clean/statement.csv")
+    with open("clean/statement.rejects.csv") as f:
+        expected_rejects = f.read()
+
+    write_statement("statements/statement.csv", lines)
+    store = open_store("alice")
+    extend = store.extend
+    calls = []
+
+    def crash(transactions, values=None):
+        calls.append(1)
+        if len(calls) == failing_chunk:
+            raise KeyboardInterrupt
+        extend(transactions, values)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(store, "extend", crash)
+        with pytest.raises(KeyboardInterrupt):
+            BulkImporter(store, chunk_size=2).run("statements/statement.csv")
+
+    importer = BulkImporter(open_store("alice"), chunk_size=2)
+    result = importer.run("statements/statement.csv")
+
+    assert importer.resumed_at is not None
+    assert result[:3] == expected[:3]
+    with open("statements/statement.rejects.csv") as f:
+        assert f.read() == expected_rejects
+    assert open_store("alice").count() == open_store("bob").count()
+
+
+@pytest.mark.parametrize("engine", ["csv", "sqlite"])
+def test_rows_added_before_the_resume_are_kept(monkeypatch, engine):
+    lines = [
+        "1,Food,a,2024-01-01,expense",
+        "2,Food,b,2024-01-02,expense",
+        "3,Food,c,2024-01-03,expense",
+        "4,Food,d,2024-01-04,expense",
+        "5,Food,e,2024-01-05,expense",
+    ]
+    write_statement("statements/statement.csv", lines)
+    store = open_store("alice", engine)
+    extend = store.extend
+
+    def crash(transactions, values=None):
+        # Half of the second chunk reaches the store
+        if transactions[0].amount == 3:
+            extend(transactions[:1], values and values[:1])
+            raise KeyboardInterrupt
+        extend(transactions, values)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(store, "extend", crash)
+        with pytest.raises(KeyboardInterrupt):
+            BulkImporter(store, chunk_size=2).run("statements/statement.csv")
+    store.close()
+
+    store = open_store("alice", engine)
+    store.add(999, "Manual", "cash", "2024-01-10", "expense")
+    store.close()
+
+    store = open_store("alice", engine)
+    importer = BulkImporter(store, chunk_size=2)
+    result = importer.run("statements/statement.csv")
+
+    assert importer.resumed_at is None
+    assert result[:3] == (2, 0, 3)
+    assert sorted(t.amount for t in store.stream()) == [1, 2, 3, 4, 5, 999]
+    assert store.balance() == (0, 1014)
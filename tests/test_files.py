@@ -0,0 +1,27 @@
+import os
+
+import pytest
+
+from utils.files import atomic_write
+
+
+def test_atomic_write_replaces_the_file():
+    with open("data.txt", "w") as f:
+        f.write("old")
+    with atomic_write("data.txt") as f:
+        f.write("new")
+    with open("data.txt") as f:
+        assert f.read() == "new"
+    assert sorted(os.listdir()) == ["data.txt", "database"]
+
+
+def test_failed_atomic_write_keeps_the_old_file():
+    with open("data.txt", "w") as f:
+        f.write("old")
+    with pytest.raises(RuntimeError):
+        with atomic_write("data.txt") as f:
+            f.write("new")
+            raise RuntimeError
+    with open("data.txt") as f:
+        assert f.read() == "old"
+    assert sorted(os.listdir()) == ["data.txt", "database"]
@@ -0,0 +1,50 @@
+from function.transactions.transaction_query import TransactionQuery
+
+ROWS = [
+    (30, "Food", "lunch", "2024-01-03", "expense"),
+    (100, "Rent", "flat", "2024-01-01", "expense"),
+    (70, "Food", "dinner", "2024-01-05", "expense"),
+    (5, "Food", "coffee", "2024-01-02", "expense"),
+    (90, "Salary", "pay", "2024-01-04", "income"),
+]
+
+
+def amounts(query):
+    return [t.amount for t in query.results()]
+
+
+def test_sort_after_limit_orders_the_kept_rows(store):
+    query = TransactionQuery(store).order_by("amount", True).limit(2)
+    assert amounts(query) == [100, 90]
+    query.order_by("date")
+    # The two largest, now by date, not the first two dates
+    assert amounts(query) == [100, 90]
+    assert [t.date for t in query.results()] == ["2024-01-01", "2024-01-04"]
+
+
+def test_filter_after_limit_filters_the_kept_rows(store):
+    query = TransactionQuery(store).order_by("amount", True).limit(3)
+    query.where_category("Food")
+    assert amounts(query) == [70]
+
+
+def test_limits_apply_in_order(store):
+    query = TransactionQuery(store).order_by("date").limit(4)
+    query.order_by("amount").limit(2)
+    assert amounts(query) == [5, 30]
+
+
+def test_limit_last_is_pushed_to_the_store(store):
+    query = TransactionQuery(store).where_category("Food").order_by("amount")
+    assert amounts(query.limit(2)) == [5, 30]
+    assert query.pop() == ("limit", 2)
+    assert amounts(query) == [5, 30, 70]
+
+
+def test_type_filter_before_and_after_a_limit(store):
+    query = TransactionQuery(store).where_type("expense").order_by("amount", True)
+    assert amounts(query.limit(2)) == [100, 70]
+
+    query = TransactionQuery(store).order_by("amount", True).limit(2)
+    assert amounts(query.where_type("expense")) == [100]
+    assert amounts(query.where_type("income")) == []
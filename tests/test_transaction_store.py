@@ -0,0 +1,181 @@
+import os
+
+import pytest
+
+from conftest import write_transactions
+from function.transactions.transaction import Transaction, to_ordinal
+from function.transactions.transaction_store import CsvTransactionStore
+
+ROWS = [
+    (10, "Food", "a", "2024-01-31", "expense"),
+    (20, "Food", "b", "2024-1-15", "expense"),
+    (30, "Rent", "c", "2023-12-31", "expense"),
+    (40, "Salary", "d", "2024-01-05", "income"),
+    (50, "Food", "e", "2024-2-1", "expense"),
+]
+
+
+def dates(transactions):
+    return [t.date for t in transactions]
+
+
+@pytest.mark.parametrize(
+    "start, end",
+    [
+        ("2024-01-01", "2024-01-31"),
+        ("2024-1-1", "2024-1-31"),
+        ("2024-01-15", None),
+        (None, "2024-01-15"),
+        (None, None),
+    ],
+)
+def test_cold_and_warm_stream_filter_dates_alike(start, end):
+    write_transactions("alice", ROWS)
+    cold = dates(CsvTransactionStore("alice").stream(start, end))
+
+    warm_store = CsvTransactionStore("alice")
+    warm_store.load()
+    warm = dates(warm_store.stream(start, end))
+
+    assert cold == warm
+    low = to_ordinal(start) if start else float("-inf")
+    high = to_ordinal(end) if end else float("inf")
+    expected = [
+        t.date for t in warm_store.get_transactions() if low <= t.ordinal <= high
+    ]
+    assert cold == expected
+
+
+def test_cold_stream_keeps_unpadded_dates_in_range():
+    write_transactions("alice", ROWS)
+    store = CsvTransactionStore("alice")
+    assert dates(store.stream("2024-01-01", "2024-01-31")) == [
+        "2024-01-31",
+        "2024-01-15",
+        "2024-01-05",
+    ]
+
+
+@pytest.mark.parametrize(
+    "date", ["20240105", "2024-W01-1", "2024-005", "2024-01-05T00"]
+)
+def test_other_iso_date_forms_are_rejected(date):
+    with pytest.raises(ValueError):
+        to_ordinal(date)
+
+
+def test_indexes_reload_from_their_journals():
+    write_transactions("alice", ROWS)
+    store = CsvTransactionStore("alice")
+    store.category_positions("food")
+    store.fingerprints()
+    store.add(60, "food", "f", "2024-02-02", "expense")
+    store.delete(0)
+
+    reopened = CsvTransactionStore("alice")
+    signature = reopened.signature()
+    assert reopened.category_index.load(signature)
+    assert list(reopened.category_index.positions("Food")) == [0, 3, 4]
+    assert reopened.fingerprint_index.load(signature)
+    assert len(reopened.fingerprint_index) == 5
+
+
+@pytest.mark.parametrize(
+    "torn", ["12,Fo", "12,Food,lunch,2024-01-0", "12,Food,lunch,2024-01-06,expen"]
+)
+def test_torn_last_row_is_cut_off_on_open(torn):
+    write_transactions("alice", ROWS)
+    with open("database/alice/transactions.csv", "a") as f:
+        f.write(torn)
+
+    store = CsvTransactionStore("alice")
+
+    assert len(store.get_transactions()) == len(ROWS)
+    store.add(60, "Food", "f", "2024-02-02", "expense")
+    assert [t.amount for t in CsvTransactionStore("alice").stream()][-2:] == [50, 60]
+
+
+def test_complete_last_row_without_line_break_is_kept():
+    write_transactions("alice", ROWS)
+    with open("database/alice/transactions.csv", "a") as f:
+        f.write("60,Food,f,2024-02-02,expense")
+
+    store = CsvTransactionStore("alice")
+    store.add(70, "Food", "g", "2024-02-03", "expense")
+
+    amounts = [t.amount for t in CsvTransactionStore("alice").stream()]
+    assert amounts[-2:] == [60, 70]
+
+
+def test_torn_header_of_a_new_file_is_removed():
+    os.makedirs("database/alice")
+    with open("database/alice/transactions.csv", "w") as f:
+        f.write("amount,categ")
+
+    store = CsvTransactionStore("alice")
+
+    assert not store.exists()
+
+
+def edit(store):
+    store.update(1, Transaction(25, "Food", "b2", "2024-01-16", "expense"))
+    store.delete(0)
+    store.delete(2)
+
+
+EDITED = [
+    (25, "Food", "b2", "2024-01-16", "expense"),
+    (30, "Rent", "c", "2023-12-31", "expense"),
+    (50, "Food", "e", "2024-02-01", "expense"),
+]
+
+
+def rows(transactions):
+    return [tuple(t.as_row()) for t in transactions]
+
+
+def test_edits_and_deletes_read_back_cold_and_warm():
+    write_transactions("alice", ROWS)
+    warm = CsvTransactionStore("alice")
+    warm.load()
+    edit(warm)
+    with open("database/alice/transactions.csv") as f:
+        lines = f.read().splitlines()
+
+    cold = CsvTransactionStore("alice")
+
+    assert rows(warm.get_transactions()) == EDITED
+    assert rows(cold.stream()) == EDITED
+    assert rows(cold.page(0, 3)) == EDITED
+    assert rows(cold.get_transactions()) == EDITED
+    assert cold.count() == 3
+    # Edits go to the log, not the CSV file
+    assert len(lines) == len(ROWS) + 1
+    assert os.path.exists("database/alice/transactions.log")
+
+
+def test_edit_log_is_compacted_at_the_threshold(monkeypatch):
+    monkeypatch.setattr(CsvTransactionStore, "compact_threshold", 3)
+    write_transactions("alice", ROWS)
+    store = CsvTransactionStore("alice")
+
+    edit(store)
+
+    assert not os.path.exists("database/alice/transactions.log")
+    with open("database/alice/transactions.csv") as f:
+        assert f.read().splitlines()[1:] == [",".join(map(str, r)) for r in EDITED]
+    assert rows(CsvTransactionStore("alice").stream()) == EDITED
+
+
+def test_edit_log_is_ignored_after_an_outside_rewrite():
+    write_transactions("alice", ROWS)
+    edit(CsvTransactionStore("alice"))
+    # Same number of rows, none of them as the log records expect
+    replaced = [(amount + 1, *rest) for amount, *rest in ROWS]
+    write_transactions("alice", replaced)
+
+    store = CsvTransactionStore("alice")
+
+    expected = rows(Transaction(*row) for row in replaced)
+    assert rows(store.stream()) == expected
+    assert rows(store.get_transactions()) == expected
@@ -0,0 +1,27 @@
+from conftest import write_transactions
+from function.transactions.view_transactions import ViewTransactions
+
+
+def test_largest_20_keeps_its_rows_when_sorted_again(monkeypatch):
+    monkeypatch.setattr("os.system", lambda command: 0)
+    # Amounts rise while dates fall, so "first by date" and "largest" differ
+    write_transactions(
+        "alice",
+        [
+            (n, "Food", f"row {n}", f"2024-02-{29 - n:02d}", "expense")
+            for n in range(1, 29)
+        ]
+        + [(1000, "Salary", "pay", "2024-02-01", "income")],
+    )
+    view = ViewTransactions("alice")
+
+    largest = view.sort_by("5")
+    # Expenses only; the larger income is left out
+    assert [t.amount for t in largest] == list(range(28, 8, -1))
+
+    by_date = view.sort_by("1")
+    assert sorted(t.amount for t in by_date) == list(range(9, 29))
+    assert [t.date for t in by_date] == sorted(t.date for t in by_date)
+
+    view.undo()
+    assert view.transactions == largest
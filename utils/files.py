@@ -0,0 +1,30 @@
+import os
+import tempfile
+import contextlib
+
+
+@contextlib.contextmanager
+def atomic_write(file_path, opener=None):
+    """
+    Opens a temporary file next to file_path and renames it over file_path once the block completes.
+
+    If the block fails, the temporary file is removed and file_path is left as it was.
+
+    Parameters:
+    file_path (str): Path of the file to replace
+    opener (callable): Opens the temporary file from its path; a text file for writing by default
+
+    Returns:
+    file: The open temporary file
+    """
+    if opener is None:
+        opener = lambda path: open(path, "w")
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or ".")
+    os.close(fd)
+    try:
+        with opener(tmp_path) as tmp:
+            yield tmp
+        os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)